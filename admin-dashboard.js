@@ -20,7 +20,7 @@ protectRoute('admin').then(userData => {
 
 console.log("Admin Dashboard JS Loaded");
 
-let evData = [];
+const DASHBOARD_API = "https://ev-4ce7.onrender.com/dashboard";
 let charts = {};
 
 const powerBIColors = [
@@ -39,20 +39,32 @@ window.logout = function () {
   });
 };
 
-// 📂 Load data
-fetch("backend-data/ev_vehicle_with_extra_10000.json")
-  .then(res => res.json())
-  .then(data => {
-    evData = Array.isArray(data) ? data : data.data;
-    loadBrandFilter();
-    loadCategoryFilter();
+// 📂 Load data (pre-aggregated by the backend; see backend/dashboard_rollups.py)
+function fetchRollup(params = {}) {
+  return fetch(`${DASHBOARD_API}/rollups?${new URLSearchParams(params)}`)
+    .then(res => {
+      if (!res.ok) throw new Error("Dashboard rollups request failed");
+      return res.json();
+    });
+}
+
+// { key: value } from a rollup group list, e.g. groupMap(rollup.by.State, g => g.count)
+function groupMap(groups, value) {
+  return Object.fromEntries((groups || []).map(g => [g.key, value(g)]));
+}
+
+fetchRollup()
+  .then(rollup => {
+    loadBrandFilter(rollup);
+    loadCategoryFilter(rollup);
     updateDashboard();
-  });
+  })
+  .catch(err => console.error("Failed to load dashboard rollups:", err));
 
 // 🔽 Brand filter
-function loadBrandFilter() {
+function loadBrandFilter(rollup) {
   const select = document.getElementById("brandFilter");
-  const brands = [...new Set(evData.map(d => d.Brand))];
+  const brands = rollup.by.Brand.map(g => g.key);
 
   brands.forEach(b => {
     const o = document.createElement("option");
@@ -65,9 +77,9 @@ function loadBrandFilter() {
 }
 
 // 🔽 Category filter (Industry)
-function loadCategoryFilter() {
+function loadCategoryFilter(rollup) {
   const select = document.getElementById("categoryFilter");
-  const categories = [...new Set(evData.map(d => d.Vehicle_Category))];
+  const categories = rollup.by.Vehicle_Category.map(g => g.key);
 
   categories.forEach(c => {
     const o = document.createElement("option");
@@ -80,44 +92,36 @@ function loadCategoryFilter() {
 }
 
 // 🔄 Main Dashboard Update
-function updateDashboard() {
+async function updateDashboard() {
   const brandVal = document.getElementById("brandFilter").value;
   const catVal = document.getElementById("categoryFilter").value;
 
-  const rows = evData.filter(d => {
-    const matchBrand = (brandVal === "All" || d.Brand === brandVal);
-    const matchCat = (catVal === "All" || d.Vehicle_Category === catVal);
-    return matchBrand && matchCat;
-  });
+  const params = {};
+  if (brandVal !== "All") params.brand = brandVal;
+  if (catVal !== "All") params.category = catVal;
 
-  // ================= KPIs =================
-  let co2 = 0, efficiency = 0, batteryKwh = 0, units = 0, price = 0;
-
-  rows.forEach(r => {
-    co2 += Number(r.CO2_Emissions_Saved_kg) || 0;
-    efficiency += Number(r.Efficiency_km_per_kWh) || 0;
-    batteryKwh += Number(r.Battery_Capacity_kWh) || 0;
-    units += Number(r.Units_Sold_Per_Year) || 1;
-    price += Number(r.Vehicle_Price) || 0;
-  });
+  let rollup;
+  try {
+    rollup = await fetchRollup(params);
+  } catch (err) {
+    console.error("Failed to load dashboard rollups:", err);
+    return;
+  }
 
-  const count = rows.length || 1;
+  // ================= KPIs =================
+  const count = rollup.rows || 1;
 
-  document.getElementById("users").innerText = rows.length.toLocaleString();
-  document.getElementById("co2").innerText = Math.round(co2).toLocaleString();
-  document.getElementById("avg-efficiency").innerText = (efficiency / count).toFixed(1);
-  document.getElementById("avg-battery").innerText = Math.round(batteryKwh / count);
-  document.getElementById("total-units").innerText = Math.round(units).toLocaleString();
-  document.getElementById("avg-price").innerText = "₹" + Math.round(price / count).toLocaleString();
+  document.getElementById("users").innerText = rollup.rows.toLocaleString();
+  document.getElementById("co2").innerText = Math.round(rollup.totals.CO2_Emissions_Saved_kg || 0).toLocaleString();
+  document.getElementById("avg-efficiency").innerText = ((rollup.totals.Efficiency_km_per_kWh || 0) / count).toFixed(1);
+  document.getElementById("avg-battery").innerText = Math.round((rollup.totals.Battery_Capacity_kWh || 0) / count);
+  document.getElementById("total-units").innerText = Math.round(rollup.totals.Units_Sold_Per_Year || 0).toLocaleString();
+  document.getElementById("avg-price").innerText = "₹" + Math.round((rollup.totals.Vehicle_Price || 0) / count).toLocaleString();
 
   Object.values(charts).forEach(c => c.destroy());
 
   // ================= Units by Year =================
-  const yearMap = {};
-  rows.forEach(r => {
-    yearMap[r.Purchase_Year] =
-      (yearMap[r.Purchase_Year] || 0) + (Number(r.Units_Sold_Per_Year) || 1);
-  });
+  const yearMap = groupMap(rollup.by.Purchase_Year, g => g.sum.Units_Sold_Per_Year || 0);
 
   charts.unitsYear = new Chart(distanceChart, {
     type: "line",
@@ -135,11 +139,7 @@ function updateDashboard() {
   });
 
   // ================= Category =================
-  const catMap = {};
-  rows.forEach(r => {
-    catMap[r.Vehicle_Category] =
-      (catMap[r.Vehicle_Category] || 0) + 1;
-  });
+  const catMap = groupMap(rollup.by.Vehicle_Category, g => g.count);
 
   charts.category = new Chart(categoryChart, {
     type: "doughnut",
@@ -154,10 +154,7 @@ function updateDashboard() {
   });
 
   // ================= State =================
-  const stateMap = {};
-  rows.forEach(r => {
-    stateMap[r.State] = (stateMap[r.State] || 0) + 1;
-  });
+  const stateMap = groupMap(rollup.by.State, g => g.count);
 
   charts.state = new Chart(stateChart, {
     type: "bar",
@@ -173,11 +170,10 @@ function updateDashboard() {
   });
 
   // ================= NEW 1️⃣ Units Sold per Year by State =================
-  const stateYearMap = {};
-  rows.forEach(r => {
-    const key = `${r.State}-${r.Purchase_Year}`;
-    stateYearMap[key] = (stateYearMap[key] || 0) + 1;
-  });
+  const stateYearMap = groupMap(
+    [...(rollup.by.state_year || [])].sort((a, b) => String(a.key).localeCompare(String(b.key))),
+    g => g.count
+  );
 
   charts.stateYear = new Chart(stateYearChart, {
     type: "bar",
@@ -193,11 +189,7 @@ function updateDashboard() {
   });
 
   // ================= NEW 2️⃣ Vehicle Price by Year =================
-  const priceYearMap = {};
-  rows.forEach(r => {
-    priceYearMap[r.Purchase_Year] =
-      (priceYearMap[r.Purchase_Year] || 0) + (Number(r.Vehicle_Price) || 0);
-  });
+  const priceYearMap = groupMap(rollup.by.Purchase_Year, g => g.sum.Vehicle_Price || 0);
 
   charts.priceYear = new Chart(priceYearChart, {
     type: "line",
@@ -215,18 +207,9 @@ function updateDashboard() {
   });
 
   // ================= NEW 3️⃣ Revenue by Brand =================
-  // Aggregation
-  const revMap = {};
-  const salesMap = {};
-
-  rows.forEach(r => {
-    const b = r.Brand;
-    const revenue = (Number(r.Vehicle_Price) || 0) * (Number(r.Units_Sold_Per_Year) || 1);
-    const units = Number(r.Units_Sold_Per_Year) || 1;
-
-    revMap[b] = (revMap[b] || 0) + revenue;
-    salesMap[b] = (salesMap[b] || 0) + units;
-  });
+  // Aggregation (Revenue = price x units, derived by the backend)
+  const revMap = groupMap(rollup.by.Brand, g => g.sum.Revenue || 0);
+  const salesMap = groupMap(rollup.by.Brand, g => g.sum.Units_Sold_Per_Year || 0);
 
   // Sort by revenue desc for better viz
   const sortedBrands = Object.keys(revMap).sort((a, b) => revMap[b] - revMap[a]);
@@ -0,0 +1,170 @@
+"""
+Admission control: per-route-class concurrency limits with bounded,
+deadline-limited wait queues.
+
+A few large /predict_sales forecasts or batch requests must not take every
+worker thread from the cheap single-row routes. Routes are put into a
+class (main.py decorates them with @_admit('expensive') / @_admit('cheap')):
+
+    expensive   at most ADMISSION_EXPENSIVE_CONCURRENCY requests in flight
+    cheap       any free slot of ADMISSION_MAX_CONCURRENCY; the slots the
+                expensive class can never take are reserved for them
+
+A request that finds its class full waits in that class's queue until a
+slot frees up or its queue deadline passes:
+
+    queue full          → 429 Too Many Requests
+    deadline passed     → 503 Service Unavailable
+    both with Retry-After (seconds), estimated from the class's recent
+    service time and the queue ahead of the request
+
+Limits are per worker process (threads of one gunicorn gthread worker or
+of the threaded dev server); /health and /metrics are never limited.
+
+A request waiting in a queue holds its worker thread. Under gunicorn
+(gunicorn.conf.py runs gthread workers) the limits are therefore fitted to
+the worker's thread count once it has started (size_for_threads):
+expensive concurrency + expensive queue stays within threads minus
+ADMISSION_RESERVED_THREADS, so those threads are always free for cheap
+routes, and an expensive request that finds no room is rejected at once.
+
+    ADMISSION_CONTROL=1                    0 disables every limit
+    ADMISSION_MAX_CONCURRENCY=16           limited requests in flight per process
+    ADMISSION_EXPENSIVE_CONCURRENCY=2
+    ADMISSION_EXPENSIVE_QUEUE=8            waiting requests before 429
+    ADMISSION_EXPENSIVE_TIMEOUT_MS=5000    max wait before 503
+    ADMISSION_CHEAP_QUEUE=64
+    ADMISSION_CHEAP_TIMEOUT_MS=1000
+    ADMISSION_RESERVED_THREADS=            default: a quarter of the threads, at least 1
+"""
+import os
+import math
+import time
+import threading
+
+ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', '1').lower() in ('1', 'true', 'yes')
+ADMISSION_MAX_CONCURRENCY = int(os.environ.get('ADMISSION_MAX_CONCURRENCY', 16))
+ADMISSION_EXPENSIVE_CONCURRENCY = int(os.environ.get('ADMISSION_EXPENSIVE_CONCURRENCY', 2))
+ADMISSION_EXPENSIVE_QUEUE = int(os.environ.get('ADMISSION_EXPENSIVE_QUEUE', 8))
+ADMISSION_EXPENSIVE_TIMEOUT_MS = float(os.environ.get('ADMISSION_EXPENSIVE_TIMEOUT_MS', 5000))
+ADMISSION_CHEAP_QUEUE = int(os.environ.get('ADMISSION_CHEAP_QUEUE', 64))
+ADMISSION_CHEAP_TIMEOUT_MS = float(os.environ.get('ADMISSION_CHEAP_TIMEOUT_MS', 1000))
+ADMISSION_RESERVED_THREADS = os.environ.get('ADMISSION_RESERVED_THREADS')
+
+# Weight of the newest request in the service-time average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Rejected(Exception):
+    """Request not admitted: HTTP status, Retry-After seconds and reason."""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class RouteClass:
+    def __init__(self, name, max_concurrency, max_queue, queue_timeout):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout      # seconds
+
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = {'queue_full': 0, 'deadline': 0}
+        self.service_time = None                # EWMA seconds
+
+    def retry_after(self):
+        """Seconds until the queue ahead of a new request has likely drained."""
+        per_request = self.service_time if self.service_time is not None else 1.0
+        return max(1, math.ceil(per_request * (self.queued + 1) / max(self.max_concurrency, 1)))
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency=ADMISSION_MAX_CONCURRENCY, enabled=ADMISSION_CONTROL):
+        self.enabled = enabled
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self.classes = {
+            'expensive': RouteClass('expensive', min(ADMISSION_EXPENSIVE_CONCURRENCY, max_concurrency),
+                                    ADMISSION_EXPENSIVE_QUEUE, ADMISSION_EXPENSIVE_TIMEOUT_MS / 1000.0),
+            'cheap': RouteClass('cheap', max_concurrency,
+                                ADMISSION_CHEAP_QUEUE, ADMISSION_CHEAP_TIMEOUT_MS / 1000.0),
+        }
+
+    def size_for_threads(self, threads, reserved=None):
+        """
+        Fit the limits to a worker with `threads` threads: expensive requests
+        (running + queued) never hold more than threads - reserved of them.
+        """
+        if reserved is None:
+            reserved = int(ADMISSION_RESERVED_THREADS) if ADMISSION_RESERVED_THREADS else max(1, threads // 4)
+        budget = max(1, threads - reserved)
+        with self._cond:
+            self.max_concurrency = threads
+            expensive, cheap = self.classes['expensive'], self.classes['cheap']
+            expensive.max_concurrency = max(1, min(expensive.max_concurrency, budget))
+            expensive.max_queue = min(expensive.max_queue, budget - expensive.max_concurrency)
+            cheap.max_concurrency = threads
+        print(f"[admission] sized for {threads} threads: expensive {expensive.max_concurrency} running "
+              f"+ {expensive.max_queue} queued, {threads - budget} reserved for cheap routes")
+
+    def _has_slot(self, cls):
+        return cls.in_flight < cls.max_concurrency and self.in_flight < self.max_concurrency
+
+    def acquire(self, name):
+        """Take a slot of class `name`, waiting up to its queue timeout. Raises Rejected."""
+        cls = self.classes[name]
+        with self._cond:
+            if not self._has_slot(cls):
+                if cls.queued >= cls.max_queue:
+                    cls.rejected['queue_full'] += 1
+                    raise Rejected(429, cls.retry_after(), f"Too many {name} requests queued")
+                cls.queued += 1
+                deadline = time.monotonic() + cls.queue_timeout
+                try:
+                    while not self._has_slot(cls):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            cls.rejected['deadline'] += 1
+                            raise Rejected(503, cls.retry_after(), f"Timed out waiting for a slot ({name} routes)")
+                        self._cond.wait(remaining)
+                finally:
+                    cls.queued -= 1
+            cls.in_flight += 1
+            cls.admitted += 1
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def release(self, name, started):
+        cls = self.classes[name]
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            cls.in_flight -= 1
+            self.in_flight -= 1
+            cls.service_time = elapsed if cls.service_time is None else \
+                (1 - SERVICE_TIME_ALPHA) * cls.service_time + SERVICE_TIME_ALPHA * elapsed
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'enabled': self.enabled,
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'classes': {name: {
+                    'max_concurrency': c.max_concurrency,
+                    'max_queue': c.max_queue,
+                    'queue_timeout_s': c.queue_timeout,
+                    'in_flight': c.in_flight,
+                    'queued': c.queued,
+                    'admitted': c.admitted,
+                    'rejected': dict(c.rejected),
+                    'service_time_ms': round(c.service_time * 1000, 3) if c.service_time is not None else None,
+                } for name, c in self.classes.items()},
+            }
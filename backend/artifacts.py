@@ -0,0 +1,77 @@
+"""
+Model artifact loading with memory-mapped NumPy arrays.
+
+With MODEL_MMAP=1 every .pkl is re-dumped once with joblib into
+MODEL_MMAP_DIR (keyed on the source file's size and mtime) and loaded with
+mmap_mode, so the large arrays (SARIMA state-space matrices, compiled
+tree-engine node arrays) live in file-backed pages that the kernel shares
+between all gunicorn workers instead of being copied into each worker's
+heap. Objects whose C state is rebuilt on unpickling (sklearn Tree nodes)
+still end up private; preloading in the master (gunicorn.conf.py) shares
+those copy-on-write.
+
+    MODEL_MMAP=0                      plain pickle/joblib load (default)
+    MODEL_MMAP_DIR=backend/.mmap_cache
+
+The mapping is copy-on-write ('c'): statsmodels needs writable buffers, and
+any page a worker does write becomes private to that worker only.
+"""
+import os
+import glob
+
+MODEL_MMAP = os.environ.get("MODEL_MMAP", "0").lower() in ("1", "true", "yes")
+MODEL_MMAP_DIR = os.environ.get(
+    "MODEL_MMAP_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".mmap_cache"))
+
+
+def _cache_path(source_path, suffix=""):
+    st = os.stat(source_path)
+    name = os.path.basename(source_path)
+    return os.path.join(MODEL_MMAP_DIR, f"{name}{suffix}.{st.st_size}-{st.st_mtime_ns}.joblib")
+
+
+def _dump_atomic(obj, path):
+    import joblib
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(obj, tmp)          # uncompressed: required for mmap_mode
+    os.replace(tmp, path)
+    # Drop copies of older versions of the same artifact (mapped pages of an
+    # unlinked file stay valid for workers still using them)
+    prefix = path.rsplit(".", 2)[0]
+    for stale in glob.glob(f"{glob.escape(prefix)}.*.joblib"):
+        if stale != path and stale.count(".") == path.count("."):
+            os.remove(stale)
+
+
+def _plain_load(path):
+    # joblib.load reads plain pickles as well as joblib dumps
+    import joblib
+    return joblib.load(path)
+
+
+def load_artifact(path, mmap=None):
+    """Unpickle a model artifact, memory-mapping its arrays when MODEL_MMAP is on."""
+    if not (MODEL_MMAP if mmap is None else mmap):
+        return _plain_load(path)
+
+    import joblib
+    cached = _cache_path(path)
+    if not os.path.exists(cached):
+        _dump_atomic(_plain_load(path), cached)
+    return joblib.load(cached, mmap_mode="c")
+
+
+def load_derived(source_path, tag, build, mmap=None):
+    """
+    Object derived from an artifact (e.g. a compiled tree engine), cached
+    next to the mmap copies and invalidated with the source file.
+    """
+    if not (MODEL_MMAP if mmap is None else mmap):
+        return build()
+
+    import joblib
+    cached = _cache_path(source_path, f".{tag}")
+    if not os.path.exists(cached):
+        _dump_atomic(build(), cached)
+    return joblib.load(cached, mmap_mode="r")
@@ -0,0 +1,382 @@
+"""
+Streaming battery telemetry → running per-battery health aggregates.
+
+/predict_health expects the client to send aggregates (total_charge_cycles,
+avg_battery_temperature_c, ...). Vehicles instead report one event per
+charge session (TELEMETRY_SCHEMA in schema.py); POST /telemetry accepts
+batches of them and folds each into a fixed-size record per battery:
+
+    cycles, fast sessions           counts            → total_charge_cycles,
+                                                        fast_charging_frequency_percent
+    DoD, charge time, temperature,  running sums      → avg_* (sum / cycles)
+    voltage
+    max temperature                 running max       → max_battery_temperature_c
+    resistance, capacity retention, latest reading    → as is
+    vehicle age                     (by timestamp)
+
+Every update is O(1) per event and no event history is kept, so memory
+is bounded by the fleet size (TELEMETRY_RECORD_BYTES per battery).
+
+The records live in one binary file of fixed-width rows, memory-mapped
+shared, plus an append-only list of battery ids (row i = line i). Ids
+are restricted to BATTERY_ID_PATTERN, so no id can contain a line break
+and every process reads the same id → row mapping back:
+
+    TELEMETRY_DIR/aggregates.bin   one row per battery (dtype AGGREGATE_DTYPE)
+    TELEMETRY_DIR/battery_ids      battery id per line ('\n'-terminated)
+    TELEMETRY_DIR/meta.json        format + dtype, checked on open
+
+Batches are applied under an exclusive file lock, so gunicorn workers
+share one consistent store; the shared mapping makes each worker's
+updates visible to the others immediately and the kernel writes them
+back (msync at most every TELEMETRY_FLUSH_SECONDS).
+
+Health is re-scored with the existing model only for batteries whose
+aggregate feature vector moved by more than TELEMETRY_RESCORE_DELTA
+(relative, per feature) since their last score, that were never scored,
+or whose score came from another health-model version (hot reload). The
+last score is kept in the record as its label, with the model version
+that produced it, so reads never decode it with a newer model's classes.
+
+    TELEMETRY_DIR              default backend/telemetry_state
+    TELEMETRY_MAX_BATTERIES    default 1000000; events for new batteries beyond it are rejected
+    TELEMETRY_RESCORE_DELTA    default 0.02
+    TELEMETRY_FLUSH_SECONDS    default 5
+"""
+import os
+import re
+import json
+import time
+import fcntl
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from schema import TELEMETRY_SCHEMA
+from utils import HEALTH_FEATURES
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TELEMETRY_DIR = os.environ.get('TELEMETRY_DIR', os.path.join(BACKEND_DIR, 'telemetry_state'))
+TELEMETRY_MAX_BATTERIES = int(os.environ.get('TELEMETRY_MAX_BATTERIES', 1_000_000))
+TELEMETRY_RESCORE_DELTA = float(os.environ.get('TELEMETRY_RESCORE_DELTA', 0.02))
+TELEMETRY_FLUSH_SECONDS = float(os.environ.get('TELEMETRY_FLUSH_SECONDS', 5))
+
+FORMAT = 2
+INITIAL_CAPACITY = 1024
+MAX_BATTERY_ID_LENGTH = 64
+BATTERY_ID_PATTERN = re.compile(rf'[A-Za-z0-9._:-]{{1,{MAX_BATTERY_ID_LENGTH}}}')
+MAX_LABEL_LENGTH = 16
+MAX_VERSION_LENGTH = 16
+
+AGGREGATE_DTYPE = np.dtype([
+    ('cycles',            '<u4'),
+    ('fast_cycles',       '<u4'),
+    ('sum_dod',           '<f8'),
+    ('sum_charge_hours',  '<f8'),
+    ('sum_avg_temp',      '<f8'),
+    ('sum_voltage',       '<f8'),
+    ('max_temp',          '<f4'),
+    ('resistance',        '<f4'),
+    ('capacity',          '<f4'),
+    ('age',               '<f4'),
+    ('last_timestamp',    '<f8'),
+    # last health score: the features it was computed from, the class (index
+    # and label) and the health-model version that produced it
+    ('scored_features',   '<f4', (len(HEALTH_FEATURES),)),
+    ('prediction_index',  '<i2'),
+    ('prediction',        f'S{MAX_LABEL_LENGTH}'),
+    ('model_version',     f'S{MAX_VERSION_LENGTH}'),
+    ('scored_at',         '<f8'),
+])
+TELEMETRY_RECORD_BYTES = AGGREGATE_DTYPE.itemsize
+
+
+def health_features(records):
+    """Aggregate records → (n, 10) float64 matrix in HEALTH_FEATURES order."""
+    cycles = records['cycles'].astype(np.float64)
+    n = np.maximum(cycles, 1)
+    columns = {
+        'vehicle_age_years':               records['age'],
+        'total_charge_cycles':             cycles,
+        'avg_depth_of_discharge_percent':  records['sum_dod'] / n,
+        'avg_charging_time_hours':         records['sum_charge_hours'] / n,
+        'fast_charging_frequency_percent': 100.0 * records['fast_cycles'] / n,
+        'avg_battery_temperature_c':       records['sum_avg_temp'] / n,
+        'max_battery_temperature_c':       records['max_temp'],
+        'avg_voltage':                     records['sum_voltage'] / n,
+        'internal_resistance_mohm':        records['resistance'],
+        'capacity_retention_percent':      records['capacity'],
+    }
+    return np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in HEALTH_FEATURES])
+
+
+class TelemetryStore:
+    def __init__(self, root=TELEMETRY_DIR, max_batteries=TELEMETRY_MAX_BATTERIES,
+                 rescore_delta=TELEMETRY_RESCORE_DELTA, flush_seconds=TELEMETRY_FLUSH_SECONDS):
+        self.root = root
+        self.max_batteries = max_batteries
+        self.rescore_delta = rescore_delta
+        self.flush_seconds = flush_seconds
+
+        self._thread_lock = threading.Lock()
+        self._opened = False
+        self._lock_file = None
+        self._data_file = None
+        self._records = None     # np.memmap over aggregates.bin
+        self._rows = {}          # battery id → row
+        self._ids = []
+        self._ids_offset = 0     # bytes of battery_ids already read
+        self._last_flush = time.monotonic()
+
+        self.events = 0
+        self.rescored = 0
+
+    # ------------------------------------------------------------------ #
+    # Storage
+    # ------------------------------------------------------------------ #
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _open(self):
+        """Create or open the store (first use only, so importing main never touches disk)."""
+        if self._opened:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        self._lock_file = open(self._path('lock'), 'a+')
+        meta = {'format': FORMAT, 'dtype': AGGREGATE_DTYPE.descr}
+        with self._exclusive():
+            meta_path = self._path('meta.json')
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    stored = json.load(f)
+                if stored != json.loads(json.dumps(meta)):
+                    raise RuntimeError(f"Telemetry store {self.root} has an incompatible format; "
+                                       f"move it aside to start a new one")
+            else:
+                with open(meta_path, 'w') as f:
+                    json.dump(meta, f)
+            self._data_file = open(self._path('aggregates.bin'), 'a+b')
+            open(self._path('battery_ids'), 'a').close()
+        self._opened = True
+
+    @contextmanager
+    def _exclusive(self):
+        """Cross-process lock around every read-modify-write of the store."""
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Pick up batteries added by other processes and remap if the file grew (lock held)."""
+        with open(self._path('battery_ids'), 'rb') as f:
+            f.seek(self._ids_offset)
+            tail = f.read()
+        # Only complete '\n'-terminated lines; splitlines() would also split on \r, \x85, ...
+        tail = tail[:tail.rfind(b'\n') + 1]
+        if tail:
+            for battery_id in tail.split(b'\n')[:-1]:
+                battery_id = battery_id.decode()
+                if battery_id in self._rows:
+                    raise RuntimeError(f"{self._path('battery_ids')}: duplicate battery id {battery_id!r}")
+                self._rows[battery_id] = len(self._ids)
+                self._ids.append(battery_id)
+            self._ids_offset += len(tail)
+
+        size = os.fstat(self._data_file.fileno()).st_size
+        if self._records is None or self._records.nbytes != size:
+            self._map(size)
+
+    def _map(self, size):
+        if isinstance(self._records, np.memmap):
+            self._records.flush()
+        self._records = (np.memmap(self._data_file, dtype=AGGREGATE_DTYPE, mode='r+')
+                         if size else np.zeros(0, dtype=AGGREGATE_DTYPE))
+
+    def _add_batteries(self, battery_ids):
+        """Append new batteries; grows aggregates.bin by doubling (lock held)."""
+        needed = len(self._ids) + len(battery_ids)
+        if needed > len(self._records):
+            capacity = max(INITIAL_CAPACITY, len(self._records))
+            while capacity < needed:
+                capacity *= 2
+            # New rows read as zeros: an empty aggregate
+            os.ftruncate(self._data_file.fileno(), capacity * TELEMETRY_RECORD_BYTES)
+            self._map(capacity * TELEMETRY_RECORD_BYTES)
+
+        rows = np.arange(len(self._ids), needed)
+        self._records['max_temp'][rows] = -np.inf
+        self._records['prediction_index'][rows] = -1
+        with open(self._path('battery_ids'), 'ab') as f:
+            data = ''.join(f'{b}\n' for b in battery_ids).encode()
+            f.write(data)
+        self._ids_offset += len(data)
+        for battery_id, row in zip(battery_ids, rows.tolist()):
+            self._rows[battery_id] = row
+            self._ids.append(battery_id)
+
+    def flush(self):
+        with self._thread_lock:
+            if isinstance(self._records, np.memmap):
+                self._records.flush()
+            self._last_flush = time.monotonic()
+
+    # ------------------------------------------------------------------ #
+    # Ingest
+    # ------------------------------------------------------------------ #
+
+    def ingest(self, events, health=None, model_version=None):
+        """
+        Fold a batch of events into the aggregates; re-score changed batteries
+        with `health` (load_health_model() namespace, at `model_version`)
+        when given.
+
+        Returns {'accepted', 'failed', 'errors', 'batteries', 'rescored':
+        [{battery_id, prediction, ...}], 'pending'} where pending counts
+        batteries due for a score that could not be scored (no model).
+        """
+        from scoring import score_health_matrix
+
+        arr, valid, errors = TELEMETRY_SCHEMA.parse_many(events)
+        ids = arr['battery_id'].astype(str) if len(arr) else np.zeros(0, dtype=str)
+        bad = np.array([BATTERY_ID_PATTERN.fullmatch(b) is None for b in ids.tolist()], dtype=bool)
+        for pos in np.flatnonzero(bad):
+            errors.append({'index': valid[pos], 'error': f"Invalid battery_id {ids[pos].item()!r}: expected 1-{MAX_BATTERY_ID_LENGTH} "
+                                                    "characters from A-Z a-z 0-9 . _ : -"})
+
+        with self._thread_lock:
+            self._open()
+            with self._exclusive():
+                self._refresh()
+                new = list(dict.fromkeys(b for b, x in zip(ids.tolist(), bad) if not x and b not in self._rows))
+                room = max(self.max_batteries - len(self._ids), 0)
+                if len(new) > room:
+                    rejected = set(new[room:])
+                    new = new[:room]
+                    for pos, battery_id in enumerate(ids.tolist()):
+                        if battery_id in rejected and not bad[pos]:
+                            bad[pos] = True
+                            errors.append({'index': valid[pos],
+                                           'error': f"Fleet capacity reached ({self.max_batteries} batteries)"})
+                if new:
+                    self._add_batteries(new)
+
+                keep = ~bad
+                arr, ids = arr[keep], ids[keep]
+                rows = np.fromiter((self._rows[b] for b in ids.tolist()), dtype=np.int64, count=len(ids))
+                self._apply(rows, arr)
+                touched = np.unique(rows)
+                rescored, pending = self._rescore(touched, health, model_version, score_health_matrix)
+                self.events += len(rows)
+
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+        errors.sort(key=lambda e: e['index'])
+        return {'accepted': int(len(rows)), 'failed': len(errors), 'errors': errors,
+                'batteries': int(len(touched)), 'rescored': rescored, 'pending': pending}
+
+    def _apply(self, rows, arr):
+        """O(1)-per-event updates: counts and sums add, max maxes, readings keep the latest."""
+        if not len(rows):
+            return
+        rec = self._records
+        for field, column in (('cycles', None), ('fast_cycles', 'fast_charge'),
+                              ('sum_dod', 'depth_of_discharge_percent'),
+                              ('sum_charge_hours', 'charging_time_hours'),
+                              ('sum_avg_temp', 'avg_temperature_c'), ('sum_voltage', 'voltage')):
+            values = np.ones(len(rows)) if column is None else arr[column]
+            if field == 'fast_cycles':
+                values = values >= 0.5
+            target = rec[field]
+            np.add.at(target, rows, values.astype(target.dtype))
+        np.maximum.at(rec['max_temp'], rows, arr['max_temperature_c'].astype(np.float32))
+
+        # Latest reading per battery: the event with the greatest timestamp
+        # (ties → later in the batch), unless the stored one is newer
+        order = np.lexsort((np.arange(len(rows)), arr['timestamp']))
+        last = order[::-1][np.unique(rows[order][::-1], return_index=True)[1]]
+        last = last[arr['timestamp'][last] >= rec['last_timestamp'][rows[last]]]
+        target = rows[last]
+        rec['resistance'][target] = arr['internal_resistance_mohm'][last]
+        rec['capacity'][target] = arr['capacity_retention_percent'][last]
+        rec['age'][target] = arr['vehicle_age_years'][last]
+        rec['last_timestamp'][target] = arr['timestamp'][last]
+
+    def _rescore(self, rows, health, model_version, score_health_matrix):
+        """
+        Score batteries that were never scored, drifted past rescore_delta or
+        were scored by another model version (lock held).
+        """
+        rec = self._records
+        if not len(rows):
+            return [], 0
+        features = health_features(rec[rows])
+        scored = rec['scored_features'][rows].astype(np.float64)
+        moved = np.abs(features - scored) > self.rescore_delta * np.maximum(np.abs(scored), 1.0)
+        stale = (rec['prediction_index'][rows] < 0) | moved.any(axis=1)
+        version = (model_version or '').encode()[:MAX_VERSION_LENGTH]
+        if health is not None and health.model is not None:
+            stale |= rec['model_version'][rows] != version
+        due = rows[stale]
+        if not len(due) or health is None or health.model is None:
+            return [], int(len(due))
+
+        matrix = features[stale]
+        results = score_health_matrix(health, matrix, [self._ids[r] for r in due.tolist()])
+        rec['scored_features'][due] = matrix.astype(np.float32)
+        rec['prediction_index'][due] = [r['prediction_index'] for r in results]
+        rec['prediction'][due] = [r['prediction'].encode()[:MAX_LABEL_LENGTH] for r in results]
+        rec['model_version'][due] = version
+        rec['scored_at'][due] = time.time()
+        self.rescored += len(due)
+        for result, row in zip(results, matrix.tolist()):
+            result['battery_id'] = result.pop('index')
+            result['features'] = dict(zip(HEALTH_FEATURES, row))
+        return results, 0
+
+    # ------------------------------------------------------------------ #
+    # Read
+    # ------------------------------------------------------------------ #
+
+    def battery(self, battery_id):
+        """Current aggregates (as /predict_health features) and last score, or None."""
+        with self._thread_lock:
+            self._open()
+            with self._exclusive():
+                self._refresh()
+                row = self._rows.get(battery_id)
+                if row is None:
+                    return None
+                rec = self._records[row:row + 1].copy()
+        out = {
+            'battery_id': battery_id,
+            'cycles': int(rec['cycles'][0]),
+            'last_timestamp': float(rec['last_timestamp'][0]),
+            'features': dict(zip(HEALTH_FEATURES, health_features(rec)[0].tolist())),
+            'prediction': None,
+            'prediction_index': None,
+            'scored_model_version': None,
+            'scored_at': None,
+        }
+        if rec['prediction_index'][0] >= 0:
+            out['prediction'] = rec['prediction'][0].decode()
+            out['prediction_index'] = int(rec['prediction_index'][0])
+            out['scored_model_version'] = rec['model_version'][0].decode() or None
+            out['scored_at'] = float(rec['scored_at'][0])
+        return out
+
+    def stats(self):
+        with self._thread_lock:
+            return {
+                'batteries': len(self._ids),
+                'capacity': len(self._records) if self._records is not None else 0,
+                'max_batteries': self.max_batteries,
+                'record_bytes': TELEMETRY_RECORD_BYTES,
+                'events': self.events,
+                'rescored': self.rescored,
+                'rescore_delta': self.rescore_delta,
+            }
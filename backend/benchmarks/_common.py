@@ -0,0 +1,182 @@
+"""
+Shared helpers for the benchmark / load-test scripts.
+
+Scripts in this directory are run from anywhere, e.g.
+    python backend/benchmarks/loadtest_coalescing.py
+and import the backend modules by path.
+"""
+import os
+import sys
+import json
+import time
+import random
+import threading
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+DATA_DIR = os.path.join(BACKEND_DIR, '..', 'backend-data')
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+HEALTH_CSV = os.path.join(DATA_DIR, 'Battery_Health_Status.csv')
+RESALE_CSV = os.path.join(BACKEND_DIR, 'resale_value.csv')
+
+
+# ==============================
+# Payloads
+# ==============================
+
+def health_payloads(n=500, seed=0):
+    df = pd.read_csv(HEALTH_CSV).drop(columns=['battery_id', 'battery_health_status'])
+    return df.sample(n=min(n, len(df)), random_state=seed).to_dict('records')
+
+
+def value_payloads(n=500, seed=0):
+    df = pd.read_csv(RESALE_CSV).drop(columns=['value_for_money_score'])
+    return df.sample(n=min(n, len(df)), random_state=seed).to_dict('records')
+
+
+def sales_params():
+    """The (steps, granularity) combinations the dashboards send."""
+    return [(12, 'monthly'), (24, 'monthly'), (36, 'monthly'), (3, 'yearly'), (5, 'yearly')]
+
+
+# ==============================
+# Server
+# ==============================
+
+class LocalServer:
+    """Run a WSGI app on an ephemeral port in a background thread."""
+
+    def __init__(self, app, threaded=True):
+        from werkzeug.serving import make_server, WSGIRequestHandler
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, app, threaded=threaded, request_handler=QuietHandler)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+
+class GunicornServer:
+    """Run `gunicorn main:app` from backend/ on a local port until closed."""
+
+    def __init__(self, port, workers=2, threads=1, env=None, timeout=120):
+        self.port = port
+        self.workers = workers
+        # gthread workers (gunicorn.conf.py); threads=1 serves one request at a time
+        cmd = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers), '--threads', str(threads), 'main:app']
+        self.cmd = cmd
+        self.env = dict(os.environ, **(env or {}))
+        self.timeout = timeout
+        self.proc = None
+
+    @property
+    def pid(self):
+        return self.proc.pid
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(self.cmd, cwd=BACKEND_DIR, env=self.env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {self.proc.returncode}: {' '.join(self.cmd)}")
+            try:
+                if http_request(self.port, 'GET', '/health')[0] == 200:
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f"gunicorn on port {self.port} not ready after {self.timeout}s")
+
+    def __exit__(self, *exc):
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait()
+
+
+def http_request(port, method, path, payload=None, host='127.0.0.1', headers=None):
+    """One request on a fresh connection → (status, elapsed_seconds, headers)."""
+    body = json.dumps(payload) if payload is not None else None
+    hdrs = {'Content-Type': 'application/json'} if body is not None else {}
+    hdrs.update(headers or {})
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    try:
+        conn.request(method, path, body=body, headers=hdrs)
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status, time.perf_counter() - start, dict(resp.getheaders())
+    finally:
+        conn.close()
+
+
+# ==============================
+# Load generation
+# ==============================
+
+def run_load(send, payloads, concurrency, requests_per_client, seed=0):
+    """
+    Drive send(payload) → (status, elapsed) from `concurrency` threads.
+    Returns a summary dict with throughput and latency percentiles (ms).
+    """
+    rng = random.Random(seed)
+    plans = [[rng.choice(payloads) for _ in range(requests_per_client)] for _ in range(concurrency)]
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def client(plan):
+        local_lat, local_status = [], {}
+        for payload in plan:
+            status, elapsed = send(payload)[:2]
+            local_lat.append(elapsed)
+            local_status[status] = local_status.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_lat)
+            for k, v in local_status.items():
+                statuses[k] = statuses.get(k, 0) + v
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, plans))
+    wall = time.perf_counter() - start
+    return summarize(latencies, wall, statuses)
+
+
+def summarize(latencies, wall_seconds, statuses=None):
+    lat_ms = np.asarray(latencies) * 1000.0
+    return {
+        'requests': int(lat_ms.size),
+        'wall_s': round(wall_seconds, 3),
+        'throughput_rps': round(lat_ms.size / wall_seconds, 1) if wall_seconds else 0.0,
+        'p50_ms': round(float(np.percentile(lat_ms, 50)), 3) if lat_ms.size else None,
+        'p95_ms': round(float(np.percentile(lat_ms, 95)), 3) if lat_ms.size else None,
+        'p99_ms': round(float(np.percentile(lat_ms, 99)), 3) if lat_ms.size else None,
+        'statuses': {str(k): v for k, v in sorted((statuses or {}).items())},
+    }
+
+
+def print_table(rows, columns):
+    widths = [max(len(c), *(len(str(r.get(c, ''))) for r in rows)) for c in columns]
+    print('  '.join(c.rjust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print('  '.join(str(r.get(c, '')).rjust(w) for c, w in zip(columns, widths)))
@@ -0,0 +1,181 @@
+"""
+Endpoint benchmark suite with a latency-regression gate.
+
+Drives the Flask app in-process (threaded werkzeug server) and/or through
+gunicorn with realistic payloads: rows sampled from
+Battery_Health_Status.csv and resale_value.csv, and the /predict_sales
+parameter combinations the dashboards send (point forecasts and
+mode=simulate scenario bands). For every
+(mode, endpoint, concurrency) it reports throughput and p50/p95/p99
+latency, and writes everything plus the run configuration to JSON.
+
+    python backend/benchmarks/bench_endpoints.py                      # in-process
+    python backend/benchmarks/bench_endpoints.py --modes inprocess gunicorn \\
+        --concurrency 1 8 32 --output after.json --baseline before.json
+
+With --baseline, each result is compared with the matching row of the
+earlier run. p95/p99 latency more than --threshold (default 15 %) higher, or
+throughput more than --threshold lower, counts as a regression and the
+script exits with status 2. Two saved runs can also be compared directly:
+
+    python backend/benchmarks/bench_endpoints.py --compare before.json after.json
+
+Response caches are disabled (RESULT_CACHE_SIZE=0) unless --with-cache is
+given, so repeated payloads measure the model path rather than cache hits.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+
+from _common import (BACKEND_DIR, LocalServer, GunicornServer, http_request, run_load,
+                     health_payloads, value_payloads, sales_params, print_table)
+
+GATED = {'p95_ms': 'higher', 'p99_ms': 'higher', 'throughput_rps': 'lower'}
+KEY = ('mode', 'endpoint', 'concurrency')
+
+
+def endpoints(n_payloads, seed):
+    """endpoint → (method, path builder, payloads)."""
+    sales = [f"/predict_sales?steps={steps}&granularity={granularity}"
+             for steps, granularity in sales_params()]
+    scenarios = [f"{path}&mode=simulate&target=30000000" for path in sales]
+    return {
+        '/predict_health': ('POST', lambda p: '/predict_health', health_payloads(n_payloads, seed)),
+        '/predict_value':  ('POST', lambda p: '/predict_value', value_payloads(n_payloads, seed)),
+        '/predict_sales':  ('GET',  lambda p: p, sales),
+        '/predict_sales?mode=simulate': ('GET', lambda p: p, scenarios),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(port, mode, args, routes):
+    rows = []
+    for endpoint, (method, path, payloads) in routes.items():
+        send = lambda p, method=method, path=path: http_request(
+            port, method, path(p), p if method == 'POST' else None)
+        # Warm-up: load models on every worker, fill lazily-built state
+        for p in random.Random(0).choices(payloads, k=args.warmup):
+            send(p)
+        for concurrency in args.concurrency:
+            result = run_load(send, payloads, concurrency, args.requests, seed=args.seed)
+            rows.append({'mode': mode, 'endpoint': endpoint, 'concurrency': concurrency, **result})
+    return rows
+
+
+def compare(baseline_rows, rows, threshold):
+    """Rows annotated with deltas vs the baseline, plus the list of regressions."""
+    before = {tuple(r[k] for k in KEY): r for r in baseline_rows}
+    table, regressions = [], []
+    for r in rows:
+        old = before.get(tuple(r[k] for k in KEY))
+        if old is None:
+            continue
+        out = {k: r[k] for k in KEY}
+        for metric, bad in GATED.items():
+            if not old.get(metric) or r.get(metric) is None:
+                continue
+            change = (r[metric] - old[metric]) / old[metric]
+            out[f'{metric}_delta'] = f"{change:+.1%}"
+            if (bad == 'higher' and change > threshold) or (bad == 'lower' and change < -threshold):
+                regressions.append(f"{r['mode']} {r['endpoint']} c={r['concurrency']}: "
+                                   f"{metric} {old[metric]} → {r[metric]} ({change:+.1%})")
+        table.append(out)
+    return table, regressions
+
+
+def report_comparison(baseline_rows, rows, threshold):
+    table, regressions = compare(baseline_rows, rows, threshold)
+    if table:
+        print_table(table, list(KEY) + [f'{m}_delta' for m in GATED])
+    if regressions:
+        print(f"\nREGRESSIONS (threshold {threshold:.0%}):")
+        for line in regressions:
+            print("  " + line)
+        return 2
+    print(f"\nNo regressions above {threshold:.0%}.")
+    return 0
+
+
+def load_rows(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data['results'] if isinstance(data, dict) else data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['inprocess'], choices=['inprocess', 'gunicorn'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=50, help="requests per client")
+    parser.add_argument('--warmup', type=int, default=20, help="untimed requests per endpoint")
+    parser.add_argument('--payloads', type=int, default=500, help="distinct rows sampled per CSV")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker (gthread)")
+    parser.add_argument('--port', type=int, default=18200)
+    parser.add_argument('--with-cache', action='store_true', help="keep the response caches enabled")
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--baseline', help="results JSON of an earlier run to gate against")
+    parser.add_argument('--threshold', type=float, default=0.15)
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="only compare two saved result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(report_comparison(load_rows(args.compare[0]), load_rows(args.compare[1]), args.threshold))
+
+    # Same settings for the in-process app and the gunicorn workers
+    server_env = {'MODEL_LOADING': 'eager', 'METRICS_ENABLED': os.environ.get('METRICS_ENABLED', '1')}
+    if not args.with_cache:
+        server_env['RESULT_CACHE_SIZE'] = '0'
+    os.environ.update(server_env)
+
+    routes = endpoints(args.payloads, args.seed)
+    rows = []
+    for mode in args.modes:
+        if mode == 'inprocess':
+            import main as app_module
+            with LocalServer(app_module.app) as server:
+                rows += run_suite(server.port, mode, args, routes)
+        else:
+            with GunicornServer(args.port, workers=args.workers, threads=args.threads, env=server_env) as server:
+                rows += run_suite(server.port, mode, args, routes)
+
+    print_table(rows, list(KEY) + ['requests', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'statuses'])
+
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('compare', 'baseline', 'output')},
+            'env': {k: os.environ.get(k) for k in ('INFERENCE_ENGINE', 'COALESCE_REQUESTS', 'MODEL_MMAP',
+                                                  'RESULT_CACHE_SIZE', 'MODEL_LOADING')},
+        },
+        'results': rows,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        sys.exit(report_comparison(load_rows(args.baseline), rows, args.threshold))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Dataset load time and peak memory: CSV parsing vs the columnar copies (columnar.py).
+
+Each (dataset, method) runs in a fresh interpreter, so peak RSS is that
+method's alone:
+
+    csv             pd.read_csv of the whole file
+    csv_subset      pd.read_csv(usecols=...) of the columns the backend reads
+    columnar        Table.frame() of every column
+    columnar_subset Table.frame(...) of the same subset
+
+    load_ms   time to get the DataFrame
+    total_ms  load plus one pass over every numeric column (touches the mmap pages)
+    peak_mib  peak RSS increase over the interpreter with numpy/pandas imported
+
+    python backend/benchmarks/columnar_load.py [--datasets ev_timeseries ...] [--repeat 3]
+
+Run `python backend/columnar.py convert` first.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+from _common import BENCH_DIR, BACKEND_DIR, print_table
+
+# Columns the backend actually reads from each dataset
+SUBSETS = {
+    'ev_timeseries': ['date', 'region', 'ev_sales', 'charging_stations', 'ev_subsidy_inr', 'Fuel_price_INR'],
+    'value_for_money': ['brand', 'vehicle_type', 'battery_health_pct', 'range_km', 'odometer_km'],
+    'resale_value': ['brand', 'vehicle_type', 'battery_health_pct', 'range_km', 'odometer_km'],
+    'battery_health': ['battery_health_status'],
+}
+METHODS = ['csv', 'csv_subset', 'columnar', 'columnar_subset']
+
+
+def _maxrss_mib():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(name, method):
+    import numpy as np
+    import pandas as pd
+    import columnar
+
+    columns = SUBSETS[name] if method.endswith('_subset') else None
+    base = _maxrss_mib()
+    t0 = time.perf_counter()
+    if method.startswith('csv'):
+        df = pd.read_csv(columnar.DATASETS[name], usecols=columns)
+    else:
+        table = columnar.open_table(name)
+        if table is None or table.stale:
+            raise SystemExit(f"{name}: columnar copy missing or stale; run columnar.py convert")
+        df = table.frame(columns)
+    load = time.perf_counter() - t0
+
+    checksum = 0.0
+    for column in df.columns:
+        if pd.api.types.is_numeric_dtype(df[column]):
+            checksum += float(np.asarray(df[column], dtype=np.float64).sum())
+    out = {'load': load, 'total': time.perf_counter() - t0,
+           'peak_mib': _maxrss_mib() - base, 'rows': len(df), 'columns': df.shape[1]}
+    print(json.dumps(out))
+
+
+def run(name, method):
+    proc = subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'columnar_load.py'),
+                           '--child', name, method],
+                          cwd=BACKEND_DIR, capture_output=True, text=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"{name}/{method}: child failed\n{proc.stderr[-2000:]}{proc.stdout[-500:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datasets', nargs='+', default=list(SUBSETS))
+    parser.add_argument('--methods', nargs='+', default=METHODS, choices=METHODS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.child:
+        return child(*args.child)
+
+    rows = []
+    for name in args.datasets:
+        for method in args.methods:
+            runs = [run(name, method) for _ in range(args.repeat)]
+            median = lambda k: sorted(r[k] for r in runs)[len(runs) // 2]
+            rows.append({'dataset': name, 'method': method, 'rows': runs[0]['rows'],
+                         'columns': runs[0]['columns'],
+                         'load_ms': round(median('load') * 1000, 1),
+                         'total_ms': round(median('total') * 1000, 1),
+                         'peak_mib': round(median('peak_mib'), 1)})
+
+    print_table(rows, ['dataset', 'method', 'rows', 'columns', 'load_ms', 'total_ms', 'peak_mib'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
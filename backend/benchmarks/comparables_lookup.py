@@ -0,0 +1,59 @@
+"""
+Comparable-listings lookup latency (comparables.py).
+
+Times building the KD-tree index from the CSVs, loading the persisted
+index, and single-listing top-k lookups for realistic resale payloads:
+
+    python backend/benchmarks/comparables_lookup.py
+    python backend/benchmarks/comparables_lookup.py --k 5 10 25 --queries 1000
+"""
+import os
+import time
+import tempfile
+import argparse
+
+import numpy as np
+
+from _common import value_payloads, print_table
+from comparables import ComparablesIndex
+from schema import VALUE_SCHEMA
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--k', type=int, nargs='+', default=[5, 10, 25])
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = ComparablesIndex.build()
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'comparables_index.joblib')
+        index.save(path)
+        start = time.perf_counter()
+        index = ComparablesIndex.load_or_build(path)
+        load_s = time.perf_counter() - start
+    print(f"\n{len(index.listings)} listings: build {build_s:.2f}s, load persisted {load_s * 1000:.0f} ms\n")
+
+    records = [VALUE_SCHEMA.parse(p) for p in value_payloads(args.queries, args.seed)]
+    rows = []
+    for k in args.k:
+        latencies = []
+        for rec in records:
+            t0 = time.perf_counter()
+            index.query_parsed(rec, k=k)
+            latencies.append(time.perf_counter() - t0)
+        ms = np.array(latencies) * 1000
+        rows.append({'k': k, 'queries': len(ms),
+                     'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                     'p95_ms': round(float(np.percentile(ms, 95)), 3),
+                     'p99_ms': round(float(np.percentile(ms, 99)), 3),
+                     'max_ms': round(float(ms.max()), 3)})
+    print_table(rows, ['k', 'queries', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+
+
+if __name__ == '__main__':
+    main()
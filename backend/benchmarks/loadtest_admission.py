@@ -0,0 +1,97 @@
+"""
+Tail latency of /predict_health while /predict_sales is flooded, with and
+without admission control (admission.py).
+
+Runs the app under gunicorn (gunicorn.conf.py: gthread workers, admission
+limits sized to --threads per worker), with the response cache off and a
+fresh server per scenario. Health clients send --requests /predict_health
+calls each, while flood clients hammer /predict_sales with uncached Monte
+Carlo scenarios (random path counts, full horizon) for as long as the
+health clients run. Three scenarios:
+
+    baseline        health clients alone
+    flood, off      flood with admission control disabled
+    flood, on       flood with admission control enabled
+
+    python backend/benchmarks/loadtest_admission.py
+    python backend/benchmarks/loadtest_admission.py --health-concurrency 4 --flood-concurrency 16 --requests 200
+    python backend/benchmarks/loadtest_admission.py --workers 2 --threads 8
+"""
+import json
+import random
+import argparse
+import warnings
+import threading
+
+from _common import GunicornServer, http_request, run_load, health_payloads, print_table
+
+warnings.filterwarnings("ignore")
+
+
+def flood(port, stop, statuses, lock, seed):
+    rng = random.Random(seed)
+    local = {}
+    while not stop.is_set():
+        # A fresh path count every time: never served from the response cache
+        path = f"/predict_sales?mode=simulate&steps=120&paths={rng.randint(10000, 20000)}"
+        status = http_request(port, 'GET', path)[0]
+        local[status] = local.get(status, 0) + 1
+    with lock:
+        for k, v in local.items():
+            statuses[k] = statuses.get(k, 0) + v
+
+
+def scenario(port, payloads, args, flood_clients):
+    stop = threading.Event()
+    flood_statuses, lock = {}, threading.Lock()
+    threads = [threading.Thread(target=flood, args=(port, stop, flood_statuses, lock, i), daemon=True)
+               for i in range(flood_clients)]
+    for t in threads:
+        t.start()
+    try:
+        send = lambda p: http_request(port, 'POST', '/predict_health', p)
+        result = run_load(send, payloads, args.health_concurrency, args.requests)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    result['flood_statuses'] = {str(k): v for k, v in sorted(flood_statuses.items())}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--health-concurrency', type=int, default=4)
+    parser.add_argument('--flood-concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help="/predict_health requests per health client")
+    parser.add_argument('--workers', type=int, default=1, help="gunicorn workers")
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument('--port', type=int, default=18300)
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    # Every request must reach the model: no response cache, no coalescing window
+    base_env = {'MODEL_LOADING': 'eager', 'RESULT_CACHE_SIZE': '0', 'COALESCE_REQUESTS': '0'}
+    payloads = health_payloads()
+
+    rows = []
+    for name, flood_clients, enabled in [('baseline', 0, True), ('flood, off', args.flood_concurrency, False),
+                                         ('flood, on', args.flood_concurrency, True)]:
+        env = dict(base_env, ADMISSION_CONTROL='1' if enabled else '0')
+        with GunicornServer(args.port, workers=args.workers, threads=args.threads, env=env) as server:
+            # Warm every worker's models before timing anything
+            for _ in range(args.workers * 2):
+                http_request(server.port, 'POST', '/predict_health', payloads[0])
+                http_request(server.port, 'GET', '/predict_sales?mode=simulate&steps=12')
+            result = scenario(server.port, payloads, args, flood_clients)
+            rows.append({'scenario': name, **result})
+
+    print_table(rows, ['scenario', 'requests', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms',
+                       'statuses', 'flood_statuses'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
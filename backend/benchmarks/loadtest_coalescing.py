@@ -0,0 +1,61 @@
+"""
+Throughput / tail-latency comparison with and without request coalescing.
+
+Starts the Flask app in-process on a threaded server and drives
+/predict_health and /predict_value at several concurrency levels, first
+with the MicroBatchers disabled, then enabled.
+
+    python backend/benchmarks/loadtest_coalescing.py [--concurrency 1 8 32] [--requests 50]
+"""
+import argparse
+import json
+
+from _common import (LocalServer, http_request, run_load, health_payloads,
+                     value_payloads, print_table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=50, help="requests per client")
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    import main as app_module
+    # The payload pools repeat, so with the result caches on most requests
+    # would be cache hits and never reach the batchers.
+    app_module.health_cache.maxsize = app_module.value_cache.maxsize = 0
+    batchers = [app_module.health_batcher, app_module.value_batcher]
+    for b in batchers:
+        b.window = args.window_ms / 1000.0
+        b.max_batch = args.max_batch
+
+    routes = {
+        '/predict_health': health_payloads(),
+        '/predict_value': value_payloads(),
+    }
+
+    rows = []
+    with LocalServer(app_module.app) as server:
+        for route, payloads in routes.items():
+            send = lambda p, route=route: http_request(server.port, 'POST', route, p)
+            for concurrency in args.concurrency:
+                for coalesce in (False, True):
+                    for b in batchers:
+                        b.enabled = coalesce
+                    result = run_load(send, payloads, concurrency, args.requests)
+                    rows.append({'route': route, 'concurrency': concurrency,
+                                 'coalescing': 'on' if coalesce else 'off', **result})
+
+    print_table(rows, ['route', 'concurrency', 'coalescing', 'requests', 'throughput_rps',
+                       'p50_ms', 'p95_ms', 'p99_ms', 'statuses'])
+    print("batcher stats:", {b.name: b.stats() for b in batchers})
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
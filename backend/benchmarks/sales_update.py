@@ -0,0 +1,87 @@
+"""
+Incremental SARIMA update vs full refit (sales_updates.py).
+
+Uses the national monthly totals from EV_TimeSeries_50K_Extended.csv.
+The model is fitted on all but the last --holdout months; those months then
+arrive one at a time, and each one is taken in two ways:
+
+    append      results.append(month)  (parameters kept)
+    full refit  fit from scratch on the whole history so far
+
+At the end the --horizon-month forecasts of both paths are compared, to show
+what keeping the old parameters costs in forecast terms.
+
+    python backend/benchmarks/sales_update.py
+    python backend/benchmarks/sales_update.py --holdout 24 --horizon 12
+"""
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+from _common import print_table
+from sales_updates import monthly_totals, refit
+from regional_sales import ORDER, SEASONAL_ORDER
+
+warnings.filterwarnings("ignore")
+
+
+def _fit(series):
+    import statsmodels.api as sm
+    return sm.tsa.SARIMAX(series, order=ORDER, seasonal_order=SEASONAL_ORDER).fit(disp=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--holdout', type=int, default=12, help="months appended one by one")
+    parser.add_argument('--horizon', type=int, default=12, help="forecast months compared at the end")
+    args = parser.parse_args()
+
+    series = monthly_totals()
+    base = len(series) - args.holdout
+    start = time.perf_counter()
+    appended = _fit(series.iloc[:base])
+    print(f"\n{len(series)} months; initial fit on {base} months: {time.perf_counter() - start:.3f}s\n")
+
+    rows = []
+    for n in range(base + 1, len(series) + 1):
+        month = series.iloc[n - 1:n]
+
+        start = time.perf_counter()
+        appended = appended.append(month)
+        append_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = _fit(series.iloc[:n])
+        refit_s = time.perf_counter() - start
+
+        z = appended.filter_results.standardized_forecasts_error[0, -1]
+        rows.append({'month': f"{month.index[0]:%Y-%m}", 'observations': n,
+                     'append_ms': round(append_s * 1000, 1), 'full_refit_ms': round(refit_s * 1000, 1),
+                     'speedup': round(refit_s / append_s, 1), 'z': round(float(z), 2)})
+    print_table(rows, ['month', 'observations', 'append_ms', 'full_refit_ms', 'speedup', 'z'])
+
+    start = time.perf_counter()
+    warm = refit(appended)
+    warm_s = time.perf_counter() - start
+
+    append_ms = np.array([r['append_ms'] for r in rows])
+    refit_ms = np.array([r['full_refit_ms'] for r in rows])
+    f_append = appended.get_forecast(args.horizon).predicted_mean.values
+    f_full = full.get_forecast(args.horizon).predicted_mean.values
+    f_warm = warm.get_forecast(args.horizon).predicted_mean.values
+    gap = np.abs(f_append - f_full) / np.abs(f_full) * 100
+    warm_gap = np.abs(f_warm - f_full) / np.abs(f_full) * 100
+
+    print(f"\nappend       mean {append_ms.mean():8.1f} ms")
+    print(f"full refit   mean {refit_ms.mean():8.1f} ms   ({refit_ms.mean() / append_ms.mean():.0f}x slower)")
+    print(f"warm refit        {warm_s * 1000:8.1f} ms   (sales_updates.refit, scheduled/drift path)")
+    print(f"{args.horizon}-month forecast, appended vs full refit: "
+          f"mean {gap.mean():.2f}%  max {gap.max():.2f}% apart")
+    print(f"{args.horizon}-month forecast, warm vs full refit:     "
+          f"mean {warm_gap.mean():.2f}%  max {warm_gap.max():.2f}% apart")
+
+
+if __name__ == '__main__':
+    main()
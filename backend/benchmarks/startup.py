@@ -0,0 +1,82 @@
+"""
+Cold-start timing per MODEL_LOADING mode (eager / lazy / background).
+
+Each mode runs in a fresh interpreter so nothing is cached in-process:
+
+    import      time to `import main`
+    health      time from process start until /health answers
+    first_*     time from process start until the first /predict_health and
+                /predict_value responses (includes any model load they wait on)
+
+    python backend/benchmarks/startup.py [--modes eager lazy background] [--repeat 3]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from _common import BENCH_DIR, BACKEND_DIR, print_table
+
+
+def child():
+    from _common import LocalServer, http_request, health_payloads, value_payloads
+    health_payload = health_payloads(1)[0]
+    value_payload = value_payloads(1)[0]
+    # Payload generation reads CSVs; keep it out of the measured window
+    t0 = time.perf_counter()
+
+    import main as app_module
+    out = {'import': time.perf_counter() - t0}
+
+    with LocalServer(app_module.app) as server:
+        status, _, _ = http_request(server.port, 'GET', '/health')
+        out['health'] = time.perf_counter() - t0
+        status_h, _, _ = http_request(server.port, 'POST', '/predict_health', health_payload)
+        out['first_health'] = time.perf_counter() - t0
+        status_v, _, _ = http_request(server.port, 'POST', '/predict_value', value_payload)
+        out['first_value'] = time.perf_counter() - t0
+    out['ok'] = status == status_h == status_v == 200
+    print(json.dumps(out))
+
+
+def run_mode(mode):
+    env = dict(os.environ, MODEL_LOADING=mode)
+    proc = subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'startup.py'), '--child'],
+                          env=env, cwd=BACKEND_DIR, capture_output=True, text=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"{mode}: child failed\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['eager', 'lazy', 'background'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.child:
+        return child()
+
+    keys = ['import', 'health', 'first_health', 'first_value']
+    rows = []
+    for mode in args.modes:
+        runs = [run_mode(mode) for _ in range(args.repeat)]
+        row = {'mode': mode, 'ok': all(r['ok'] for r in runs)}
+        for k in keys:
+            # median over the repeats, in ms
+            row[f'{k}_ms'] = round(sorted(r[k] for r in runs)[len(runs) // 2] * 1000, 1)
+        rows.append(row)
+
+    print_table(rows, ['mode'] + [f'{k}_ms' for k in keys] + ['ok'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Battery telemetry ingestion throughput (battery_telemetry.py).
+
+Simulates a fleet whose batteries each report one charge session per
+round, with per-battery operating points and slow degradation. A fresh
+TelemetryStore first takes --history rounds untimed (the fleet's past:
+a new battery's aggregates move on every session) plus one scoring
+pass, then the timed --rounds in batches. For each --deltas value
+(0 = re-score every touched battery) it reports the ingest throughput
+and the share of events that led to a re-score. Each store is then
+reopened from disk (as another gunicorn worker or a restart would) and
+must map every battery id to the same row:
+
+    python backend/benchmarks/telemetry_ingest.py
+    python backend/benchmarks/telemetry_ingest.py --batteries 20000 --history 200 --deltas 0 0.02 0.05
+"""
+import time
+import tempfile
+import argparse
+import warnings
+
+import numpy as np
+
+from _common import print_table
+from battery_telemetry import TelemetryStore, TELEMETRY_RECORD_BYTES
+from scoring import load_health_model
+
+warnings.filterwarnings("ignore")
+
+
+def fleet_rounds(n_batteries, rounds, seed=0):
+    """rounds × n_batteries charge-session events."""
+    rng = np.random.default_rng(seed)
+    dod = rng.uniform(20, 90, n_batteries)
+    temp = rng.uniform(20, 40, n_batteries)
+    fast = rng.uniform(0, 0.6, n_batteries)
+    age = rng.uniform(0, 6, n_batteries)
+    capacity = rng.uniform(75, 100, n_batteries)
+    resistance = rng.uniform(20, 50, n_batteries)
+    ids = [f'B{i:06d}' for i in range(n_batteries)]
+    for r in range(rounds):
+        capacity -= rng.uniform(0, 0.05, n_batteries)
+        resistance += rng.uniform(0, 0.05, n_batteries)
+        session_temp = temp + rng.normal(0, 3, n_batteries)
+        yield [{
+            'battery_id': ids[i], 'timestamp': float(r),
+            'depth_of_discharge_percent': float(np.clip(dod[i] + rng.normal(0, 5), 0, 100)),
+            'charging_time_hours': float(rng.uniform(1, 6)),
+            'fast_charge': float(rng.random() < fast[i]),
+            'avg_temperature_c': float(session_temp[i]),
+            'max_temperature_c': float(session_temp[i] + rng.uniform(5, 15)),
+            'voltage': float(rng.uniform(3.5, 4.1)),
+            'internal_resistance_mohm': float(resistance[i]),
+            'capacity_retention_percent': float(capacity[i]),
+            'vehicle_age_years': float(age[i] + r / 365),
+        } for i in range(n_batteries)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batteries', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=100, help="sessions per battery before timing")
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--batch', type=int, default=1000, help="events per /telemetry request")
+    parser.add_argument('--deltas', type=float, nargs='+', default=[0.0, 0.02, 0.05])
+    args = parser.parse_args()
+
+    health = load_health_model()
+    rounds = list(fleet_rounds(args.batteries, args.history + 1 + args.rounds))
+    history, scoring, rounds = rounds[:args.history], rounds[args.history], rounds[args.history + 1:]
+    n_events = args.batteries * args.rounds
+    print(f"\n{args.batteries} batteries, {args.history} past sessions each; timed: {args.rounds} sessions "
+          f"= {n_events} events; {TELEMETRY_RECORD_BYTES} bytes of state per battery\n")
+
+    rows = []
+    for delta in args.deltas:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = TelemetryStore(tmp, rescore_delta=delta)
+            for events in history:
+                store.ingest(events, None)
+            store.ingest(scoring, health)
+            rescored = 0
+            start = time.perf_counter()
+            for events in rounds:
+                for i in range(0, len(events), args.batch):
+                    rescored += len(store.ingest(events[i:i + args.batch], health)['rescored'])
+            elapsed = time.perf_counter() - start
+
+            reopened = TelemetryStore(tmp, rescore_delta=delta)
+            reopened.ingest([])
+            if reopened._rows != store._rows:
+                raise SystemExit(f"rescore_delta={delta}: reopened store differs from the writer's")
+        rows.append({'rescore_delta': delta, 'events_per_s': round(n_events / elapsed),
+                     'rescored': rescored, 'rescored_pct': round(100 * rescored / n_events, 1),
+                     'total_s': round(elapsed, 2)})
+    print_table(rows, ['rescore_delta', 'events_per_s', 'rescored', 'rescored_pct', 'total_s'])
+
+
+if __name__ == '__main__':
+    main()
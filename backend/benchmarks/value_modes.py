@@ -0,0 +1,91 @@
+"""
+/predict_value accuracy and latency, mode=accurate vs mode=fast (the
+distilled surrogate, see value_surrogate.py), side by side.
+
+Starts the Flask app in-process with the response cache and request
+coalescing off, so every request reaches a model. Per mode:
+
+    single      --concurrency clients × --requests /predict_value calls
+    batch       /predict_value_batch over all --payloads listings
+    accuracy    the batch results against the accurate ones: median price
+                difference, condition MAE, share of "Uncertain"
+                recommendations and agreement on the firm ones
+
+Run python value_surrogate.py first; without a current surrogate, fast
+requests are served by the full model and the table says so.
+
+    python backend/benchmarks/value_modes.py
+    python backend/benchmarks/value_modes.py --payloads 2000 --concurrency 4 --requests 200
+"""
+import json
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+from _common import LocalServer, http_request, run_load, value_payloads, print_table
+
+warnings.filterwarnings("ignore")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payloads', type=int, default=1000, help="distinct listings")
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=300, help="/predict_value requests per client")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    import main as app_module
+    app_module.value_cache.maxsize = 0
+    app_module.value_batcher.enabled = False
+    app = app_module.app.test_client()
+    payloads = value_payloads(args.payloads)
+
+    values = app_module.value_model.get()
+    print(f"\nsurrogate: {json.dumps(values.surrogate_info())}\n")
+
+    rows, batches = [], {}
+    with LocalServer(app_module.app) as server:
+        for mode in ('accurate', 'fast'):
+            # Warm the route (and the surrogate) before timing anything
+            http_request(server.port, 'POST', f'/predict_value?mode={mode}', payloads[0])
+            send = lambda p, mode=mode: http_request(server.port, 'POST', f'/predict_value?mode={mode}', p)
+            single = run_load(send, payloads, args.concurrency, args.requests)
+
+            start = time.perf_counter()
+            batch = app.post(f'/predict_value_batch?mode={mode}', json={'records': payloads}).get_json()
+            batch_s = time.perf_counter() - start
+            batches[mode] = batch['results']
+            rows.append({'mode': mode, 'served_as': batch['mode'], 'mode_agreement': batch['mode_agreement'],
+                         **single,
+                         'batch_rows': batch['scored'], 'batch_ms': round(batch_s * 1000, 1),
+                         'batch_us_per_row': round(batch_s * 1e6 / max(batch['scored'], 1), 1)})
+
+    reference = batches['accurate']
+    ref_price = np.array([r['predicted_resale'] for r in reference])
+    ref_cond = np.array([r['condition_score'] for r in reference])
+    ref_rec = [r['recommendation'] for r in reference]
+    for row in rows:
+        results = batches[row['mode']]
+        price = np.array([r['predicted_resale'] for r in results])
+        cond = np.array([r['condition_score'] for r in results])
+        row['price_med_diff_pct'] = round(float(np.median(np.abs(price - ref_price)
+                                                          / np.maximum(np.abs(ref_price), 1))) * 100, 2)
+        row['condition_mae'] = round(float(np.abs(cond - ref_cond).mean()), 3)
+        decided = [(r['recommendation'], ref) for r, ref in zip(results, ref_rec) if r['recommendation'] != 'Uncertain']
+        row['uncertain_pct'] = round(100 * (1 - len(decided) / max(len(results), 1)), 1)
+        row['recommendation_agree_pct'] = round(100 * float(np.mean([r == ref for r, ref in decided])), 1) \
+            if decided else None
+
+    print_table(rows, ['mode', 'served_as', 'mode_agreement', 'requests', 'throughput_rps', 'p50_ms', 'p99_ms',
+                       'batch_rows', 'batch_ms', 'batch_us_per_row',
+                       'price_med_diff_pct', 'condition_mae', 'uncertain_pct', 'recommendation_agree_pct'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
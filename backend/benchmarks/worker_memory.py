@@ -0,0 +1,101 @@
+"""
+Per-worker memory of a gunicorn deployment, for sizing instances.
+
+Reads /proc/<pid>/smaps_rollup (Linux) for the master and each worker:
+
+    rss       resident pages
+    pss       proportional share (shared pages split between the processes
+              mapping them); the sum over all processes is the real footprint
+    shared    pages also mapped by another process
+    private   pages only this process holds
+
+Report on a running server:
+    python backend/benchmarks/worker_memory.py --pid <gunicorn master pid>
+
+Or start gunicorn with and without preload and compare:
+    python backend/benchmarks/worker_memory.py --launch --workers 4
+"""
+import os
+import json
+import time
+import argparse
+
+from _common import GunicornServer, http_request, health_payloads, value_payloads, print_table
+
+
+def smaps(pid):
+    """smaps_rollup of one process → dict of MiB values."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024.0
+    shared = fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {'rss_mb': fields.get('Rss', 0), 'pss_mb': fields.get('Pss', 0),
+            'shared_mb': shared, 'private_mb': private}
+
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def report(master_pid, label=''):
+    rows = []
+    for role, pid in [('master', master_pid)] + [('worker', p) for p in children(master_pid)]:
+        row = {'run': label, 'role': role, 'pid': pid}
+        row.update({k: round(v, 1) for k, v in smaps(pid).items()})
+        rows.append(row)
+    total = {'run': label, 'role': 'total', 'pid': ''}
+    for k in ('rss_mb', 'pss_mb', 'shared_mb', 'private_mb'):
+        total[k] = round(sum(r[k] for r in rows), 1)
+    rows.append(total)
+    return rows
+
+
+def launch(preload, workers, port, warm_requests):
+    env = {'GUNICORN_PRELOAD': '1' if preload else '0',
+           # Load everything up front in every mode so the runs are comparable
+           'MODEL_LOADING': os.environ.get('MODEL_LOADING', 'eager')}
+    with GunicornServer(port, workers=workers, env=env) as server:
+        while len(children(server.pid)) < workers:
+            time.sleep(0.2)
+        # Touch every model on (most likely) every worker
+        for h, v in zip(health_payloads(warm_requests), value_payloads(warm_requests)):
+            http_request(port, 'POST', '/predict_health', h)
+            http_request(port, 'POST', '/predict_value', v)
+            http_request(port, 'GET', '/predict_sales?steps=12')
+        return report(server.pid, 'preload' if preload else 'per-worker')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pid', type=int, help="gunicorn master pid to inspect")
+    parser.add_argument('--launch', action='store_true', help="start gunicorn with and without preload")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=18000)
+    parser.add_argument('--warm-requests', type=int, default=40)
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.pid:
+        rows = report(args.pid)
+    elif args.launch:
+        rows = (launch(False, args.workers, args.port, args.warm_requests)
+                + launch(True, args.workers, args.port + 1, args.warm_requests))
+    else:
+        parser.error("pass --pid or --launch")
+
+    print_table(rows, ['run', 'role', 'pid', 'rss_mb', 'pss_mb', 'shared_mb', 'private_mb'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""
+Typed, columnar, memory-mapped copies of the CSV datasets.
+
+`python columnar.py convert` parses each dataset once and writes one .npy
+file per column, plus a meta.json with the explicit dtypes:
+
+    .columnar/<dataset>/
+        meta.json       source, source size/mtime, rows, per-column dtype
+                        and (for text columns) the categorical encoding
+        <column>.npy    int columns narrowed to the smallest signed dtype that
+                        holds the data, floats as float64; text → int codes into 'categories'
+                        (or fixed-width strings when nearly every value differs)
+        <column>.missing.npy  rows with no value, for string columns that have any
+
+Missing text values stay missing (NaN after reading, as from read_csv):
+categorical code -1, or a row in <column>.missing.npy; meta.json records
+their count per column.
+
+Readers memory-map only the columns they ask for, so nothing is parsed
+and pages are read lazily on first touch:
+
+    table = open_table('ev_timeseries')               # reads meta.json only
+    table.column('ev_sales')                           # np.memmap
+    table.frame(['date', 'ev_sales'])                  # DataFrame of 2 columns
+    read_table('resale_value', columns=[...])          # DataFrame; CSV fallback
+    read_dataset(path, columns=[...])                  # same, by source path
+
+read_table falls back to parsing the source file (with a warning) when the
+columnar copy is missing or older than the source, so callers never need
+to know whether `convert` has been run.
+
+    python columnar.py convert [dataset ...]
+    python columnar.py info
+
+COLUMNAR_DIR overrides the output directory (default backend/.columnar).
+Benchmark: python backend/benchmarks/columnar_load.py
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+
+import numpy as np
+
+from lazy_models import fingerprint
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BACKEND_DIR, '..', 'backend-data')
+COLUMNAR_DIR = os.environ.get('COLUMNAR_DIR', os.path.join(BACKEND_DIR, '.columnar'))
+
+# name → source file (all CSV text, whatever the extension)
+DATASETS = {
+    'ev_timeseries':   os.path.join(DATA_DIR, 'EV_TimeSeries_50K_Extended.csv'),
+    'value_for_money': os.path.join(DATA_DIR, 'value_for_money.csv'),
+    'resale_value':    os.path.join(BACKEND_DIR, 'resale_value.csv'),
+    # dataset.json holds the battery-health table as CSV
+    'battery_health':  os.path.join(DATA_DIR, 'dataset.json'),
+}
+# Text columns with more distinct values than this fraction of rows are
+# stored as fixed-width strings rather than categorical codes
+MAX_CATEGORY_RATIO = 0.5
+FORMAT = 2
+# Categorical code of a missing value (pd.Categorical.from_codes maps it to NaN)
+MISSING_CODE = -1
+
+
+def _stamp(path):
+    """[size, mtime_ns] of a source file, as stored in meta.json."""
+    return list(fingerprint([path])[0][1:])
+
+
+def _read_source(path, columns=None):
+    import pandas as pd
+    return pd.read_csv(path, usecols=columns)
+
+
+def _encode_column(series):
+    """pandas column → (ndarray, meta dict, missing-row mask or None)."""
+    import pandas as pd
+
+    if series.dtype.kind in 'iub':
+        # Signed even for non-negative data: unsigned columns wrap on subtraction
+        return pd.to_numeric(series, downcast='integer').to_numpy(), {'kind': 'numeric'}, None
+    if series.dtype.kind == 'f':
+        return series.to_numpy(dtype=np.float64), {'kind': 'numeric'}, None
+
+    missing = series.isna().to_numpy()
+    text = np.where(missing, '', series.astype(object).to_numpy()).astype(str)
+    info = {'missing': int(missing.sum())}
+    categories = np.unique(text[~missing])
+    if len(categories) <= max(1, MAX_CATEGORY_RATIO * len(text)):
+        codes = np.searchsorted(categories, text)
+        codes[missing] = MISSING_CODE
+        # Signed, so MISSING_CODE fits whatever the number of categories
+        code_dtype = np.promote_types(np.min_scalar_type(-max(len(categories), 1)), np.int8)
+        return codes.astype(code_dtype), dict(info, kind='categorical', categories=categories.tolist()), None
+    return text, dict(info, kind='string'), missing if missing.any() else None
+
+
+# ==============================
+# Convert
+# ==============================
+
+def convert(name, root=COLUMNAR_DIR):
+    """Parse DATASETS[name] once and write its columnar copy (replaced atomically)."""
+    source = DATASETS[name]
+    df = _read_source(source)
+    meta = {'format': FORMAT, 'name': name, 'source': os.path.relpath(source, BACKEND_DIR),
+            'source_stamp': _stamp(source), 'rows': len(df), 'columns': {}}
+
+    os.makedirs(root, exist_ok=True)
+    tmp = os.path.join(root, f'.{name}.{os.getpid()}.tmp')
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for column in df.columns:
+        values, info, missing = _encode_column(df[column])
+        info['dtype'] = values.dtype.str
+        meta['columns'][column] = info
+        np.save(os.path.join(tmp, f'{column}.npy'), values, allow_pickle=False)
+        if missing is not None:
+            np.save(os.path.join(tmp, f'{column}.missing.npy'), np.flatnonzero(missing), allow_pickle=False)
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+
+    # Directories cannot be renamed over each other: move the old one aside
+    # first. Readers holding memmaps of the old files keep working.
+    final = os.path.join(root, name)
+    old = os.path.join(root, f'.{name}.{os.getpid()}.old')
+    if os.path.exists(final):
+        os.replace(final, old)
+    os.replace(tmp, final)
+    shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+# ==============================
+# Read
+# ==============================
+
+class Table:
+    """One converted dataset; columns are memory-mapped on first access."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self.columns = list(self.meta['columns'])
+        self._mapped = {}
+
+    @property
+    def stale(self):
+        source = os.path.join(BACKEND_DIR, self.meta['source'])
+        return self.meta.get('format') != FORMAT or self.meta['source_stamp'] != _stamp(source)
+
+    def categories(self, name):
+        return self.meta['columns'][name].get('categories')
+
+    def missing_rows(self, name):
+        """Rows of a string column with no value (categoricals use MISSING_CODE instead)."""
+        if not self.meta['columns'][name].get('missing') or self.categories(name) is not None:
+            return np.zeros(0, dtype=np.int64)
+        return np.load(os.path.join(self.path, f'{name}.missing.npy'))
+
+    def column(self, name):
+        """Raw stored column (np.memmap): values, or codes for categoricals."""
+        if name not in self._mapped:
+            if name not in self.meta['columns']:
+                raise KeyError(f"{self.meta['name']} has no column {name!r}")
+            self._mapped[name] = np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+        return self._mapped[name]
+
+    def values(self, name):
+        """Decoded column: text as an object array of labels, missing values as NaN."""
+        data = self.column(name)
+        categories = self.categories(name)
+        if categories is not None:
+            out = np.asarray(categories + [np.nan], dtype=object)[data]
+        elif self.meta['columns'][name]['kind'] == 'string' and self.meta['columns'][name].get('missing'):
+            out = data.astype(object)
+            out[self.missing_rows(name)] = np.nan
+        else:
+            return data
+        return out
+
+    def frame(self, columns=None):
+        """DataFrame of the requested columns (categoricals stay pandas Categoricals)."""
+        import pandas as pd
+
+        out = {}
+        for name in columns or self.columns:
+            categories = self.categories(name)
+            if categories is not None:
+                out[name] = pd.Categorical.from_codes(self.column(name), categories=categories)
+            elif self.meta['columns'][name].get('missing'):
+                out[name] = self.values(name)
+            else:
+                out[name] = self.column(name)
+        return pd.DataFrame(out)
+
+
+def open_table(name, root=COLUMNAR_DIR):
+    """Table for a converted dataset, or None if it has not been converted."""
+    path = os.path.join(root, name)
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+        return None
+    return Table(path)
+
+
+def read_table(name, columns=None, root=COLUMNAR_DIR):
+    """
+    DataFrame of DATASETS[name] (only `columns` if given): from the columnar
+    copy when it is current, otherwise parsed from the source file.
+    """
+    table = open_table(name, root)
+    if table is not None and not table.stale:
+        return table.frame(columns)
+    reason = "not converted" if table is None else "stale"
+    print(f"[INFO] Columnar copy of {name} {reason}; parsing {os.path.basename(DATASETS[name])} "
+          f"(run `python columnar.py convert`)")
+    return _read_source(DATASETS[name], columns)
+
+
+def read_dataset(path, columns=None):
+    """pd.read_csv(path, usecols=columns), served from the columnar copy when path is a known dataset."""
+    real = os.path.realpath(path)
+    for name, source in DATASETS.items():
+        if os.path.realpath(source) == real:
+            return read_table(name, columns)
+    return _read_source(path, columns)
+
+
+# ==============================
+# CLI
+# ==============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the CSV datasets to memory-mappable columns.")
+    parser.add_argument('command', choices=['convert', 'info'])
+    parser.add_argument('datasets', nargs='*', help=f"default: all of {sorted(DATASETS)}")
+    args = parser.parse_args(argv)
+
+    names = args.datasets or sorted(DATASETS)
+    unknown = set(names) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown datasets: {sorted(unknown)}")
+
+    for name in names:
+        if args.command == 'convert':
+            convert(name)
+        table = open_table(name)
+        if table is None:
+            print(f"{name}: not converted")
+            continue
+        size = sum(os.path.getsize(os.path.join(table.path, f)) for f in os.listdir(table.path))
+        state = 'stale' if table.stale else 'current'
+        print(f"{name}: {table.rows} rows, {len(table.columns)} columns, {size / 2**20:.1f} MiB ({state})")
+        for column, info in table.meta['columns'].items():
+            extra = f"  {len(info['categories'])} categories" if info['kind'] == 'categorical' else ''
+            print(f"    {column:34s} {info['kind']:12s} {info['dtype']:6s}{extra}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Comparable-listings nearest-neighbour index for /predict_value.
+
+Every listing in resale_value.csv and backend-data/value_for_money.csv is
+turned into the same numeric feature columns the value models use
+(value_model.build_features, minus the label-encoded brand/type), z-scored,
+plus a one-hot brand block weighted by BRAND_WEIGHT so same-brand listings
+rank first. One KD-tree is built per vehicle_type (a Bike is never a
+comparable for a Car).
+
+    idx = ComparablesIndex.load_or_build()
+    idx.query_parsed(VALUE_SCHEMA.parse(data), k=5)
+      → [{'comparables': [...], 'price_range': {...}}]
+
+The fitted index is persisted with joblib (COMPARABLES_INDEX_PATH) together
+with a fingerprint of the source CSVs and is only rebuilt when they change:
+
+    python comparables.py             # offline (re)build
+
+Lookup latency: python backend/benchmarks/comparables_lookup.py
+"""
+import os
+import time
+import numpy as np
+
+from schema import VALUE_SCHEMA
+from value_model import FEATURES, F, build_features
+from lazy_models import fingerprint
+from columnar import read_dataset
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATHS = [
+    os.path.join(BACKEND_DIR, 'resale_value.csv'),
+    os.path.join(BACKEND_DIR, '..', 'backend-data', 'value_for_money.csv'),
+]
+COMPARABLES_INDEX_PATH = os.environ.get(
+    'COMPARABLES_INDEX_PATH', os.path.join(BACKEND_DIR, 'comparables_index.joblib'))
+
+# Columns the distance is computed on (brand/type handled separately)
+NUMERIC_FEATURES = [f for f in FEATURES if f not in ('brand_enc', 'type_enc')]
+# Distance (in standard deviations) added between listings of different brands
+BRAND_WEIGHT = 3.0
+MAX_K = 50
+DEFAULT_QUANTILES = (0.10, 0.50, 0.90)
+# Bumped whenever the feature construction changes; stale indexes are rebuilt
+INDEX_FORMAT = 1
+
+
+def _numeric_matrix(recs):
+    """Parsed VALUE_SCHEMA records → (n, len(NUMERIC_FEATURES)) matrix."""
+    return build_features(recs, {}, {})[:, [F[name] for name in NUMERIC_FEATURES]]
+
+
+class ComparablesIndex:
+    def __init__(self, listings, mean, scale, brands, trees, rows, source_fingerprint):
+        self.listings = listings            # structured array: one row per listing
+        self.mean = mean
+        self.scale = scale
+        self.brands = brands                # brand → one-hot column
+        self.trees = trees                  # vehicle_type → KDTree
+        self.rows = rows                    # vehicle_type → listing row numbers
+        self.source_fingerprint = source_fingerprint
+        self.format = INDEX_FORMAT
+
+    # ------------------------------------------------------------------ #
+    #  Build / persist                                                    #
+    # ------------------------------------------------------------------ #
+    @classmethod
+    def build(cls, paths=SOURCE_PATHS, leaf_size=40):
+        import pandas as pd
+        from sklearn.neighbors import KDTree
+
+        frames = []
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"[WARNING] Comparables source not found: {path}")
+                continue
+            df = read_dataset(path)
+            df['source'] = os.path.splitext(os.path.basename(path))[0]
+            df['row'] = np.arange(len(df))
+            frames.append(df)
+        if not frames:
+            raise FileNotFoundError("No comparables source data found")
+        df = pd.concat(frames, ignore_index=True)
+
+        recs, valid, _ = VALUE_SCHEMA.parse_many(df.to_dict('records'))
+        df = df.iloc[valid].reset_index(drop=True)
+
+        X = _numeric_matrix(recs)
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        brands = {b: i for i, b in enumerate(sorted(set(recs['brand'].astype(str))))}
+
+        listings = np.zeros(len(df), dtype=[
+            ('brand', object), ('model', object), ('vehicle_type', object), ('source', object),
+            ('row', np.int64), ('Purchase_Year', np.int64), ('odometer_km', np.float64),
+            ('battery_health_pct', np.float64), ('Purchase_Price_L', np.float64),
+            ('Resale_Value_L', np.float64),
+        ])
+        for name in listings.dtype.names:
+            if name == 'model':
+                models = df['model'] if 'model' in df else [None] * len(df)
+                listings[name] = [m if isinstance(m, str) else None for m in models]
+            elif name in ('source', 'row'):
+                listings[name] = df[name].to_numpy()
+            else:
+                listings[name] = recs[name]
+
+        index = cls(listings, mean, scale, brands, {}, {}, fingerprint(paths))
+        Z = index._embed(X, recs['brand'])
+        types = recs['vehicle_type'].astype(str)
+        for vtype in sorted(set(types.tolist())):
+            rows = np.flatnonzero(types == vtype)
+            index.rows[vtype] = rows
+            index.trees[vtype] = KDTree(Z[rows], leaf_size=leaf_size)
+        print(f"Comparables index built: {len(listings)} listings, "
+              f"{ {t: len(r) for t, r in index.rows.items()} }")
+        return index
+
+    def save(self, path=COMPARABLES_INDEX_PATH):
+        import joblib
+        tmp = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(self, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load_or_build(cls, path=COMPARABLES_INDEX_PATH, paths=SOURCE_PATHS):
+        """Persisted index if it matches the source CSVs; otherwise rebuild and save it."""
+        import joblib
+        if os.path.exists(path):
+            try:
+                index = joblib.load(path)
+                if getattr(index, 'format', None) == INDEX_FORMAT and \
+                        index.source_fingerprint == fingerprint(paths):
+                    print(f"Comparables index loaded from {path}")
+                    return index
+                print("Comparables index is stale; rebuilding")
+            except Exception as e:
+                print(f"Error loading comparables index: {e}")
+        index = cls.build(paths)
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"[WARNING] Comparables index not saved: {e}")
+        return index
+
+    # ------------------------------------------------------------------ #
+    #  Query                                                              #
+    # ------------------------------------------------------------------ #
+    def _embed(self, X, brands):
+        Z = np.zeros((len(X), X.shape[1] + len(self.brands)), dtype=np.float64)
+        Z[:, :X.shape[1]] = (X - self.mean) / self.scale
+        for pos, brand in enumerate(brands):
+            col = self.brands.get(str(brand))
+            if col is not None:
+                Z[pos, X.shape[1] + col] = BRAND_WEIGHT / np.sqrt(2.0)
+        return Z
+
+    def query_parsed(self, recs, k=5, quantiles=DEFAULT_QUANTILES):
+        """
+        Top-k comparable listings and an empirical price range for each
+        parsed VALUE_SCHEMA record.
+        """
+        k = max(1, min(int(k), MAX_K))
+        Z = self._embed(_numeric_matrix(recs), recs['brand'])
+        types = recs['vehicle_type'].astype(str)
+        out = [None] * len(recs)
+
+        for vtype in set(types.tolist()):
+            positions = np.flatnonzero(types == vtype)
+            tree = self.trees.get(vtype)
+            if tree is None:
+                for pos in positions:
+                    out[pos] = {'comparables': [], 'price_range': None}
+                continue
+            dist, idx = tree.query(Z[positions], k=min(k, len(self.rows[vtype])))
+            for pos, d_row, i_row in zip(positions, dist, idx):
+                out[pos] = self._describe(self.rows[vtype][i_row], d_row, quantiles)
+        return out
+
+    def _describe(self, rows, distances, quantiles):
+        found = self.listings[rows]
+        prices = found['Resale_Value_L']
+        q = np.quantile(prices, quantiles)
+        comparables = [{
+            'brand':              str(l['brand']),
+            'model':              l['model'],
+            'vehicle_type':       str(l['vehicle_type']),
+            'Purchase_Year':      int(l['Purchase_Year']),
+            'odometer_km':        float(l['odometer_km']),
+            'battery_health_pct': float(l['battery_health_pct']),
+            'Purchase_Price_L':   float(l['Purchase_Price_L']),
+            'Resale_Value_L':     float(l['Resale_Value_L']),
+            'distance':           round(float(d), 4),
+            'source':             f"{l['source']}#{int(l['row'])}",
+        } for l, d in zip(found, distances)]
+        return {
+            'comparables': comparables,
+            'price_range': {
+                'quantiles': [float(x) for x in quantiles],
+                'prices':    [round(float(x), 2) for x in q],
+                'low':       round(float(q[0]), 2),
+                'high':      round(float(q[-1]), 2),
+                'label':     f"₹{round(float(q[0])):,} - ₹{round(float(q[-1])):,}",
+                'n':         len(comparables),
+            },
+        }
+
+
+# ================================================================== #
+#  CLI: python comparables.py                                         #
+# ================================================================== #
+if __name__ == "__main__":
+    # Pickle against the importable module, not __main__, so the app can load it
+    from comparables import ComparablesIndex as _Index
+    start = time.perf_counter()
+    _Index.build().save()
+    print(f"Saved to {COMPARABLES_INDEX_PATH} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,274 @@
+"""
+Pre-aggregated dashboard rollups over the vehicle listings JSON.
+
+The dashboards (dashboard.js, data.js, user-/admin-/business-dashboard.js)
+only chart aggregates of ev_vehicle_with_extra_10000.json: totals and
+averages, counts per brand / category / year / state, top brands. This
+module loads the file once per version, computes those rollups, and
+serves them (and paginated raw rows) as small pre-encoded JSON bodies:
+
+    GET /dashboard/rollups[?brand=Tata&exclude_brand=Tesla,Hyundai&top=10]
+        {rows, totals, means, by: {dimension: [{key, count, sum, mean}]},
+         top: {brand: [...], model: [...]}}
+    GET /dashboard/rows?page=1&page_size=100[&fields=Brand,Model][&sort=-Vehicle_Price][&brand=...]
+        {page, page_size, pages, total_rows, rows: [...]}
+
+Rollups are grouped by Brand, Vehicle_Category, price_band, Purchase_Year,
+State, Usage_Type, model_family and state_year; the last two and the
+Revenue measure are derived at load (see DERIVED_COLUMNS).
+
+Filters (both endpoints; comma-separated, case-insensitive):
+brand, category, state, year, usage, band (price band), each also as
+exclude_<name>.
+
+Every body carries an ETag derived from the data version (sha256 of the
+file) and the normalized query, so a browser revalidating with
+If-None-Match gets a 304 without the rollup being rebuilt; bodies are
+kept gzip-compressed for clients that accept it. The model registry
+(model_registry.py) reloads the data when the file changes, which
+changes every ETag.
+
+    DASHBOARD_DATA_PATH    listings JSON (default backend-data/ev_vehicle_with_extra_10000.json);
+                           a list of records or {"data": [...]}
+    DASHBOARD_TOP_N=10     default length of the top-N lists
+    DASHBOARD_MAX_PAGE_SIZE=1000
+"""
+import os
+import json
+import gzip
+import hashlib
+
+import numpy as np
+
+from lazy_models import checksum
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD_DATA_PATH = os.environ.get(
+    'DASHBOARD_DATA_PATH', os.path.join(BACKEND_DIR, '..', 'backend-data', 'ev_vehicle_with_extra_10000.json'))
+DASHBOARD_TOP_N = int(os.environ.get('DASHBOARD_TOP_N', 10))
+DASHBOARD_MAX_PAGE_SIZE = int(os.environ.get('DASHBOARD_MAX_PAGE_SIZE', 1000))
+DEFAULT_PAGE_SIZE = 100
+MAX_TOP_N = 100
+
+# query parameter → column
+FILTERS = {
+    'brand': 'Brand',
+    'category': 'Vehicle_Category',
+    'state': 'State',
+    'year': 'Purchase_Year',
+    'usage': 'Usage_Type',
+    'band': 'price_band',
+}
+# Columns the rollups are grouped by (those present in the file)
+DIMENSIONS = ['Brand', 'Vehicle_Category', 'price_band', 'Purchase_Year', 'State', 'Usage_Type',
+              'model_family', 'state_year']
+# top-N lists: name → column, ranked by the sum of RANK_COLUMN (row count if absent)
+TOP = {'brand': 'Brand', 'model': 'Model'}
+RANK_COLUMN = 'Units_Sold_Per_Year'
+# Numeric columns that are identifiers, not measures
+ID_COLUMNS = {'Vehicle_ID', 'Purchase_Year'}
+
+# Price bands (INR) over the first price column present
+PRICE_COLUMNS = ['Vehicle_Price', 'Price_INR']
+PRICE_BANDS = [0, 1_000_000, 2_000_000, 4_000_000, np.inf]
+PRICE_BAND_LABELS = ['<10L', '10-20L', '20-40L', '40L+']
+
+# Derived columns added at load (rolled up, never returned by /dashboard/rows):
+# price_band, model_family (Model without its trailing _<n> listing suffix),
+# state_year ("<State>-<Purchase_Year>") and Revenue (price x units sold)
+DERIVED_COLUMNS = {'price_band', 'model_family', 'state_year', 'Revenue'}
+
+# Bodies smaller than this are not worth compressing
+MIN_GZIP_BYTES = 1024
+
+
+class EncodedBody:
+    """A JSON response body encoded once: raw bytes, gzip bytes and ETag."""
+
+    def __init__(self, data, etag):
+        self.etag = etag
+        self.raw = json.dumps(data, separators=(',', ':'), allow_nan=False).encode()
+        self.gzip = gzip.compress(self.raw, compresslevel=6) if len(self.raw) >= MIN_GZIP_BYTES else None
+
+
+def _scalar(value):
+    """numpy / pandas scalar → JSON value (NaN → None)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _split(value):
+    return [v.strip().lower() for v in value.split(',') if v.strip()]
+
+
+class DashboardRollups:
+    def __init__(self, path=DASHBOARD_DATA_PATH):
+        self.path = path
+        self.frame = None
+        self.version = None
+        self.measures = []
+        self.dimensions = []
+        self._lower = {}        # filter column → lower-cased string values
+        self._rollups = {}      # normalized filters → rollup dict (unfiltered + one per brand at load)
+
+        if not os.path.exists(path):
+            print(f"[WARNING] Dashboard data not found: {path}")
+            return
+        self._load()
+
+    @property
+    def loaded(self):
+        return self.frame is not None
+
+    # ------------------------------------------------------------------ #
+    # Load / precompute
+    # ------------------------------------------------------------------ #
+
+    def _load(self):
+        import pandas as pd
+
+        with open(self.path) as f:
+            data = json.load(f)
+        records = data if isinstance(data, list) else data.get('data', [])
+        df = pd.DataFrame.from_records(records)
+
+        price = next((c for c in PRICE_COLUMNS if c in df.columns), None)
+        if price is not None:
+            prices = pd.to_numeric(df[price], errors='coerce')
+            df['price_band'] = pd.cut(prices, PRICE_BANDS, labels=PRICE_BAND_LABELS, right=False).astype(object)
+            if RANK_COLUMN in df.columns:
+                df['Revenue'] = prices * pd.to_numeric(df[RANK_COLUMN], errors='coerce')
+        if 'Model' in df.columns:
+            df['model_family'] = df['Model'].astype(str).str.replace(r'_\d+$', '', regex=True)
+        if 'State' in df.columns and 'Purchase_Year' in df.columns:
+            df['state_year'] = df['State'].astype(str) + '-' + df['Purchase_Year'].astype(str)
+
+        self.frame = df
+        self.version = checksum([self.path])
+        self.dimensions = [c for c in DIMENSIONS if c in df.columns]
+        self.measures = [c for c in df.columns
+                         if c not in ID_COLUMNS and c not in self.dimensions
+                         and pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+        self._lower = {column: df[column].astype(str).str.lower().to_numpy()
+                       for column in set(FILTERS.values()) if column in df.columns}
+
+        self._rollups[()] = self._build_rollup(df)
+        if 'Brand' in df.columns:
+            for brand in df['Brand'].dropna().astype(str).str.lower().unique():
+                filters = (('brand', False, (brand,)),)
+                self._rollups[filters] = self._build_rollup(df[self._mask(filters)])
+        print(f"[INFO] Dashboard rollups built: {len(df)} rows, {len(self._rollups)} slices, "
+              f"version {self.version}")
+
+    def _build_rollup(self, df, top_n=DASHBOARD_TOP_N):
+        sums = df[self.measures].sum()
+        means = df[self.measures].mean()
+        out = {
+            'rows': len(df),
+            'totals': {c: _scalar(sums[c]) for c in self.measures},
+            'means': {c: _scalar(means[c]) for c in self.measures},
+            'by': {},
+            'top': {},
+        }
+        for dim in self.dimensions:
+            grouped = df.groupby(dim, sort=True)
+            counts = grouped.size()
+            group_sums = grouped[self.measures].sum()
+            group_means = grouped[self.measures].mean()
+            out['by'][dim] = [
+                {'key': _scalar(key), 'count': int(counts[key]),
+                 'sum': {c: _scalar(group_sums.at[key, c]) for c in self.measures},
+                 'mean': {c: _scalar(group_means.at[key, c]) for c in self.measures}}
+                for key in counts.sort_values(ascending=False, kind='stable').index
+            ]
+        for name, column in TOP.items():
+            if column not in df.columns:
+                continue
+            if RANK_COLUMN in df.columns:
+                ranked = df.groupby(column)[RANK_COLUMN].sum()
+            else:
+                ranked = df.groupby(column).size()
+            ranked = ranked.sort_values(ascending=False, kind='stable').head(top_n)
+            out['top'][name] = [{'key': _scalar(k), 'value': _scalar(v)} for k, v in ranked.items()]
+        return out
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def parse_top(args):
+        top_n = int(args.get('top', DASHBOARD_TOP_N))
+        if not 1 <= top_n <= MAX_TOP_N:
+            raise ValueError(f"top must be between 1 and {MAX_TOP_N}")
+        return top_n
+
+    def parse_filters(self, args):
+        """Query args → normalized filter tuple; ValueError on unknown columns."""
+        filters = []
+        for name, column in FILTERS.items():
+            for exclude in (False, True):
+                value = args.get(f'exclude_{name}' if exclude else name)
+                if value is None:
+                    continue
+                if column not in self._lower:
+                    raise ValueError(f"Filter '{name}' is not available: the data has no {column} column")
+                filters.append((name, exclude, tuple(sorted(set(_split(value))))))
+        return tuple(filters)
+
+    def _mask(self, filters):
+        mask = np.ones(len(self.frame), dtype=bool)
+        for name, exclude, values in filters:
+            hit = np.isin(self._lower[FILTERS[name]], values)
+            mask &= ~hit if exclude else hit
+        return mask
+
+    def rollup(self, filters=(), top_n=DASHBOARD_TOP_N):
+        """Rollup dict for the filtered rows (precomputed slices are reused)."""
+        if top_n == DASHBOARD_TOP_N and filters in self._rollups:
+            return self._rollups[filters]
+        df = self.frame[self._mask(filters)] if filters else self.frame
+        return self._build_rollup(df, top_n)
+
+    def parse_rows_query(self, args):
+        """page / page_size / fields / sort query args → validated rows() kwargs; ValueError if invalid."""
+        page = int(args.get('page', 1))
+        page_size = int(args.get('page_size', DEFAULT_PAGE_SIZE))
+        if page < 1:
+            raise ValueError("page must be >= 1")
+        if not 1 <= page_size <= DASHBOARD_MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 1 and {DASHBOARD_MAX_PAGE_SIZE}")
+        fields = tuple(f.strip() for f in args.get('fields', '').split(',') if f.strip())
+        unknown = [c for c in fields if c not in self.frame.columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {unknown}")
+        sort = args.get('sort') or None
+        if sort and sort.lstrip('-') not in self.frame.columns:
+            raise ValueError(f"Unknown sort column: {sort.lstrip('-')}")
+        return {'page': page, 'page_size': page_size, 'fields': fields, 'sort': sort}
+
+    def rows(self, filters=(), page=1, page_size=DEFAULT_PAGE_SIZE, fields=(), sort=None):
+        """One page of the filtered raw rows (arguments as returned by parse_rows_query)."""
+        columns = list(fields) or [c for c in self.frame.columns if c not in DERIVED_COLUMNS]
+        df = self.frame[self._mask(filters)] if filters else self.frame
+        if sort:
+            df = df.sort_values(sort.lstrip('-'), ascending=not sort.startswith('-'), kind='stable')
+
+        total = len(df)
+        chunk = df.iloc[(page - 1) * page_size: page * page_size]
+        values = [[_scalar(v) for v in chunk[c].tolist()] for c in columns]
+        return {
+            'page': page,
+            'page_size': page_size,
+            'pages': -(-total // page_size),
+            'total_rows': total,
+            'rows': [dict(zip(columns, row)) for row in zip(*values)],
+        }
+
+    def etag(self, *key):
+        """ETag for a normalized query: changes with the data version."""
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+        return f'{self.version}-{digest}'
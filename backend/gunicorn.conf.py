@@ -0,0 +1,77 @@
+"""
+gunicorn settings (read automatically when gunicorn is started from backend/).
+
+Bind address and worker count keep gunicorn's own env handling
+($PORT, $WEB_CONCURRENCY). Workers are gthread workers with GUNICORN_THREADS
+threads (default 8): admission control (admission.py) limits requests per
+process, so a sync worker's single thread would leave it nothing to
+reserve. Its limits are fitted to the thread count when a worker starts.
+
+Set GUNICORN_PRELOAD=1 to load every model once in the master before
+forking:
+
+    GUNICORN_PRELOAD=1 WEB_CONCURRENCY=4 gunicorn main:app
+
+In preload mode the models are loaded eagerly (a background loader thread
+would not survive the fork) and their arrays are memory-mapped
+(MODEL_MMAP=1, see artifacts.py), so workers share the read-only pages
+instead of each holding a private copy. Check the effect with
+benchmarks/worker_memory.py.
+
+/metrics runs in shared-directory mode (see metrics.py): unless
+METRICS_MULTIPROC_DIR is set, it defaults to a per-master directory under
+the system temp dir, wiped on start and removed on exit.
+"""
+import gc
+import os
+import shutil
+import tempfile
+
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0").lower() in ("1", "true", "yes")
+
+if preload_app:
+    os.environ.setdefault("MODEL_LOADING", "eager")
+    os.environ.setdefault("MODEL_MMAP", "1")
+
+# Set before the app (and metrics.py) is imported, in the master or a worker
+os.environ.setdefault("METRICS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"ev_metrics_{os.getpid()}"))
+
+
+def on_starting(server):
+    # Snapshots left by an earlier run would be merged into this one's counters
+    metrics_dir = os.environ["METRICS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far into the permanent generation so the
+    # workers' garbage collector never writes to (and un-shares) those pages.
+    if preload_app:
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    # worker.cfg.threads includes a --threads given on the command line
+    from main import admission
+    admission.size_for_threads(worker.cfg.threads)
+
+    import metrics
+    metrics.start_multiprocess()
+
+
+def worker_exit(server, worker):
+    # Final snapshot, so requests since the last periodic flush are counted
+    import metrics
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    shutil.rmtree(os.environ["METRICS_MULTIPROC_DIR"], ignore_errors=True)
@@ -0,0 +1,147 @@
+"""
+Micro-batching request coalescer for model inference.
+
+Under concurrent load every request thread would call predict() with a
+single row and pay the full per-call overhead. A MicroBatcher sits between
+the Flask routes and the model: callers submit() one item and block, a
+background thread collects whatever arrives within `window_ms` (or until
+`max_batch` items are waiting), runs one batched call and hands each
+caller its own result.
+
+Coalescing only helps when requests share a process, i.e. with threaded
+workers (gunicorn --threads N / gthread). Configuration:
+
+    COALESCE_REQUESTS=1      enable (default: off, submit() calls through)
+    COALESCE_WINDOW_MS=2     collection window
+    COALESCE_MAX_BATCH=64    flush early once this many items are queued
+    COALESCE_TIMEOUT_S=10    longest a caller waits for its result (main.py)
+
+Whatever goes wrong in a batch, every caller in it gets an exception
+rather than waiting forever, and the collector thread keeps running.
+"""
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import metrics
+
+COALESCE_REQUESTS  = os.environ.get("COALESCE_REQUESTS", "0").lower() in ("1", "true", "yes")
+COALESCE_WINDOW_MS = float(os.environ.get("COALESCE_WINDOW_MS", 2))
+COALESCE_MAX_BATCH = int(os.environ.get("COALESCE_MAX_BATCH", 64))
+COALESCE_TIMEOUT_S = float(os.environ.get("COALESCE_TIMEOUT_S", 10))
+
+
+class MicroBatcher:
+    """
+    predict_many(items) must return one result per item, in order. A result
+    that is an Exception instance is raised in that caller only; an
+    exception raised by predict_many itself fails the whole batch.
+    """
+
+    def __init__(self, predict_many, window_ms=COALESCE_WINDOW_MS,
+                 max_batch=COALESCE_MAX_BATCH, enabled=COALESCE_REQUESTS, name="batcher"):
+        self.predict_many = predict_many
+        self.window = window_ms / 1000.0
+        self.max_batch = max(int(max_batch), 1)
+        self.enabled = enabled
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        # stats
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+
+    def submit(self, item, timeout=None):
+        if not self.enabled:
+            return self._unwrap(self.predict_many([item])[0])
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+        }
+
+    @staticmethod
+    def _unwrap(result):
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _ensure_worker(self):
+        # Started lazily (and restarted after fork) so gunicorn --preload
+        # workers each get their own collector thread.
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name=f"{self.name}-worker", daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _run(self):
+        q = self._queue
+        # Stages timed inside predict_many are attributed to this batcher
+        metrics.set_route(f"{self.name}-batcher")
+        while True:
+            batch = [q.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._execute(batch)
+            except Exception as e:
+                self._fail(batch, e)
+
+    @staticmethod
+    def _fail(batch, error):
+        """Fail every future of the batch that has no result yet."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _execute(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        metrics.observe_batch(f"{self.name}-coalesced", len(batch))
+
+        try:
+            results = list(self.predict_many([item for item, _ in batch]))
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        if len(results) != len(batch):
+            self._fail(batch, RuntimeError(f"{self.name}: predict_many returned {len(results)} results "
+                                           f"for {len(batch)} items"))
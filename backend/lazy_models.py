@@ -0,0 +1,222 @@
+"""
+Lazy / background model loading for fast cold starts.
+
+Each model is wrapped in a LazyModel that runs its loader at most once.
+Importing main.py no longer loads anything; depending on MODEL_LOADING:
+
+    background (default)  start loading every model in a daemon thread right
+                          away; the first request for a model that is still
+                          loading waits for it
+    lazy                  load each model on the first request that needs it
+    eager                 load everything at import (old behaviour; use with
+                          gunicorn --preload)
+
+/health reads status() / peek() only, so it answers immediately and never
+triggers a load.
+
+A LazyModel that knows its artifact files (`sources`) is also versioned:
+its version is a checksum of those files, and reload() loads a new copy
+next to the live one, warms it, and swaps it in (see model_registry.py).
+"""
+import os
+import time
+import hashlib
+import threading
+import traceback
+
+MODEL_LOADING = os.environ.get("MODEL_LOADING", "background").lower()
+
+_UNSET = object()
+
+# One lock for every loader: unpickling imports sklearn/statsmodels modules,
+# and two threads importing the same package at once trips Python's module
+# lock deadlock detection. Loading is CPU bound anyway.
+_load_lock = threading.RLock()
+_load_pid = os.getpid()
+
+
+def _shared_lock():
+    global _load_lock, _load_pid
+    # A fork mid-load (background thread in a preloading master) leaves the
+    # lock held by a thread that does not exist in the child.
+    if _load_pid != os.getpid():
+        _load_pid = os.getpid()
+        _load_lock = threading.RLock()
+    return _load_lock
+
+
+def fingerprint(paths):
+    """Cheap change detector: (path, size, mtime_ns) of each file."""
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            out.append((path, None, None))
+            continue
+        out.append((path, st.st_size, st.st_mtime_ns))
+    return tuple(out)
+
+
+def checksum(paths):
+    """Short sha256 over the contents of the files (missing files skipped)."""
+    h = hashlib.sha256()
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()[:12]
+
+
+class LazyModel:
+    def __init__(self, name, loader, sources=(), warmup=None):
+        self.name = name
+        self.loader = loader
+        # Artifact files (or a callable returning them) that define the version
+        self.sources = sources
+        # Called with a freshly loaded value before it goes live; raising
+        # keeps the previous version
+        self.warmup = warmup
+        # (value, version) swapped as one reference, so readers always see
+        # a matching pair
+        self._slot = (_UNSET, None)
+        self._fingerprint = None
+        self._error = None
+        self._load_seconds = None
+        self._loaded_at = None
+        self._loading = False
+        self.reloads = 0
+        self.reload_error = None
+
+    def source_paths(self):
+        return list(self.sources() if callable(self.sources) else self.sources)
+
+    def _load(self):
+        """loader + warmup → (value, version, fingerprint). Raises on failure."""
+        paths = self.source_paths()
+        fp = fingerprint(paths)
+        version = checksum(paths) if paths else None
+        value = self.loader()
+        if value is not None and self.warmup is not None:
+            self.warmup(value)
+        return value, version, fp
+
+    def get(self):
+        """Loaded value (loading it now if needed); None if the loader failed."""
+        value = self._slot[0]
+        if value is not _UNSET:
+            return value
+        with _shared_lock():
+            if self._slot[0] is _UNSET:
+                self._loading = True
+                start = time.perf_counter()
+                try:
+                    value, version, fp = self._load()
+                    self._fingerprint = fp
+                    self._slot = (value, version)
+                except Exception as e:
+                    traceback.print_exc()
+                    self._error = str(e)
+                    self._slot = (None, None)
+                finally:
+                    self._load_seconds = time.perf_counter() - start
+                    self._loaded_at = time.time()
+                    self._loading = False
+                print(f"[{self.name}] ready in {self._load_seconds:.3f}s (version {self._slot[1]})")
+        return self._slot[0]
+
+    def current(self):
+        """(value, version) of the live model, loading it if needed."""
+        self.get()
+        return self._slot
+
+    def peek(self):
+        """Loaded value or None; never triggers a load."""
+        value = self._slot[0]
+        return None if value is _UNSET else value
+
+    @property
+    def version(self):
+        return self._slot[1]
+
+    @property
+    def warm(self):
+        return self.peek() is not None
+
+    # ------------------------------------------------------------------ #
+    #  Hot reload                                                         #
+    # ------------------------------------------------------------------ #
+    def changed(self):
+        """True when the source files differ from the ones the live model came from."""
+        if self._slot[0] is _UNSET or not self.sources:
+            return False
+        return fingerprint(self.source_paths()) != self._fingerprint
+
+    def reload(self):
+        """
+        Load, warm and swap in the current artifacts. Requests already holding
+        the old value finish on it; new requests get the new one. Returns
+        True if a new version went live.
+        """
+        with _shared_lock():
+            paths = self.source_paths()
+            if paths and checksum(paths) == self._slot[1]:
+                # Touched or rewritten with identical content
+                self._fingerprint = fingerprint(paths)
+                return False
+            start = time.perf_counter()
+            try:
+                value, version, fp = self._load()
+                if value is None:
+                    raise RuntimeError("loader returned nothing")
+            except Exception as e:
+                traceback.print_exc()
+                self.reload_error = str(e)
+                # Do not retry the same broken files on every poll
+                self._fingerprint = fingerprint(paths)
+                print(f"[{self.name}] reload failed, keeping version {self._slot[1]}: {e}")
+                return False
+            previous = self._slot[1]
+            self._slot = (value, version)
+            self._fingerprint = fp
+            self._error = None
+            self.reload_error = None
+            self._load_seconds = time.perf_counter() - start
+            self._loaded_at = time.time()
+            self.reloads += 1
+        print(f"[{self.name}] reloaded {previous} → {version} in {self._load_seconds:.3f}s")
+        return True
+
+    def status(self):
+        value = self._slot[0]
+        if value is not _UNSET:
+            state = "warm" if value is not None else "failed"
+        else:
+            state = "loading" if self._loading else "cold"
+        out = {"state": state, "version": self._slot[1]}
+        if self._load_seconds is not None:
+            out["load_seconds"] = round(self._load_seconds, 3)
+        if self._loaded_at is not None:
+            out["loaded_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._loaded_at))
+        if self.reloads:
+            out["reloads"] = self.reloads
+        if self._error:
+            out["error"] = self._error
+        if self.reload_error:
+            out["reload_error"] = self.reload_error
+        return out
+
+
+def start_loading(models, mode=MODEL_LOADING):
+    """Apply MODEL_LOADING to a list of LazyModels (in priority order)."""
+    if mode == "eager":
+        for m in models:
+            m.get()
+    elif mode == "background":
+        def warm_all():
+            for m in models:
+                m.get()
+        threading.Thread(target=warm_all, name="model-warmup", daemon=True).start()
@@ -1,88 +1,361 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
-from utils import load_model_and_encoder, preprocess_input, get_recommendation, generate_insight, calculate_risk_level
-from value_model import ValueModel
-from sales_model import SalesModel
+from utils import (MODEL_PATH, preprocess_input, get_recommendation, generate_insight, calculate_risk_level,
+                   COL_VEHICLE_AGE, COL_CHARGE_CYCLES, COL_FAST_CHARGING, COL_MAX_TEMP,
+                   COL_RESISTANCE, COL_CAP_RETENTION, HEALTH_FEATURES)
+from scoring import load_health_model, score_health, score_value
+from value_model import ValueModel, VALUE_MODES, parse_grid_axes
+from value_surrogate import VALUE_SURROGATE_PATH
+from schema import VALUE_SCHEMA, SchemaError
+from sales_model import SalesModel, SIM_PATHS, MAX_SIM_PATHS, MAX_FORECAST_MONTHS
+from regional_sales import RegionalSalesModel, REGIONAL_MODELS_DIR
+from comparables import ComparablesIndex, SOURCE_PATHS as COMPARABLES_SOURCES, MAX_K as MAX_COMPARABLES
+from dashboard_rollups import DashboardRollups, EncodedBody, DASHBOARD_DATA_PATH
+from battery_telemetry import TelemetryStore
+from admission import AdmissionController, Rejected
+from tree_engine import INFERENCE_ENGINE
+from inference_batcher import MicroBatcher, COALESCE_TIMEOUT_S
+from result_cache import ResultCache
+from lazy_models import LazyModel, start_loading, MODEL_LOADING
+from artifacts import MODEL_MMAP
+from model_registry import ModelRegistry
+from metrics import stage, set_route, observe_request, observe_batch, add_collector, render, \
+    Profiler, PROFILING_ENABLED
+import time
 import os
+import functools
+import numpy as np
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Load Resources
-model, label_encoder = load_model_and_encoder()
-
-# Load Value Model (dual: condition_model.pkl + price_model.pkl)
 BACKEND_DIR = os.path.dirname(__file__)
 CONDITION_MODEL_PATH = os.path.join(BACKEND_DIR, 'condition_model.pkl')
 PRICE_MODEL_PATH = os.path.join(BACKEND_DIR, 'price_model.pkl')
-value_model = ValueModel(CONDITION_MODEL_PATH, PRICE_MODEL_PATH)
-
-# Load Sales Model
 SALES_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'sarima_monthly_ev_sales.pkl')
-sales_model = SalesModel(SALES_MODEL_PATH)
 
 
+# Load Resources (lazily / in the background, see lazy_models.py)
+# Warm-up: a few test predictions on every freshly loaded model before it
+# goes live (see model_registry.py); raising keeps the previous version.
+def _warm_health(health):
+    if health.model is None:
+        raise RuntimeError(f"Health model did not load from {MODEL_PATH}")
+    indices = health.predictor.predict(np.zeros((2, len(HEALTH_FEATURES))))
+    if health.label_encoder:
+        health.label_encoder.inverse_transform(indices)
+
+
+def _warm_value(values):
+    recs, _, _ = VALUE_SCHEMA.parse_many([{}, {'brand': 'Tata', 'Purchase_Price_L': 10, 'Resale_Value_L': 8}])
+    for mode in VALUE_MODES:
+        for result in values.analyze_parsed(recs, mode):
+            if not np.isfinite([result['condition_score'], result['predicted_resale']]).all():
+                raise RuntimeError(f"Value model ({mode}) produced a non-finite prediction: {result}")
+
+
+def _warm_sales(national):
+    if national.model is None:
+        raise RuntimeError(f"Sales model did not load from {SALES_MODEL_PATH}")
+    national.get_forecast(12, 'monthly')
+    national.simulate(12, 'monthly')
+
+
+def _warm_regional(regional):
+    if regional.models:
+        regional.get_all_forecasts(12, 'monthly')
+        regional.simulate_all(12, 'monthly')
+
+
+def _warm_comparables(index):
+    for found in index.query_parsed(VALUE_SCHEMA.parse_many([{}, {'vehicle_type': 'Bike'}])[0], k=5):
+        if not found['comparables']:
+            raise RuntimeError("Comparables index returned no listings")
+
+
+health_model = LazyModel('health', load_health_model, sources=[MODEL_PATH], warmup=_warm_health)
+# Value Model (dual: condition_model.pkl + price_model.pkl, plus the distilled
+# surrogate for mode=fast, see value_surrogate.py)
+value_model = LazyModel('value', lambda: ValueModel(CONDITION_MODEL_PATH, PRICE_MODEL_PATH,
+                                                    surrogate_path=VALUE_SURROGATE_PATH),
+                        sources=[CONDITION_MODEL_PATH, PRICE_MODEL_PATH, VALUE_SURROGATE_PATH],
+                        warmup=_warm_value)
+sales_model = LazyModel('sales', lambda: SalesModel(SALES_MODEL_PATH),
+                        sources=[SALES_MODEL_PATH], warmup=_warm_sales)
+# Per-region sales models (LATEST version under sales_models/, see regional_sales.py)
+regional_sales = LazyModel('regional_sales', RegionalSalesModel,
+                           sources=[os.path.join(REGIONAL_MODELS_DIR, 'LATEST')], warmup=_warm_regional)
+# Comparable-listings KD-tree over the resale CSVs (persisted, see comparables.py)
+comparables_index = LazyModel('comparables', ComparablesIndex.load_or_build,
+                              sources=COMPARABLES_SOURCES, warmup=_warm_comparables)
+# Dashboard rollups over the listings JSON (see dashboard_rollups.py)
+dashboard_rollups = LazyModel('dashboard', DashboardRollups, sources=[DASHBOARD_DATA_PATH])
+
+start_loading([health_model, value_model, sales_model, regional_sales, comparables_index, dashboard_rollups])
+
+# Hot reload: new artifact versions are picked up without a restart
+registry = ModelRegistry([health_model, value_model, sales_model, regional_sales, comparables_index,
+                          dashboard_rollups])
+
+
+@app.before_request
+def _before_request():
+    registry.ensure_watching()
+    g.request_start = time.perf_counter()
+    set_route(request.url_rule.rule if request.url_rule else 'unmatched')
+
+
+@app.after_request
+def _after_request(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+    set_route(None)
+    return response
+
+
+# Upper bound on records accepted by the batch endpoints
+MAX_BATCH_RECORDS = int(os.environ.get('MAX_BATCH_RECORDS', 10000))
+
+
+# Admission control (see admission.py): expensive routes get a few slots,
+# the rest stay reserved for the cheap single-row routes; overload is
+# rejected early with 429/503 + Retry-After instead of queueing unboundedly.
+admission = AdmissionController()
+
+
+def _admit(route_class):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not admission.enabled:
+                return view(*args, **kwargs)
+            try:
+                started = admission.acquire(route_class)
+            except Rejected as e:
+                return jsonify({'error': e.reason, 'retry_after': e.retry_after}), e.status, \
+                    {'Retry-After': str(e.retry_after)}
+            try:
+                return view(*args, **kwargs)
+            finally:
+                admission.release(route_class, started)
+        return wrapper
+    return decorator
+
+
+# Request coalescing (COALESCE_REQUESTS=1): concurrent single-row requests
+# are gathered for a few ms and scored with one batched predict. Items are
+# (model, payload) pairs so a hot swap mid-window never mixes versions.
+def _per_model(items, predict):
+    results = [None] * len(items)
+    groups = {}
+    for i, (m, _) in enumerate(items):
+        groups.setdefault(id(m), (m, []))[1].append(i)
+    for m, positions in groups.values():
+        for i, r in zip(positions, predict(m, [items[i][1] for i in positions])):
+            results[i] = r
+    return results
+
+
+def _predict_health_many(items):
+    return _per_model(items, lambda health, arrays: list(health.predictor.predict(np.vstack(arrays))))
+
+
+def _analyze_value_many(items):
+    return _per_model(items, lambda values, recs: values.analyze_parsed(np.concatenate(recs)))
+
+
+health_batcher = MicroBatcher(_predict_health_many, name='health')
+value_batcher = MicroBatcher(_analyze_value_many, name='value')
+
+# Response caches keyed on the parsed payload; cleared when the model version changes
+health_cache = ResultCache(version_fn=lambda: health_model.version, name='health')
+value_cache = ResultCache(version_fn=lambda: value_model.version, name='value')
+# Encoded dashboard bodies, keyed by normalized query
+dashboard_cache = ResultCache(version_fn=lambda: dashboard_rollups.version, name='dashboard')
+
 
 @app.route('/predict_health', methods=['POST'])
+@_admit('cheap')
 def predict_health():
-    if not model:
+    health, version = health_model.current()
+    if not health or not health.model:
         return jsonify({'error': 'Model not loaded'}), 500
 
     try:
-        data = request.json
+        with stage('parse_json'):
+            data = request.json
         
         # Preprocess using utils
         try:
             input_array = preprocess_input(data)
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
-        
+
+        cache_key = (version, input_array.tobytes())
+        with stage('cache_lookup'):
+            cached = health_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached)
+
         # Predict
-        prediction_index = model.predict(input_array)[0]
+        with stage('predict'):
+            prediction_index = health_batcher.submit((health, input_array), timeout=COALESCE_TIMEOUT_S)
         
         # Decode label
-        if label_encoder:
-            prediction_label = label_encoder.inverse_transform([prediction_index])[0]
-        else:
-            # Fallback if label_encoder failed
-            mapping = {0: 'Degraded', 1: 'Healthy', 2: 'Moderate'}
-            prediction_label = mapping.get(prediction_index, "Unknown")
-
-        # Extract input values for helpers
-        vehicle_age    = float(data.get('vehicle_age_years', 0))
-        charge_cycles  = int(float(data.get('total_charge_cycles', 0)))
-        max_temp       = float(data.get('max_battery_temperature_c', 0))
-        fast_charging  = float(data.get('fast_charging_frequency_percent', 0))
-        cap_retention  = float(data.get('capacity_retention_percent', 0))
-        resistance     = float(data.get('internal_resistance_mohm', 0))
-
-        recommendation = get_recommendation(prediction_label)
-        insight        = generate_insight(prediction_label, vehicle_age, charge_cycles,
-                                          max_temp, fast_charging, cap_retention, resistance)
-        risk_level     = calculate_risk_level(cap_retention, charge_cycles, max_temp)
+        with stage('decode_label'):
+            if health.label_encoder:
+                prediction_label = health.label_encoder.inverse_transform([prediction_index])[0]
+            else:
+                # Fallback if label_encoder failed
+                mapping = {0: 'Degraded', 1: 'Healthy', 2: 'Moderate'}
+                prediction_label = mapping.get(prediction_index, "Unknown")
 
-        return jsonify({
+        # Helper inputs come from the already-parsed feature vector
+        row = input_array[0]
+        vehicle_age    = float(row[COL_VEHICLE_AGE])
+        charge_cycles  = int(row[COL_CHARGE_CYCLES])
+        max_temp       = float(row[COL_MAX_TEMP])
+        fast_charging  = float(row[COL_FAST_CHARGING])
+        cap_retention  = float(row[COL_CAP_RETENTION])
+        resistance     = float(row[COL_RESISTANCE])
+
+        with stage('insights'):
+            recommendation = get_recommendation(prediction_label)
+            insight        = generate_insight(prediction_label, vehicle_age, charge_cycles,
+                                              max_temp, fast_charging, cap_retention, resistance)
+            risk_level     = calculate_risk_level(cap_retention, charge_cycles, max_temp)
+
+        response = {
             'status': 'success',
             'prediction': prediction_label,
             'prediction_index': int(prediction_index),
             'recommendation': recommendation,
             'insight': insight,
-            'risk_level': risk_level
-        })
+            'risk_level': risk_level,
+            'model_version': version
+        }
+        health_cache.set(cache_key, response)
+        with stage('serialize'):
+            return jsonify(response)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/predict_health_batch', methods=['POST'])
+@_admit('expensive')
+def predict_health_batch():
+    health, version = health_model.current()
+    if not health or not health.model:
+        return jsonify({'error': 'Model not loaded'}), 500
+
+    try:
+        with stage('parse_json'):
+            data = request.json
+        records = data.get('records') if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            return jsonify({'error': "Expected a JSON list or {'records': [...]}"}), 400
+        if len(records) > MAX_BATCH_RECORDS:
+            return jsonify({'error': f'Batch too large: {len(records)} records (max {MAX_BATCH_RECORDS})'}), 413
+
+        observe_batch('predict_health_batch', len(records))
+        results, errors = score_health(health, records)
+
+        with stage('serialize'):
+            return jsonify({
+                'status': 'success',
+                'model_version': version,
+                'count': len(records),
+                'scored': len(results),
+                'failed': len(errors),
+                'results': results,
+                'errors': errors
+            })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _comparables_count(data):
+    """Requested number of comparable listings (?comparables=k or body field), 0 = none."""
+    k = request.args.get('comparables')
+    if k is None and isinstance(data, dict):
+        k = data.get('comparables')
+    if k in (None, '', 0, '0', False):
+        return 0
+    try:
+        k = int(k)
+    except (TypeError, ValueError):
+        raise SchemaError(f"Invalid value for comparables: {k!r}")
+    if not 1 <= k <= MAX_COMPARABLES:
+        raise SchemaError(f"comparables must be between 1 and {MAX_COMPARABLES}")
+    return k
+
+
+def _value_mode(data, values):
+    """
+    Requested inference mode (?mode= or body field) → 'fast' or 'accurate'.
+    'fast' uses the distilled surrogate and degrades to 'accurate' without one;
+    listings of vehicle types it does not cover are still served by the full
+    model (the mode in each result says which).
+    """
+    mode = request.args.get('mode')
+    if mode is None and isinstance(data, dict):
+        mode = data.get('mode')
+    if mode in (None, ''):
+        return 'accurate'
+    if mode not in VALUE_MODES:
+        raise SchemaError(f"mode must be one of {list(VALUE_MODES)}")
+    return values.resolve_mode(mode)
+
+
+def _with_comparables(response, record, k):
+    """response + the k nearest listings and their empirical price range."""
+    index, index_version = comparables_index.current()
+    if index is None:
+        return dict(response, comparables=None, comparable_price_range=None,
+                    comparables_error='Comparables index not loaded')
+    with stage('comparables'):
+        found = index.query_parsed(record, k=k)[0]
+    return dict(response, comparables=found['comparables'],
+                comparable_price_range=found['price_range'],
+                comparables_version=index_version)
+
+
 @app.route('/predict_value', methods=['POST'])
+@_admit('cheap')
 def predict_value():
-    if not value_model.model:
+    values, version = value_model.current()
+    if not values or not values.model:
         return jsonify({'error': 'Value Model not loaded'}), 500
     
     try:
-        data = request.json
-        result = value_model.analyze(data)
-        
-        return jsonify({
+        with stage('parse_json'):
+            data = request.json
+
+        # Parse once; every later stage reads the typed record
+        try:
+            with stage('preprocess'):
+                record = VALUE_SCHEMA.parse(data)
+                k = _comparables_count(data)
+                mode = _value_mode(data, values)
+        except SchemaError as e:
+            return jsonify({'error': str(e)}), 400
+
+        cache_key = (version, mode, VALUE_SCHEMA.key(record))
+        with stage('cache_lookup'):
+            cached = value_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(_with_comparables(cached, record, k) if k else cached)
+
+        with stage('predict'):
+            # The surrogate costs microseconds: nothing to gain from a coalescing window
+            if value_batcher.enabled and mode == 'accurate':
+                result = value_batcher.submit((values, record), timeout=COALESCE_TIMEOUT_S)
+            else:
+                result = values.analyze_parsed(record, mode)[0]
+
+        response = {
             'status': 'success',
             # New dual-model fields
             'condition_score':  result.get('condition_score'),
@@ -94,39 +367,388 @@ def predict_value():
             'fair_price_range': result['fair_price_range'],
             # Legacy compat
             'value_score':      result.get('condition_score'),
-        })
+            'model_version':    version,
+            'mode':             result['mode'],
+            **values.mode_stats(result['mode']),
+        }
+        value_cache.set(cache_key, response)
+        if k:
+            response = _with_comparables(response, record, k)
+        with stage('serialize'):
+            return jsonify(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/predict_value_batch', methods=['POST'])
+@_admit('expensive')
+def predict_value_batch():
+    values, version = value_model.current()
+    if not values or not values.model:
+        return jsonify({'error': 'Value Model not loaded'}), 500
+
+    try:
+        with stage('parse_json'):
+            data = request.json
+        records = data.get('records') if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            return jsonify({'error': "Expected a JSON list or {'records': [...]}"}), 400
+        if len(records) > MAX_BATCH_RECORDS:
+            return jsonify({'error': f'Batch too large: {len(records)} records (max {MAX_BATCH_RECORDS})'}), 413
+        try:
+            mode = _value_mode(data, values)
+        except SchemaError as e:
+            return jsonify({'error': str(e)}), 400
+
+        observe_batch('predict_value_batch', len(records))
+        results, errors = score_value(values, records, mode)
+        served = {r['mode'] for r in results}
+        served = served.pop() if len(served) == 1 else ('mixed' if served else mode)
+
+        with stage('serialize'):
+            return jsonify({
+                'status': 'success',
+                'model_version': version,
+                'mode': served,
+                **values.mode_stats(served),
+                'count': len(records),
+                'scored': len(results),
+                'failed': len(errors),
+                'results': results,
+                'errors': errors
+            })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/predict_value_curve', methods=['POST'])
+@_admit('expensive')
+def predict_value_curve():
+    """
+    Depreciation curve / what-if surface for one vehicle:
+        {"vehicle": {...listing...},
+         "ranges": {"Current_Year": {"start": 2025, "stop": 2035, "step": 1},
+                    "odometer_km": [20000, 60000, 100000]}}
+    Axes: Current_Year, odometer_km, battery_health_pct.
+    "mode": "fast" (or ?mode=fast) scores the grid with the distilled surrogate.
+    """
+    values, version = value_model.current()
+    if not values or not values.model:
+        return jsonify({'error': 'Value Model not loaded'}), 500
+
+    try:
+        with stage('parse_json'):
+            data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        try:
+            with stage('preprocess'):
+                record = VALUE_SCHEMA.parse(data.get('vehicle', data))
+                axes = parse_grid_axes(data.get('ranges'))
+                mode = _value_mode(data, values)
+        except SchemaError as e:
+            return jsonify({'error': str(e)}), 400
+
+        observe_batch('predict_value_curve', int(np.prod([len(v) for v in axes.values()])))
+        with stage('predict'):
+            grid = values.score_grid(record, axes, mode)
+
+        with stage('serialize'):
+            return jsonify({'status': 'success', 'model_version': version, **grid})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/predict_sales', methods=['GET'])
+@_admit('expensive')
 def predict_sales():
-    if not sales_model.model:
-        return jsonify({'error': 'Sales Model not loaded'}), 500
-    
+    region = request.args.get('region')
+
+    if region is None:
+        national, version = sales_model.current()
+        if not national or not national.model:
+            return jsonify({'error': 'Sales Model not loaded'}), 500
+    else:
+        regional = regional_sales.get()
+        if not regional or not regional.models:
+            return jsonify({'error': 'Regional Sales Models not loaded'}), 500
+
+    # mode=simulate: Monte Carlo scenario bands (see SalesModel.simulate)
+    mode = request.args.get('mode', 'forecast')
+    if mode not in ('forecast', 'simulate'):
+        return jsonify({'error': "mode must be 'forecast' or 'simulate'"}), 400
+    if mode == 'simulate':
+        try:
+            sim_args = {'n_paths': int(request.args.get('paths', SIM_PATHS))}
+            if request.args.get('target') is not None:
+                sim_args['target'] = float(request.args['target'])
+        except ValueError:
+            return jsonify({'error': 'paths and target must be numbers'}), 400
+        if not 1 <= sim_args['n_paths'] <= MAX_SIM_PATHS:
+            return jsonify({'error': f'paths must be between 1 and {MAX_SIM_PATHS}'}), 400
+
     try:
         steps = int(request.args.get('steps', 12))
-        granularity = request.args.get('granularity', 'monthly')
-        
-        forecast = sales_model.get_forecast(steps, granularity)
-        
+    except ValueError:
+        return jsonify({'error': 'steps must be an integer'}), 400
+    granularity = request.args.get('granularity', 'monthly')
+    # Horizon cap: the precomputed forecast horizon (SALES_MAX_FORECAST_MONTHS)
+    max_steps = MAX_FORECAST_MONTHS // 12 if granularity == 'yearly' else MAX_FORECAST_MONTHS
+    if not 1 <= steps <= max_steps:
+        return jsonify({'error': f'steps must be between 1 and {max_steps} for {granularity} forecasts'}), 400
+
+    try:
+        # National series (original behaviour)
+        if region is None:
+            if mode == 'simulate':
+                return jsonify({'status': 'success', 'model_version': version,
+                                'simulation': national.simulate(steps, granularity, **sim_args)})
+            forecast = national.get_forecast(steps, granularity)
+            return jsonify({
+                'status': 'success',
+                'model_version': version,
+                'forecast': forecast
+            })
+
+        if region.lower() == 'all':
+            if mode == 'simulate':
+                return jsonify({'status': 'success', 'region': 'all', 'model_version': regional.version,
+                                'simulations': regional.simulate_all(steps, granularity, **sim_args)})
+            return jsonify({
+                'status': 'success',
+                'region': 'all',
+                'model_version': regional.version,
+                'forecasts': regional.get_all_forecasts(steps, granularity)
+            })
+
+        if region not in regional.models:
+            return jsonify({'error': f"Unknown region '{region}'. Available: {regional.regions}"}), 400
+
+        if mode == 'simulate':
+            return jsonify({'status': 'success', 'region': region, 'model_version': regional.version,
+                            'simulation': regional.simulate(region, steps, granularity, **sim_args)})
         return jsonify({
             'status': 'success',
-            'forecast': forecast
+            'region': region,
+            'model_version': regional.version,
+            'forecast': regional.get_forecast(region, steps, granularity)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# ==============================
+# Battery telemetry (see battery_telemetry.py)
+# ==============================
+
+telemetry_store = TelemetryStore()
+
+
+@app.route('/telemetry', methods=['POST'])
+@_admit('expensive')
+def ingest_telemetry():
+    try:
+        with stage('parse_json'):
+            data = request.json
+        events = data.get('events') if isinstance(data, dict) else data
+        if not isinstance(events, list):
+            return jsonify({'error': "Expected a JSON list or {'events': [...]}"}), 400
+        if len(events) > MAX_BATCH_RECORDS:
+            return jsonify({'error': f'Batch too large: {len(events)} events (max {MAX_BATCH_RECORDS})'}), 413
+
+        observe_batch('telemetry', len(events))
+        health, version = health_model.current()
+        with stage('telemetry_ingest'):
+            summary = telemetry_store.ingest(events, health, version)
+        with stage('serialize'):
+            return jsonify({'status': 'success', 'model_version': version, 'count': len(events), **summary})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/telemetry/<battery_id>', methods=['GET'])
+@_admit('cheap')
+def battery_state(battery_id):
+    try:
+        state = telemetry_store.battery(battery_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if state is None:
+        return jsonify({'error': f"Unknown battery '{battery_id}'"}), 404
+    # prediction is the label stored at scoring time (scored_model_version);
+    # the battery is re-scored on its next event once the health model changes
+    return jsonify({'status': 'success', **state})
+
+
+# ==============================
+# Dashboard rollups (see dashboard_rollups.py)
+# ==============================
+
+def _conditional_json(rollups, key, build):
+    """
+    Pre-encoded JSON for a dashboard query: 304 when the client's
+    If-None-Match already names this version, gzip when accepted.
+    """
+    etag = rollups.etag(*key)
+    use_gzip = 'gzip' in request.accept_encodings
+    headers = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    for tag in (etag, f'{etag}-gz'):
+        if request.if_none_match.contains(tag):
+            response = Response(status=304, headers=headers)
+            response.set_etag(tag)
+            return response
+
+    body = dashboard_cache.get(key)
+    if body is None:
+        body = EncodedBody({'status': 'success', 'data_version': rollups.version, **build()}, etag)
+        dashboard_cache.set(key, body)
+    if use_gzip and body.gzip is not None:
+        response = Response(body.gzip, mimetype='application/json', headers=headers)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(f'{body.etag}-gz')
+    else:
+        response = Response(body.raw, mimetype='application/json', headers=headers)
+        response.set_etag(body.etag)
+    return response
+
+
+def _dashboard_data():
+    rollups = dashboard_rollups.get()
+    if not rollups or not rollups.loaded:
+        return None
+    return rollups
+
+
+@app.route('/dashboard/rollups', methods=['GET'])
+@_admit('cheap')
+def dashboard_rollups_endpoint():
+    rollups = _dashboard_data()
+    if rollups is None:
+        return jsonify({'error': 'Dashboard data not loaded'}), 500
+    try:
+        filters = rollups.parse_filters(request.args)
+        top_n = rollups.parse_top(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return _conditional_json(rollups, ('rollups', filters, top_n), lambda: rollups.rollup(filters, top_n))
+
+
+@app.route('/dashboard/rows', methods=['GET'])
+@_admit('cheap')
+def dashboard_rows():
+    rollups = _dashboard_data()
+    if rollups is None:
+        return jsonify({'error': 'Dashboard data not loaded'}), 500
+    try:
+        filters = rollups.parse_filters(request.args)
+        query = rollups.parse_rows_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    key = ('rows', filters, *query.values())
+    return _conditional_json(rollups, key, lambda: rollups.rows(filters, **query))
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
+    # Never triggers a model load: only reports what is already warm
+    health = health_model.peek()
+    values = value_model.peek()
+    national = sales_model.peek()
+    regional = regional_sales.peek()
     return jsonify({
         'status': 'online',
-        'health_model_loaded': model is not None,
-        'value_model_loaded': value_model.model is not None,
-        'condition_model_features': value_model.condition_features,
-        'price_model_features': value_model.price_features,
+        'model_loading': MODEL_LOADING,
+        'model_mmap': MODEL_MMAP,
+        'models': {name: m.status() for name, m in registry.models.items()},
+        'model_versions': registry.versions(),
+        'model_registry': registry.stats(),
+        'health_model_loaded': bool(health and health.model is not None),
+        'inference_engine': INFERENCE_ENGINE,
+        'value_model_loaded': bool(values and values.model is not None),
+        'condition_model_features': values.cond_features if values else [],
+        'price_model_features': values.price_features if values else [],
+        'value_surrogate': values.surrogate_info() if values else None,
+        'request_coalescing': {'health': health_batcher.stats(), 'value': value_batcher.stats()},
+        'result_cache': {'health': health_cache.stats(), 'value': value_cache.stats(),
+                         'dashboard': dashboard_cache.stats()},
+        'sales_model_loaded': bool(national and national.model is not None),
+        'sales_forecast_cache': national.cache_stats() if national else None,
+        'regional_sales_version': regional.version if regional else None,
+        'regional_sales_regions': regional.regions if regional else [],
+        'telemetry': telemetry_store.stats(),
+        'admission': admission.stats(),
     })
 
+# ==============================
+# Metrics (see metrics.py)
+# ==============================
+
+@add_collector
+def _cache_metrics():
+    caches = [('health', health_cache.stats()), ('value', value_cache.stats()),
+              ('dashboard', dashboard_cache.stats())]
+    national = sales_model.peek()
+    if national is not None:
+        caches.append(('sales_forecast', national.cache_stats()))
+    yield ('cache_hits_total', 'counter', 'Response cache hits.',
+           [({'cache': name}, st['hits']) for name, st in caches])
+    yield ('cache_misses_total', 'counter', 'Response cache misses.',
+           [({'cache': name}, st['misses']) for name, st in caches])
+    yield ('cache_hit_ratio', 'gauge', 'Response cache hit ratio since start.',
+           [({'cache': name}, st['hit_rate']) for name, st in caches])
+    yield ('cache_entries', 'gauge', 'Entries currently cached.',
+           [({'cache': name}, st['entries']) for name, st in caches])
+
+
+@add_collector
+def _batcher_metrics():
+    batchers = [(b.name, b.stats()) for b in (health_batcher, value_batcher)]
+    yield ('coalesced_batches_total', 'counter', 'Batched model calls made by the request coalescer.',
+           [({'batcher': name}, st['batches']) for name, st in batchers])
+    yield ('coalesced_items_total', 'counter', 'Requests scored through the request coalescer.',
+           [({'batcher': name}, st['items']) for name, st in batchers])
+
+
+@add_collector
+def _model_metrics():
+    yield ('model_info', 'gauge', 'Active model version (value is 1 while warm).',
+           [({'model': name, 'version': m.version or '', 'state': m.status()['state']}, int(m.warm))
+            for name, m in registry.models.items()])
+    yield ('model_reloads_total', 'counter', 'Hot reloads that went live.',
+           [({'model': name}, m.reloads) for name, m in registry.models.items()])
+
+
+@add_collector
+def _admission_metrics():
+    classes = admission.stats()['classes']
+    yield ('admission_in_flight', 'gauge', 'Admitted requests in flight per route class.',
+           [({'class': name}, c['in_flight']) for name, c in classes.items()])
+    yield ('admission_queued', 'gauge', 'Requests waiting for a slot per route class.',
+           [({'class': name}, c['queued']) for name, c in classes.items()])
+    yield ('admission_rejected_total', 'counter', 'Requests rejected by admission control.',
+           [({'class': name, 'reason': reason}, n) for name, c in classes.items()
+            for reason, n in c['rejected'].items()])
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/debug/profile', methods=['GET'])
+def profile():
+    # Sampling profiler for hot-path captures in production (PROFILING_ENABLED=1)
+    if not PROFILING_ENABLED:
+        return jsonify({'error': 'Profiling is disabled (set PROFILING_ENABLED=1)'}), 404
+    try:
+        seconds = min(float(request.args.get('seconds', 10)), 60.0)
+        interval = max(float(request.args.get('interval_ms', 5)), 1.0) / 1000.0
+        stacks, samples = Profiler(seconds, interval).capture()
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(Profiler.collapsed(stacks), mimetype='text/plain',
+                    headers={'X-Profile-Samples': str(samples)})
+
+
 if __name__ == "__main__":
     import os
     port = int(os.environ.get("PORT", 10000))
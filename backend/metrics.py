@@ -0,0 +1,417 @@
+"""
+Low-overhead request/stage metrics with a Prometheus text exposition.
+
+Every request is timed as a whole (main.py before/after_request hooks) and
+the hot paths are split into named stages:
+
+    with stage("predict"):
+        ...
+
+A stage is attributed to the route currently being served on this thread
+(set by the request hooks, or by a MicroBatcher for its collector thread)
+and lands in one histogram per (route, stage). Collectors registered with
+add_collector() contribute point-in-time values (cache hit rates, ...) at
+scrape time. GET /metrics renders everything as Prometheus text.
+
+    METRICS_ENABLED=1        0 turns stage()/observe() into no-ops
+    METRICS_MULTIPROC_DIR    shared directory for multi-worker servers (below)
+    METRICS_FLUSH_SECONDS=5  how often each worker writes its snapshot there
+
+Everything above lives in one process's memory. Under gunicorn with
+several workers a scrape lands on one worker, so a plain /metrics would
+return that worker's partial series. gunicorn.conf.py therefore sets
+METRICS_MULTIPROC_DIR: every worker writes a JSON snapshot of its series
+to <dir>/metrics_<pid>.json every METRICS_FLUSH_SECONDS (and on exit),
+and /metrics renders the merge of all snapshots:
+
+  * request/stage/batch histograms and request counters are summed across
+    workers (no pid label). When a worker exits, its totals are folded into
+    metrics_dead.json (mark_process_dead), so counters never go backwards.
+  * add_collector() samples (cache stats, admission gauges, ...) describe one
+    process and are not summable (hit ratios), so each carries a pid="<pid>"
+    label. A dead worker's samples are dropped.
+
+Other workers' series are up to METRICS_FLUSH_SECONDS stale. Without the
+directory (dev server, single process) /metrics serves memory directly.
+
+The sampling profiler (Profiler) is off unless PROFILING_ENABLED=1; it then
+serves /debug/profile?seconds=N, which samples every thread's Python stack
+and returns collapsed stacks (flamegraph.pl / speedscope input).
+"""
+import os
+import sys
+import json
+import glob
+import time
+import bisect
+import threading
+from collections import Counter
+
+METRICS_ENABLED   = os.environ.get("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes")
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR") or None
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+
+PREFIX = "ev_"
+
+# Seconds; 50 µs .. 10 s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Records per batch
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+
+class Histogram:
+    """Labelled histogram: {labels: [bucket counts..., +Inf], sum}."""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][idx] += 1
+            series[1] += value
+
+    def snapshot(self):
+        """{labels: [bucket counts, sum]} copy (the merge/render input)."""
+        with self._lock:
+            return {labels: [list(counts), total] for labels, (counts, total) in self._series.items()}
+
+    @staticmethod
+    def merge(into, series):
+        for labels, (counts, total) in series.items():
+            current = into.get(labels)
+            if current is None:
+                into[labels] = [list(counts), total]
+            else:
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        series = self.snapshot() if series is None else series
+        items = [(labels, counts, total) for labels, (counts, total) in series.items()]
+        for labels, counts, total in sorted(items):
+            base = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{base + ',' if base else ''}{le}}} {cumulative}")
+            lines.append(f"{self.name}_sum{{{base}}} {total:.9g}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class CounterFamily:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(into, series):
+        for labels, value in series.items():
+            into[labels] = into.get(labels, 0) + value
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        series = self.snapshot() if series is None else series
+        for labels, value in sorted(series.items()):
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values):
+    return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+
+# ==============================
+# Registry
+# ==============================
+
+REQUEST_SECONDS = Histogram(PREFIX + "request_seconds", "End-to-end request latency.", ("route", "method"))
+STAGE_SECONDS   = Histogram(PREFIX + "stage_seconds", "Latency of one stage inside a request.", ("route", "stage"))
+BATCH_SIZE      = Histogram(PREFIX + "batch_size", "Records scored per model call.", ("source",), SIZE_BUCKETS)
+REQUESTS        = CounterFamily(PREFIX + "requests_total", "Requests served.", ("route", "method", "status"))
+ERRORS          = CounterFamily(PREFIX + "request_errors_total", "Requests answered with a 4xx/5xx.", ("route", "status"))
+
+_families = [REQUEST_SECONDS, STAGE_SECONDS, BATCH_SIZE, REQUESTS, ERRORS]
+_collectors = []
+_local = threading.local()
+
+
+def set_route(route):
+    """Attribute stages on this thread to `route` (None → 'background')."""
+    _local.route = route
+
+
+def current_route():
+    return getattr(_local, "route", None) or "background"
+
+
+class stage:
+    """Context manager timing one stage of the current route."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if METRICS_ENABLED:
+            STAGE_SECONDS.observe((current_route(), self.name), time.perf_counter() - self.start)
+        return False
+
+
+def observe_request(route, method, status, seconds):
+    if not METRICS_ENABLED:
+        return
+    REQUEST_SECONDS.observe((route, method), seconds)
+    REQUESTS.inc((route, method, str(status)))
+    if status >= 400:
+        ERRORS.inc((route, str(status)))
+
+
+def observe_batch(source, size):
+    if METRICS_ENABLED:
+        BATCH_SIZE.observe((source,), size)
+
+
+def add_collector(fn):
+    """
+    Register fn() → iterable of (name, type, help, [(labels_dict, value), ...])
+    evaluated on every scrape.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def _collect():
+    """Run every collector → [(name, type, help, [(labels_dict, value), ...]) or (None, error)]."""
+    out = []
+    for fn in _collectors:
+        try:
+            out.extend((name, kind, help_text, list(samples)) for name, kind, help_text, samples in fn())
+        except Exception as e:
+            out.append((None, f"collector {getattr(fn, '__name__', fn)} failed: {e}", None, []))
+    return out
+
+
+def _render_collected(collected):
+    lines = []
+    for name, kind, help_text, samples in collected:
+        if name is None:
+            lines.append(f"# {kind}")
+            continue
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for labels, value in samples:
+            label_str = _labels(labels.keys(), labels.values())
+            lines.append(f"{PREFIX}{name}{{{label_str}}} {value}")
+    return lines
+
+
+def render():
+    """Everything in Prometheus text exposition format (version 0.0.4)."""
+    if METRICS_MULTIPROC_DIR:
+        flush()
+        return _render_shared()
+    lines = []
+    for family in _families:
+        lines.extend(family.render())
+    lines.extend(_render_collected(_collect()))
+    return "\n".join(lines) + "\n"
+
+
+# ==============================
+# Multi-process (shared directory) mode
+# ==============================
+
+_DEAD_FILE = "metrics_dead.json"
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_MULTIPROC_DIR, f"metrics_{pid}.json")
+
+
+def _encode_families(families):
+    # JSON has no tuple keys: {name: [[labels, value], ...]}
+    return {name: [[list(labels), value] for labels, value in series.items()]
+            for name, series in families.items()}
+
+
+def _decode_families(families):
+    return {name: {tuple(labels): value for labels, value in series}
+            for name, series in families.items()}
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # vanished (worker reaped) or half-written by an older version
+        return None
+
+
+def flush():
+    """Write this process's series and collector samples to the shared directory."""
+    if not METRICS_MULTIPROC_DIR:
+        return
+    _write_json(_snapshot_path(os.getpid()), {
+        "pid": os.getpid(),
+        "families": _encode_families({f.name: f.snapshot() for f in _families}),
+        "collected": [[name, kind, help_text, [[labels, value] for labels, value in samples]]
+                      for name, kind, help_text, samples in _collect()],
+    })
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            flush()
+        except OSError as e:
+            print(f"[WARNING] metrics flush failed: {e}")
+
+
+def start_multiprocess():
+    """Start this worker's periodic flush (call once per worker after fork)."""
+    if not METRICS_MULTIPROC_DIR:
+        return
+    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+    flush()
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+def mark_process_dead(pid):
+    """
+    Fold an exited worker's histograms/counters into metrics_dead.json and
+    drop its snapshot (and with it its collector samples). Called from the
+    gunicorn master, which reaps workers one at a time.
+    """
+    if not METRICS_MULTIPROC_DIR:
+        return
+    path = _snapshot_path(pid)
+    snap = _read_json(path)
+    if snap is not None:
+        dead_path = os.path.join(METRICS_MULTIPROC_DIR, _DEAD_FILE)
+        dead = _decode_families((_read_json(dead_path) or {}).get("families", {}))
+        for family in _families:
+            merged = dead.setdefault(family.name, {})
+            family.merge(merged, _decode_families(snap["families"]).get(family.name, {}))
+        _write_json(dead_path, {"families": _encode_families(dead)})
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _render_shared():
+    merged = {family.name: {} for family in _families}
+    collected = {}      # name → [type, help, samples]
+    paths = sorted(glob.glob(os.path.join(METRICS_MULTIPROC_DIR, "metrics_*.json")))
+    for path in paths:
+        snap = _read_json(path)
+        if snap is None:
+            continue
+        families = _decode_families(snap.get("families", {}))
+        for family in _families:
+            family.merge(merged[family.name], families.get(family.name, {}))
+        if "pid" not in snap:
+            continue        # metrics_dead.json: totals only
+        for name, kind, help_text, samples in snap["collected"]:
+            if name is None:
+                collected.setdefault(None, [kind, None, []])
+                continue
+            entry = collected.setdefault(name, [kind, help_text, []])
+            entry[2].extend(({**labels, "pid": snap["pid"]}, value) for labels, value in samples)
+
+    lines = []
+    for family in _families:
+        lines.extend(family.render(merged[family.name]))
+    lines.extend(_render_collected([(name, kind, help_text, samples)
+                                    for name, (kind, help_text, samples) in collected.items()]))
+    lines.append(f"# merged from {len(paths)} snapshot(s) in {METRICS_MULTIPROC_DIR}")
+    return "\n".join(lines) + "\n"
+
+
+# ==============================
+# Sampling profiler
+# ==============================
+
+class Profiler:
+    """
+    Samples the Python stack of every other thread every `interval` seconds
+    for `seconds` and returns collapsed stacks ("a;b;c count" per line).
+    Only one capture runs at a time.
+    """
+    _busy = threading.Lock()
+
+    def __init__(self, seconds=10.0, interval=0.005):
+        self.seconds = seconds
+        self.interval = interval
+
+    def capture(self):
+        if not Profiler._busy.acquire(blocking=False):
+            raise RuntimeError("A profile is already being captured")
+        try:
+            me = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = Counter()
+            samples = 0
+            deadline = time.monotonic() + self.seconds
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    parts = []
+                    while frame is not None:
+                        code = frame.f_code
+                        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                        frame = frame.f_back
+                    parts.append(names.get(ident, str(ident)))
+                    stacks[";".join(reversed(parts))] += 1
+                samples += 1
+                time.sleep(self.interval)
+            return stacks, samples
+        finally:
+            Profiler._busy.release()
+
+    @staticmethod
+    def collapsed(stacks):
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
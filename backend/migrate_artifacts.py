@@ -0,0 +1,43 @@
+"""
+Rewrite model.pkl as a self-contained bundle.
+
+The battery-health classifier used to be pickled on its own, so every
+start-up had to parse backend-data/dataset.json just to rebuild the three
+label classes. This stores them next to the model:
+
+    {'model': RandomForestClassifier, 'label_classes': [...], 'features': [...]}
+
+    python migrate_artifacts.py            # idempotent; skips bundles
+"""
+import os
+import sys
+import joblib
+
+from utils import MODEL_PATH, HEALTH_FEATURES, load_label_classes
+
+
+def migrate_health_model(path=MODEL_PATH):
+    artifact = joblib.load(path)
+    if isinstance(artifact, dict):
+        print(f"{path} is already a bundle (classes: {list(artifact.get('label_classes', []))})")
+        return False
+
+    classes = load_label_classes()
+    if classes is None:
+        raise SystemExit("dataset.json not found; cannot recover label classes")
+
+    bundle = {
+        'model': artifact,
+        'label_classes': [str(c) for c in classes],
+        'features': list(HEALTH_FEATURES),
+    }
+    tmp_path = path + '.tmp'
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, path)
+    print(f"{path} rewritten as bundle (classes: {bundle['label_classes']})")
+    return True
+
+
+if __name__ == '__main__':
+    migrate_health_model()
+    sys.exit(0)
@@ -0,0 +1,84 @@
+"""
+Zero-downtime model hot reload.
+
+The registry watches the artifact files of every registered LazyModel
+(lazy_models.py). A daemon thread polls their size/mtime every
+MODEL_RELOAD_INTERVAL seconds; when they change, the model is reloaded in
+that thread, warmed with a few test predictions, and swapped in as one
+reference assignment. Requests in flight keep the object they already
+hold, so nothing is blocked or dropped, and a broken artifact (load or
+warm-up error) leaves the previous version serving.
+
+Versions are content checksums of the artifact files; the active version
+of each model is reported on /health and in every prediction response.
+
+    MODEL_RELOAD_INTERVAL=30    seconds between polls (0 disables watching)
+
+Each gunicorn worker runs its own poller (started lazily, so it survives
+--preload forks) and swaps independently.
+"""
+import os
+import time
+import threading
+import traceback
+
+MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", 30))
+
+
+class ModelRegistry:
+    def __init__(self, models=(), interval=MODEL_RELOAD_INTERVAL):
+        self.models = {}
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self.checks = 0
+        for m in models:
+            self.register(m)
+
+    def register(self, model):
+        self.models[model.name] = model
+        return model
+
+    def versions(self):
+        return {name: m.version for name, m in self.models.items()}
+
+    def check(self):
+        """Reload every model whose artifacts changed → list of reloaded names."""
+        self.checks += 1
+        reloaded = []
+        for name, m in self.models.items():
+            try:
+                if m.changed() and m.reload():
+                    reloaded.append(name)
+            except Exception:
+                traceback.print_exc()
+        return reloaded
+
+    def ensure_watching(self):
+        # Started lazily (and restarted after fork) like the MicroBatcher
+        # workers, so every gunicorn worker polls for itself.
+        if self.interval <= 0:
+            return
+        pid = os.getpid()
+        if self._watcher is not None and self._watcher_pid == pid and self._watcher.is_alive():
+            return
+        with self._lock:
+            if self._watcher is not None and self._watcher_pid == pid and self._watcher.is_alive():
+                return
+            self._watcher = threading.Thread(target=self._run, name="model-registry", daemon=True)
+            self._watcher_pid = pid
+            self._watcher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def stats(self):
+        return {
+            "reload_interval_s": self.interval,
+            "watching": bool(self._watcher is not None and self._watcher_pid == os.getpid()
+                             and self._watcher.is_alive()),
+            "checks": self.checks,
+        }
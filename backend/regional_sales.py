@@ -0,0 +1,303 @@
+"""
+Per-region EV sales forecasting over EV_TimeSeries_50K_Extended.csv.
+
+The CSV holds ~130 rows per (region, month). They are rolled up into one
+monthly series per region (ev_sales summed). The exogenous drivers in the
+CSV (charging stations, subsidy, fuel price) are not used: their future
+values are unknown, and holding them flat at the last observation let the
+differenced models extrapolate the trend they had absorbed (negative or
+runaway forecasts).
+
+Each region is backtested: every model in CANDIDATES is fit on all but the
+last BACKTEST_MONTHS and scored (MAE) on them. Candidates that do not beat
+the seasonal-naive baseline (same month last year) are rejected; the best
+remaining one, or the baseline itself, is refit on the full series and
+published. The scores are recorded in the manifest. Forecasts are clipped
+at zero (sales_model.py).
+
+Fitting runs one region per process (ProcessPoolExecutor). Every fit
+writes a new versioned artifact directory:
+
+    sales_models/
+        LATEST                  → "20250101T120000"
+        v20250101T120000/
+            manifest.json       (chosen model + backtest per region, fit timings)
+            North.pkl, South.pkl, ...   (SalesModel bundles)
+
+The API loads the LATEST version at startup and serves every region from
+memory; nothing is refitted per request. Publishing a new version swaps
+the LATEST pointer, which the model registry (model_registry.py) picks up
+without a restart. Only the newest KEEP_VERSIONS version directories are
+kept; older ones are removed after each publish.
+
+    REGIONAL_MODELS_DIR         default backend/sales_models
+    REGIONAL_BACKTEST_MONTHS    default 24
+    REGIONAL_KEEP_VERSIONS      default 2 (LATEST and the one it replaced)
+
+    python regional_sales.py fit [--workers N] [--regions North South]
+    python regional_sales.py scaling [--workers N]
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import argparse
+import warnings
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sales_model import SalesModel
+from columnar import read_dataset
+
+warnings.filterwarnings("ignore")
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TIMESERIES_PATH = os.path.join(BACKEND_DIR, '..', 'backend-data', 'EV_TimeSeries_50K_Extended.csv')
+REGIONAL_MODELS_DIR = os.environ.get('REGIONAL_MODELS_DIR', os.path.join(BACKEND_DIR, 'sales_models'))
+
+REGIONAL_BACKTEST_MONTHS = int(os.environ.get('REGIONAL_BACKTEST_MONTHS', 24))
+KEEP_VERSIONS = max(int(os.environ.get('REGIONAL_KEEP_VERSIONS', 2)), 1)
+
+ORDER = (1, 1, 1)
+SEASONAL_ORDER = (1, 1, 1, 12)
+# name → (order, seasonal_order, trend); the first is the baseline every
+# other candidate must beat on the backtest
+BASELINE = 'seasonal_naive'
+CANDIDATES = {
+    BASELINE:         ((0, 0, 0), (0, 1, 0, 12), None),
+    'seasonal_drift': ((0, 0, 0), (0, 1, 0, 12), 'c'),
+    'ar1_sma':        ((1, 0, 0), (0, 1, 1, 12), 'c'),
+    'airline':        ((0, 1, 1), (0, 1, 1, 12), None),
+    'sarima':         (ORDER, SEASONAL_ORDER, None),
+}
+
+
+# ==============================
+# Data
+# ==============================
+
+def load_region_series(csv_path=TIMESERIES_PATH):
+    """Return {region: monthly DataFrame[ev_sales]} with a MS-frequency index."""
+    import pandas as pd
+
+    df = read_dataset(csv_path, ['date', 'region', 'ev_sales'])
+    monthly = df.groupby(['region', 'date']).agg({'ev_sales': 'sum'})
+
+    series = {}
+    for region, frame in monthly.groupby(level='region'):
+        frame = frame.droplevel('region')
+        frame.index = pd.to_datetime(frame.index)
+        series[region] = frame.asfreq('MS').interpolate()
+    return series
+
+
+# ==============================
+# Fitting (runs in worker processes)
+# ==============================
+
+def _sarimax(series, name):
+    import statsmodels.api as sm
+    order, seasonal_order, trend = CANDIDATES[name]
+    return sm.tsa.SARIMAX(series, order=order, seasonal_order=seasonal_order, trend=trend).fit(disp=False)
+
+
+def backtest(series, months=REGIONAL_BACKTEST_MONTHS):
+    """
+    Holdout MAE of every candidate fit on all but the last `months` →
+    (chosen name, {name: MAE or None if the fit failed}). A candidate is only
+    chosen over BASELINE if it beats it.
+    """
+    train, test = series.iloc[:-months], series.values[-months:]
+    scores = {}
+    for name in CANDIDATES:
+        try:
+            forecast = _sarimax(train, name).get_forecast(months).predicted_mean.values
+            mae = float(np.abs(np.maximum(forecast, 0) - test).mean())
+            scores[name] = round(mae, 1) if np.isfinite(mae) else None
+        except Exception:
+            scores[name] = None
+    if scores[BASELINE] is None:
+        return BASELINE, scores
+    better = {n: mae for n, mae in scores.items() if mae is not None and mae < scores[BASELINE]}
+    return (min(better, key=better.get) if better else BASELINE), scores
+
+
+def _fit_region(region, frame, out_dir, version):
+    warnings.filterwarnings("ignore")
+    series = frame['ev_sales']
+
+    start = time.perf_counter()
+    chosen, scores = backtest(series)
+    results = _sarimax(series, chosen)
+    fit_seconds = time.perf_counter() - start
+
+    bundle = {
+        'model': results,
+        'region': region,
+        'version': version,
+        'candidate': chosen,
+        'backtest_mae': scores,
+        'last_date': frame.index[-1].strftime('%Y-%m-%d'),
+    }
+    with open(os.path.join(out_dir, f'{region}.pkl'), 'wb') as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return {'region': region, 'fit_seconds': round(fit_seconds, 3),
+            'observations': int(len(frame)), 'aic': float(results.aic),
+            'candidate': chosen, 'backtest_mae': scores}
+
+
+def fit_all(regions=None, workers=None, models_dir=REGIONAL_MODELS_DIR, csv_path=TIMESERIES_PATH):
+    """Fit every region in parallel and publish a new artifact version. Returns the manifest."""
+    series = load_region_series(csv_path)
+    if regions:
+        unknown = set(regions) - set(series)
+        if unknown:
+            raise ValueError(f"Unknown regions: {sorted(unknown)}")
+        series = {r: series[r] for r in regions}
+
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    if os.path.exists(os.path.join(models_dir, f'v{version}')):
+        version += f"-{time.perf_counter_ns() % 10**6:06d}"
+    tmp_dir = os.path.join(models_dir, f'v{version}.tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_fit_region, region, frame, tmp_dir, version)
+                   for region, frame in series.items()]
+        fits = [f.result() for f in futures]
+    wall_seconds = time.perf_counter() - wall_start
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'candidates': {name: {'order': o, 'seasonal_order': so, 'trend': t}
+                       for name, (o, so, t) in CANDIDATES.items()},
+        'baseline': BASELINE,
+        'backtest_months': REGIONAL_BACKTEST_MONTHS,
+        'workers': workers or os.cpu_count(),
+        'regions': {f['region']: f for f in fits},
+        'fit_wall_seconds': round(wall_seconds, 3),
+        'fit_cpu_seconds': round(sum(f['fit_seconds'] for f in fits), 3),
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Publish: rename the finished directory, then swap the LATEST pointer
+    final_dir = os.path.join(models_dir, f'v{version}')
+    os.replace(tmp_dir, final_dir)
+    latest_tmp = os.path.join(models_dir, 'LATEST.tmp')
+    with open(latest_tmp, 'w') as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(models_dir, 'LATEST'))
+    _prune(models_dir)
+    return manifest
+
+
+def _prune(models_dir, keep=KEEP_VERSIONS):
+    """Remove all but the newest `keep` published version directories (LATEST is the newest)."""
+    versions = sorted(name for name in os.listdir(models_dir)
+                      if name.startswith('v') and not name.endswith('.tmp')
+                      and os.path.isdir(os.path.join(models_dir, name)))
+    for name in versions[:-keep]:
+        shutil.rmtree(os.path.join(models_dir, name), ignore_errors=True)
+
+
+# ==============================
+# Serving
+# ==============================
+
+class RegionalSalesModel:
+    """All per-region SalesModels of the LATEST artifact version, held in memory."""
+
+    def __init__(self, models_dir=REGIONAL_MODELS_DIR):
+        self.models_dir = models_dir
+        self.version = None
+        self.models = {}
+        self.load()
+
+    def load(self):
+        latest = os.path.join(self.models_dir, 'LATEST')
+        if not os.path.exists(latest):
+            print(f"Regional sales models not found at {self.models_dir}")
+            return
+        with open(latest) as f:
+            version = f.read().strip()
+        version_dir = os.path.join(self.models_dir, f'v{version}')
+
+        models = {}
+        for name in sorted(os.listdir(version_dir)):
+            if name.endswith('.pkl'):
+                models[name[:-4]] = SalesModel(os.path.join(version_dir, name))
+        self.models = {r: m for r, m in models.items() if m.model is not None}
+        self.version = version
+        print(f"Regional sales models v{version} loaded: {sorted(self.models)}")
+
+    @property
+    def regions(self):
+        return sorted(self.models)
+
+    def get_forecast(self, region, steps=12, granularity='monthly'):
+        if region not in self.models:
+            raise KeyError(region)
+        return self.models[region].get_forecast(steps, granularity)
+
+    def get_all_forecasts(self, steps=12, granularity='monthly'):
+        return {region: self.models[region].get_forecast(steps, granularity) for region in self.regions}
+
+    def simulate(self, region, steps=12, granularity='monthly', **kwargs):
+        if region not in self.models:
+            raise KeyError(region)
+        return self.models[region].simulate(steps, granularity, **kwargs)
+
+    def simulate_all(self, steps=12, granularity='monthly', **kwargs):
+        return {region: self.models[region].simulate(steps, granularity, **kwargs) for region in self.regions}
+
+
+# ==============================
+# CLI
+# ==============================
+
+def _print_fit(manifest):
+    nan = float('nan')
+    print(f"version v{manifest['version']}  workers={manifest['workers']}")
+    for region, fit in sorted(manifest['regions'].items()):
+        print(f"  {region:8s} fit {fit['fit_seconds']:7.3f}s  n={fit['observations']}  "
+              f"{fit['candidate']:15s} backtest MAE {fit['backtest_mae'][fit['candidate']] or nan:,.0f} "
+              f"(baseline {fit['backtest_mae'][BASELINE] or nan:,.0f})")
+    print(f"  wall {manifest['fit_wall_seconds']:.3f}s  (sum of per-region fits {manifest['fit_cpu_seconds']:.3f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit per-region EV sales models.")
+    parser.add_argument('command', choices=['fit', 'scaling'])
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument('--regions', nargs='*', help="subset of regions to fit")
+    parser.add_argument('--models-dir', default=REGIONAL_MODELS_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'fit':
+        _print_fit(fit_all(args.regions, args.workers, args.models_dir))
+        return 0
+
+    # scaling: fit 1..N regions into a scratch directory and report wall time
+    regions = args.regions or sorted(load_region_series())
+    scratch = os.path.join(args.models_dir, '_scaling')
+    print(f"{'regions':>8s} {'wall_s':>8s} {'sum_fit_s':>10s} {'speedup':>8s}")
+    try:
+        for n in range(1, len(regions) + 1):
+            m = fit_all(regions[:n], args.workers, scratch)
+            speedup = m['fit_cpu_seconds'] / m['fit_wall_seconds'] if m['fit_wall_seconds'] else 0
+            print(f"{n:8d} {m['fit_wall_seconds']:8.3f} {m['fit_cpu_seconds']:10.3f} {speedup:8.2f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
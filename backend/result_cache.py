@@ -0,0 +1,104 @@
+"""
+In-process LRU + TTL cache for prediction responses.
+
+Responses from /predict_value and /predict_health are deterministic
+functions of the normalized input and the loaded model, so they can be
+reused when a buyer refreshes a listing or a dealer re-submits the same
+car. Keys are the canonical digest of the parsed payload; each cache is
+bound to a `version_fn` (the model generation) and clears itself as soon
+as that value changes, i.e. when a model is reloaded.
+
+    RESULT_CACHE_SIZE=4096   max entries per route (0 disables caching)
+    RESULT_CACHE_TTL=300     seconds an entry stays valid
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 4096))
+RESULT_CACHE_TTL  = float(os.environ.get("RESULT_CACHE_TTL", 300))
+
+
+class ResultCache:
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, version_fn=None, name="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.name = name
+
+        self._data = OrderedDict()      # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._version = version_fn() if version_fn else None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def _check_version(self):
+        # caller holds the lock
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            self._data.clear()
+            self._version = version
+            self.invalidations += 1
+
+    def get(self, key):
+        """Cached value or None."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._check_version()
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_version()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.maxsize,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
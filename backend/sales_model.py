@@ -1,40 +1,170 @@
-
 import os
-import pickle
-import pandas as pd
+import copy
+import threading
+from collections import OrderedDict
 import numpy as np
-import statsmodels.api as sm
+from artifacts import load_artifact
+from metrics import stage
+# statsmodels / pandas are pulled in by unpickling the results object,
+# not at import time (keeps cold start fast).
+
+# Longest horizon precomputed at load time (months). Requests within it are
+# answered by slicing the cached forecast instead of re-running the model.
+MAX_FORECAST_MONTHS = int(os.environ.get('SALES_MAX_FORECAST_MONTHS', 120))
+# Max number of formatted (steps, granularity) responses kept in memory
+FORECAST_CACHE_SIZE = int(os.environ.get('SALES_FORECAST_CACHE_SIZE', 64))
+# Monte Carlo scenarios (simulate): default / max number of paths, and the
+# seed, fixed so every worker serving a model version returns the same bands
+SIM_PATHS = int(os.environ.get('SALES_SIM_PATHS', 5000))
+MAX_SIM_PATHS = int(os.environ.get('SALES_MAX_SIM_PATHS', 20000))
+SIM_SEED = int(os.environ.get('SALES_SIM_SEED', 0))
+SIM_PERCENTILES = (10, 50, 90)
+
+
+def _psd_sqrt(M):
+    """L with L @ L.T == M for a (possibly singular) covariance matrix."""
+    w, V = np.linalg.eigh((M + M.T) / 2)
+    return V * np.sqrt(np.clip(w, 0, None))
+
 
 class SalesModel:
-    def __init__(self, model_path):
+    def __init__(self, model_path, max_horizon=MAX_FORECAST_MONTHS, cache_size=FORECAST_CACHE_SIZE):
         self.model_path = model_path
         self.model = None
+        # Regional artifacts are dict bundles (model + metadata, see
+        # regional_sales.py); a bundle with 'last_exog' has exogenous
+        # regressors, held flat at those values over the horizon.
+        self.metadata = {}
+        self.future_exog = None
+        self.max_horizon = max_horizon
+        self.cache_size = cache_size
+
+        # Forecast cache
+        self._lock = threading.Lock()
+        self._horizon_mean = None      # pd.Series, max_horizon months
+        self._horizon_ci = None        # pd.DataFrame, max_horizon months
+        self._responses = OrderedDict()  # (steps, granularity) -> result dict (LRU)
+        self._generation = 0             # bumped on invalidation; stale results are not stored
+        self._sim_paths = None           # (dates, SIM_PATHS × months) simulated over max_horizon
+        self.cache_hits = 0
+        self.cache_misses = 0
+
         self.load_model()
 
     def load_model(self):
         if os.path.exists(self.model_path):
             try:
-                with open(self.model_path, 'rb') as f:
-                    self.model = pickle.load(f)
+                bundle = load_artifact(self.model_path)
+                if isinstance(bundle, dict):
+                    self.model = bundle.get('model')
+                    self.metadata = {k: v for k, v in bundle.items() if k != 'model'}
+                    last_exog = bundle.get('last_exog')
+                    self.future_exog = np.asarray(last_exog, dtype=float) if last_exog is not None else None
+                else:
+                    self.model = bundle
                 print(f"Sales Model loaded successfully from {self.model_path}")
             except Exception as e:
                 print(f"Error loading Sales Model: {e}")
         else:
             print(f"Sales Model file not found at {self.model_path}")
+        self.invalidate_cache()
+
+    # ------------------------------------------------------------------ #
+    #  Forecast cache                                                     #
+    # ------------------------------------------------------------------ #
+    def set_model(self, model):
+        """Swap in a new (re)fitted results object and rebuild the cache."""
+        self.model = model
+        self.invalidate_cache()
+
+    def append(self, endog, exog=None, refit=False):
+        """
+        Extend the loaded results with new observations that continue the
+        series (statsmodels' append: same parameters unless refit=True) and
+        rebuild the forecast cache. Returns the new results object.
+        """
+        if self.model is None:
+            raise ValueError("Sales Model is not loaded.")
+        if self.future_exog is not None and exog is None:
+            raise ValueError("This model has exogenous regressors; exog is required.")
+        kwargs = {'fit_kwargs': {'disp': False}} if refit else {}
+        results = self.model.append(endog, exog=exog, refit=refit, **kwargs)
+        if exog is not None:
+            self.future_exog = np.asarray(exog, dtype=float)[-1]
+        self.set_model(results)
+        return results
+
+    def invalidate_cache(self):
+        """Drop every cached forecast and precompute the longest horizon again."""
+        with self._lock:
+            self._generation += 1
+            self._responses.clear()
+            self._horizon_mean = None
+            self._horizon_ci = None
+            self._sim_paths = None
+        if self.model is None or self.max_horizon <= 0:
+            return
+        try:
+            forecast_result = self._model_forecast(self.max_horizon)
+            with self._lock:
+                self._horizon_mean = forecast_result.predicted_mean.clip(lower=0)
+                self._horizon_ci = forecast_result.conf_int().clip(lower=0)
+            print(f"Sales forecast precomputed for {self.max_horizon} months")
+        except Exception as e:
+            print(f"Error precomputing sales forecast: {e}")
+
+    def cache_stats(self):
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_rate': round(self.cache_hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._responses),
+                'max_entries': self.cache_size,
+                'horizon_months': len(self._horizon_mean) if self._horizon_mean is not None else 0,
+            }
+
+    def _model_forecast(self, steps):
+        if self.future_exog is None:
+            return self.model.get_forecast(steps=steps)
+        exog = np.repeat(self.future_exog[None, :], steps, axis=0)
+        return self.model.get_forecast(steps=steps, exog=exog)
+
+    def _forecast_months(self, model_steps):
+        """(predicted_mean, conf_int) for model_steps months, from cache when possible; clipped at 0."""
+        with self._lock:
+            horizon_mean, horizon_ci = self._horizon_mean, self._horizon_ci
+        if horizon_mean is not None and 0 < model_steps <= len(horizon_mean):
+            return horizon_mean.iloc[:model_steps], horizon_ci.iloc[:model_steps]
+
+        forecast_result = self._model_forecast(model_steps)
+        return forecast_result.predicted_mean.clip(lower=0), forecast_result.conf_int().clip(lower=0)
 
     def get_forecast(self, steps=12, granularity='monthly'):
         if self.model is None:
             raise ValueError("Sales Model is not loaded.")
-        
+
+        key = (steps, granularity)
+        with self._lock:
+            generation = self._generation
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if cached is not None:
+            return {k: list(v) for k, v in cached.items()}
+
         try:
             # Adjust steps if yearly (assuming steps means 'number of years' in that case)
             model_steps = steps * 12 if granularity == 'yearly' else steps
 
-            # Get forecast
-            forecast_result = self.model.get_forecast(steps=model_steps)
-            predicted_mean = forecast_result.predicted_mean
-            conf_int = forecast_result.conf_int()
-            
+            # Get forecast (sliced from the precomputed horizon when it covers the request)
+            with stage("forecast"):
+                predicted_mean, conf_int = self._forecast_months(model_steps)
+
             # Aggregate if yearly
             if granularity == 'yearly':
                 # Resample to Annual Sum
@@ -45,7 +175,7 @@ class SalesModel:
                 except ValueError:
                     predicted_mean = predicted_mean.resample('A').sum()
                     conf_int = conf_int.resample('A').sum()
-                
+
                 # Format dates as Year only
                 dates = predicted_mean.index.strftime('%Y').tolist()
             else:
@@ -55,8 +185,8 @@ class SalesModel:
             values = predicted_mean.values.tolist()
             lower_ci = conf_int.iloc[:, 0].values.tolist()
             upper_ci = conf_int.iloc[:, 1].values.tolist()
-            
-            return {
+
+            result = {
                 'dates': dates,
                 'values': values,
                 'lower_ci': lower_ci,
@@ -64,3 +194,124 @@ class SalesModel:
             }
         except Exception as e:
             raise ValueError(f"Forecasting error: {str(e)}")
+
+        with self._lock:
+            if generation != self._generation:
+                return result
+            self._responses[key] = result
+            while len(self._responses) > self.cache_size:
+                self._responses.popitem(last=False)
+        return {k: list(v) for k, v in result.items()}
+
+    # ------------------------------------------------------------------ #
+    #  Monte Carlo scenarios                                              #
+    # ------------------------------------------------------------------ #
+    def _simulate_paths(self, months, n_paths):
+        """
+        (dates, paths): n_paths × months simulated monthly sales.
+
+        The model is linear-Gaussian, so a path is the point forecast plus
+        a deviation driven by the end-of-sample state uncertainty and the
+        future shocks. Deviations are propagated through the state-space
+        matrices for all paths at once (one matrix product per month);
+        exog effects are already in the point forecast. Sales are clipped at 0.
+        """
+        mean, _ = self._forecast_months(months)
+        res = self.model.filter_results
+        Z = res.design[:, :, -1]
+        T = res.transition[:, :, -1]
+        R = res.selection[:, :, -1]
+        shock_sqrt = R @ _psd_sqrt(res.state_cov[:, :, -1])
+        # Shocks only enter a few states (usually one); skip the zero rows
+        shocked = np.flatnonzero(np.abs(shock_sqrt).sum(axis=1))
+        shock_sqrt = shock_sqrt[shocked]
+        obs_sd = float(np.sqrt(max(res.obs_cov[0, 0, -1], 0.0)))
+
+        # States are columns (k_states × n_paths) so each month is one contiguous row
+        rng = np.random.default_rng(SIM_SEED)
+        state = _psd_sqrt(self.model.predicted_state_cov[:, :, -1]) @ rng.standard_normal((T.shape[0], n_paths))
+        deviations = np.empty((months, n_paths))
+        for t in range(months):
+            np.dot(Z[0], state, out=deviations[t])
+            if obs_sd:
+                deviations[t] += obs_sd * rng.standard_normal(n_paths)
+            state = T @ state
+            state[shocked] += shock_sqrt @ rng.standard_normal((shock_sqrt.shape[1], n_paths))
+        return mean.index, np.maximum(mean.values[:, None] + deviations, 0).T
+
+    def _paths(self, months, n_paths):
+        """Simulated paths for the first `months`; the default path count is cached per model."""
+        if n_paths != SIM_PATHS or months > self.max_horizon:
+            return self._simulate_paths(months, n_paths)
+        with self._lock:
+            generation = self._generation
+            cached = self._sim_paths
+        if cached is None:
+            cached = self._simulate_paths(self.max_horizon, n_paths)
+            with self._lock:
+                if generation == self._generation:
+                    self._sim_paths = cached
+        dates, paths = cached
+        return dates[:months], paths[:, :months]
+
+    def simulate(self, steps=12, granularity='monthly', n_paths=SIM_PATHS, target=None):
+        """
+        Scenario bands from n_paths simulated futures: P10/P50/P90 of sales
+        per period and of cumulative sales, and (with target) the
+        probability that cumulative sales reach it.
+        """
+        if self.model is None:
+            raise ValueError("Sales Model is not loaded.")
+        n_paths = int(n_paths)
+        if not 1 <= n_paths <= MAX_SIM_PATHS:
+            raise ValueError(f"paths must be between 1 and {MAX_SIM_PATHS}")
+
+        key = ('simulate', steps, granularity, n_paths, target)
+        with self._lock:
+            generation = self._generation
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        model_steps = steps * 12 if granularity == 'yearly' else steps
+        with stage("simulate"):
+            dates, paths = self._paths(model_steps, n_paths)
+
+        with stage("aggregate"):
+            if granularity == 'yearly':
+                years = dates.year.values
+                starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+                periods = np.add.reduceat(paths, starts, axis=1)
+                labels = [str(y) for y in years[starts]]
+            else:
+                periods = paths
+                labels = dates.strftime('%Y-%m-%d').tolist()
+            cumulative = np.cumsum(periods, axis=1)
+
+            bands = np.percentile(periods, SIM_PERCENTILES, axis=0)
+            cumulative_bands = np.percentile(cumulative, SIM_PERCENTILES, axis=0)
+            result = {
+                'dates': labels,
+                'paths': n_paths,
+                'mean': periods.mean(axis=0).tolist(),
+                'bands': {f'p{q}': b.tolist() for q, b in zip(SIM_PERCENTILES, bands)},
+                'cumulative_bands': {f'p{q}': b.tolist() for q, b in zip(SIM_PERCENTILES, cumulative_bands)},
+            }
+            if target is not None:
+                reached = cumulative >= target
+                result['target'] = target
+                result['prob_reach_target'] = float(reached[:, -1].mean())
+                result['prob_reach_target_by_period'] = reached.mean(axis=0).tolist()
+
+        with self._lock:
+            if generation != self._generation:
+                return result
+            self._responses[key] = result
+            while len(self._responses) > self.cache_size:
+                self._responses.popitem(last=False)
+        return copy.deepcopy(result)
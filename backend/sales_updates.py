@@ -0,0 +1,179 @@
+"""
+Incremental updates for the national sales model (sarima_monthly_ev_sales.pkl).
+
+New monthly observations are appended to the fitted SARIMA results with
+statsmodels' append (the state-space filter is extended over the new
+months, parameters unchanged) instead of refitting on the full history.
+A full refit, warm-started from the current parameters, runs only when
+
+    - SALES_REFIT_EVERY months (default 12) were appended since the last one, or
+    - a new month's one-step-ahead standardized forecast error exceeds
+      SALES_DRIFT_Z (default 3.0): the data moved away from the model.
+
+The input is any CSV with date + ev_sales columns; rows are summed per month
+(so EV_TimeSeries_50K_Extended.csv itself works) and only months after the
+model's last observation are used, so re-running on a growing file is safe.
+The updated bundle is written next to the old one and renamed over it; the
+model registry (model_registry.py) then reloads it in every worker, which
+also rebuilds their forecast caches.
+
+    python sales_updates.py append [--csv PATH] [--refit-every 12] [--drift-z 3]
+    python sales_updates.py refit
+
+Benchmark (append vs full refit): python backend/benchmarks/sales_update.py
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+
+from sales_model import SalesModel
+from columnar import read_dataset
+
+warnings.filterwarnings("ignore")
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SALES_MODEL_PATH = os.path.join(BACKEND_DIR, 'sarima_monthly_ev_sales.pkl')
+TIMESERIES_PATH = os.path.join(BACKEND_DIR, '..', 'backend-data', 'EV_TimeSeries_50K_Extended.csv')
+
+SALES_REFIT_EVERY = int(os.environ.get('SALES_REFIT_EVERY', 12))
+SALES_DRIFT_Z = float(os.environ.get('SALES_DRIFT_Z', 3.0))
+
+
+# ==============================
+# Data
+# ==============================
+
+def monthly_totals(csv_path=TIMESERIES_PATH):
+    """date, ev_sales rows → monthly ev_sales totals (MS-frequency Series)."""
+    import pandas as pd
+
+    df = read_dataset(csv_path, ['date', 'ev_sales'])
+    totals = df.groupby('date')['ev_sales'].sum()
+    totals.index = pd.to_datetime(totals.index)
+    return totals.sort_index().asfreq('MS')
+
+
+def new_observations(results, series):
+    """Months of series after the model's last observation; they must follow on without gaps."""
+    import pandas as pd
+
+    last = results.fittedvalues.index[-1]
+    new = series[series.index > last]
+    if len(new):
+        expected = pd.date_range(last, periods=len(new) + 1, freq='MS')[1:]
+        if not new.index.equals(expected) or new.isna().any():
+            raise ValueError(f"New observations must be consecutive months starting "
+                             f"{expected[0]:%Y-%m}; got {new.index[0]:%Y-%m}..{new.index[-1]:%Y-%m}")
+    return new
+
+
+# ==============================
+# Update / refit
+# ==============================
+
+def drift_scores(results, n_new):
+    """One-step-ahead standardized forecast errors of the last n_new observations."""
+    errors = results.filter_results.standardized_forecasts_error[0]
+    return errors[-n_new:] if n_new else errors[:0]
+
+
+def refit(results):
+    """Full refit on the whole history with the same specification, warm-started."""
+    data = results.model.data
+    model = results.model.clone(data.orig_endog, exog=data.orig_exog)
+    return model.fit(start_params=results.params, disp=False)
+
+
+def save_bundle(path, results, metadata):
+    """Write {'model': results, **metadata} and atomically replace path."""
+    import joblib
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        joblib.dump({**metadata, 'model': results}, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def ingest(model_path=SALES_MODEL_PATH, csv_path=TIMESERIES_PATH,
+           refit_every=SALES_REFIT_EVERY, drift_z=SALES_DRIFT_Z, force_refit=False):
+    """
+    Append the months of csv_path the model has not seen, refit if due,
+    persist. Returns a summary dict.
+    """
+    # No forecast precompute: this process only updates the artifact
+    sales = SalesModel(model_path, max_horizon=0)
+    if sales.model is None:
+        raise RuntimeError(f"Sales model could not be loaded from {model_path}")
+    metadata = dict(sales.metadata)
+    summary = {'model_path': model_path, 'appended': 0, 'refit': None}
+
+    new = new_observations(sales.model, monthly_totals(csv_path)) if csv_path else []
+    if len(new):
+        start = time.perf_counter()
+        results = sales.append(new)
+        summary['append_seconds'] = round(time.perf_counter() - start, 4)
+        summary['appended'] = len(new)
+        summary['months'] = [f"{new.index[0]:%Y-%m}", f"{new.index[-1]:%Y-%m}"]
+
+        z = drift_scores(results, len(new))
+        summary['max_abs_z'] = round(float(np.nanmax(np.abs(z))), 3) if np.isfinite(z).any() else None
+        metadata['appended_since_refit'] = metadata.get('appended_since_refit', 0) + len(new)
+        if summary['max_abs_z'] is not None and summary['max_abs_z'] > drift_z:
+            summary['refit'] = 'drift'
+        elif metadata['appended_since_refit'] >= refit_every:
+            summary['refit'] = 'schedule'
+    if force_refit:
+        summary['refit'] = 'forced'
+
+    if summary['refit'] is None and not summary['appended']:
+        return summary
+
+    if summary['refit']:
+        start = time.perf_counter()
+        sales.set_model(refit(sales.model))
+        summary['refit_seconds'] = round(time.perf_counter() - start, 4)
+        metadata['appended_since_refit'] = 0
+        metadata['refitted_at'] = datetime.now(timezone.utc).isoformat()
+
+    metadata['updated_at'] = datetime.now(timezone.utc).isoformat()
+    metadata['last_date'] = sales.model.fittedvalues.index[-1].strftime('%Y-%m-%d')
+    metadata['observations'] = int(sales.model.nobs)
+    save_bundle(model_path, sales.model, metadata)
+    summary.update(last_date=metadata['last_date'], observations=metadata['observations'],
+                   appended_since_refit=metadata['appended_since_refit'])
+    return summary
+
+
+# ==============================
+# CLI
+# ==============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append new monthly sales to the national SARIMA model.")
+    parser.add_argument('command', choices=['append', 'refit'])
+    parser.add_argument('--csv', default=TIMESERIES_PATH, help="CSV with date and ev_sales columns")
+    parser.add_argument('--model', default=SALES_MODEL_PATH)
+    parser.add_argument('--refit-every', type=int, default=SALES_REFIT_EVERY,
+                        help="months appended before a scheduled full refit")
+    parser.add_argument('--drift-z', type=float, default=SALES_DRIFT_Z,
+                        help="refit when a new month's |standardized forecast error| exceeds this")
+    args = parser.parse_args(argv)
+
+    if args.command == 'append':
+        summary = ingest(args.model, args.csv, args.refit_every, args.drift_z)
+    else:
+        summary = ingest(args.model, None, force_refit=True)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
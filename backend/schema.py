@@ -0,0 +1,210 @@
+"""
+Declarative request schemas, compiled once and shared by every stage.
+
+Each endpoint declares its fields (type, default, allowed range) once. A
+request is parsed exactly once into a typed NumPy structured array; the
+model input, the insight/risk helpers and the formula fallbacks all read
+columns from that array instead of re-reading the JSON with data.get().
+
+    rec = VALUE_SCHEMA.parse(data)               # 1-row structured array
+    recs, idx, errs = VALUE_SCHEMA.parse_many(records)
+
+Conversion and range problems raise SchemaError (a ValueError) from
+parse(), or are reported per record by parse_many(); the routes return
+them to the client as 400s.
+"""
+import numpy as np
+
+REQUIRED = object()
+# int fields are stored as int64; larger values are rejected per record
+_INT64 = np.iinfo(np.int64)
+
+
+def _preview(val, limit=40):
+    """repr() of a client value, shortened for error messages."""
+    text = repr(val)
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+class SchemaError(ValueError):
+    """Invalid request payload; str(e) is safe to return to the client."""
+
+
+class Field:
+    def __init__(self, name, kind=float, default=REQUIRED, min=None, max=None):
+        self.name = name
+        self.kind = kind              # float | int | str
+        self.default = default
+        self.min = min
+        self.max = max
+
+    @property
+    def dtype(self):
+        return {float: np.float64, int: np.int64, str: object}[self.kind]
+
+
+class Schema:
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = list(fields)
+        self.names = [f.name for f in self.fields]
+        self.dtype = np.dtype([(f.name, f.dtype) for f in self.fields])
+        self.numeric = [f.name for f in self.fields if f.kind is not str]
+        # (name, converter, default) triples walked per record
+        self._plan = [(f.name, f.kind, f.default) for f in self.fields]
+        self._bounds = [(f.name, f.min, f.max) for f in self.fields
+                        if f.min is not None or f.max is not None]
+        self._limits = {f.name: (f.min, f.max) for f in self.fields}
+
+    # ------------------------------------------------------------------ #
+    def _convert(self, data):
+        row = []
+        for name, kind, default in self._plan:
+            val = data.get(name)
+            if val is None or val == "":
+                if default is REQUIRED:
+                    raise SchemaError(f"Missing feature: {name}")
+                row.append(default)
+                continue
+            try:
+                val = kind(val)
+            except (TypeError, ValueError, OverflowError):
+                raise SchemaError(f"Invalid value for {name}: {_preview(val)}")
+            if kind is int and not _INT64.min <= val <= _INT64.max:
+                lo, hi = self._limits[name]
+                raise SchemaError(f"{name} out of range [{lo}, {hi}]: {_preview(val)}")
+            row.append(val)
+        return tuple(row)
+
+    def parse_many(self, records):
+        """
+        Parse a list of payloads → (structured array, valid_indices, errors).
+        errors is a list of {'index': i, 'error': msg}; bad records never
+        fail the rest of the batch.
+        """
+        rows, valid, errors = [], [], []
+        for i, data in enumerate(records):
+            if not isinstance(data, dict):
+                errors.append({"index": i, "error": "Record must be a JSON object"})
+                continue
+            try:
+                rows.append(self._convert(data))
+            except SchemaError as e:
+                errors.append({"index": i, "error": str(e)})
+                continue
+            valid.append(i)
+
+        arr = np.array(rows, dtype=self.dtype)
+        if not len(arr):
+            return arr, valid, errors
+
+        # Finite + range checks, one vectorized pass per column
+        bad = np.zeros(len(arr), dtype=bool)
+        messages = {}
+        for name in self.numeric:
+            col = arr[name]
+            if col.dtype.kind == "f":
+                mask = ~np.isfinite(col) & ~bad
+                for pos in np.flatnonzero(mask):
+                    messages[pos] = f"Non-finite value for {name}"
+                bad |= mask
+        for name, lo, hi in self._bounds:
+            col = arr[name]
+            mask = np.zeros(len(arr), dtype=bool)
+            if lo is not None:
+                mask |= col < lo
+            if hi is not None:
+                mask |= col > hi
+            mask &= ~bad
+            for pos in np.flatnonzero(mask):
+                messages[pos] = f"{name} out of range [{lo}, {hi}]: {col[pos]}"
+            bad |= mask
+
+        if bad.any():
+            for pos, msg in messages.items():
+                errors.append({"index": valid[pos], "error": msg})
+            errors.sort(key=lambda e: e["index"])
+            valid = [idx for idx, b in zip(valid, bad) if not b]
+            arr = arr[~bad]
+        return arr, valid, errors
+
+    def parse(self, data):
+        """Parse one payload → 1-row structured array, or raise SchemaError."""
+        if not isinstance(data, dict):
+            raise SchemaError("Request body must be a JSON object")
+        arr, _, errors = self.parse_many([data])
+        if errors:
+            raise SchemaError(errors[0]["error"])
+        return arr
+
+    def key(self, arr):
+        """Canonical cache key of one parsed row ("81" and 81.0 give the same key)."""
+        text = "\x1f".join(str(arr[f.name][0]) for f in self.fields if f.kind is str)
+        return self.matrix(arr).tobytes() + text.encode()
+
+    def matrix(self, arr, names=None):
+        """Numeric columns of a parsed array as one (n, k) float64 matrix."""
+        names = names or self.numeric
+        out = np.empty((len(arr), len(names)), dtype=np.float64)
+        for j, name in enumerate(names):
+            out[:, j] = arr[name]
+        return out
+
+
+# ==============================
+# /predict_health
+# ==============================
+
+HEALTH_SCHEMA = Schema("health", [
+    Field("vehicle_age_years",               float, min=0,   max=50),
+    Field("total_charge_cycles",             float, min=0,   max=100_000),
+    Field("avg_depth_of_discharge_percent",  float, min=0,   max=100),
+    Field("avg_charging_time_hours",         float, min=0,   max=48),
+    Field("fast_charging_frequency_percent", float, min=0,   max=100),
+    Field("avg_battery_temperature_c",       float, min=-50, max=100),
+    Field("max_battery_temperature_c",       float, min=-50, max=150),
+    Field("avg_voltage",                     float, min=0,   max=1_500),
+    Field("internal_resistance_mohm",        float, min=0,   max=10_000),
+    Field("capacity_retention_percent",      float, min=0,   max=120),
+])
+
+
+# ==============================
+# /telemetry (one charge session per event)
+# ==============================
+
+TELEMETRY_SCHEMA = Schema("telemetry", [
+    Field("battery_id",                  str),
+    Field("timestamp",                   float, default=0.0, min=0),
+    Field("depth_of_discharge_percent",  float, min=0,   max=100),
+    Field("charging_time_hours",         float, min=0,   max=48),
+    Field("fast_charge",                 float, default=0.0, min=0, max=1),
+    Field("avg_temperature_c",           float, min=-50, max=100),
+    Field("max_temperature_c",           float, min=-50, max=150),
+    Field("voltage",                     float, min=0,   max=1_500),
+    Field("internal_resistance_mohm",    float, min=0,   max=10_000),
+    Field("capacity_retention_percent",  float, min=0,   max=120),
+    Field("vehicle_age_years",           float, min=0,   max=50),
+])
+
+
+# ==============================
+# /predict_value
+# ==============================
+
+VALUE_SCHEMA = Schema("value", [
+    Field("brand",                    str,   default=""),
+    Field("vehicle_type",             str,   default="Car"),
+    Field("battery_health_pct",       float, default=0.0,  min=0,    max=150),
+    Field("range_km",                 float, default=0.0,  min=0,    max=5_000),
+    Field("top_speed_kmph",           float, default=0.0,  min=0,    max=500),
+    Field("odometer_km",              float, default=0.0,  min=0,    max=5_000_000),
+    Field("warranty_remaining_years", float, default=0.0,  min=0,    max=50),
+    Field("annual_maintenance_cost",  float, default=0.0,  min=0,    max=1e8),
+    Field("Purchase_Year",            int,   default=2020, min=1990, max=2100),
+    Field("Current_Year",             int,   default=2025, min=1990, max=2100),
+    Field("Purchase_Price_L",         float, default=0.0,  min=0,    max=1e10),
+    Field("Initial_Mileage",          float, default=0.0,  min=0,    max=10_000),
+    Field("Current_Mileage",          float, default=0.0,  min=0,    max=10_000),
+    Field("Resale_Value_L",           float, default=0.0,  min=0,    max=1e10),
+])
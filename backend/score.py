@@ -0,0 +1,222 @@
+"""
+Offline scoring of large CSV / JSONL files (nightly inventory re-score).
+
+Streams the input in fixed-size chunks through the same code as the batch
+endpoints (scoring.py → ValueModel / battery-health model), spreads the
+chunks over a process pool and writes results as they complete, in input
+order. Memory stays bounded by workers × chunk size, whatever the file
+size.
+
+    python score.py value resale_value.csv -o scored.jsonl
+    python score.py health batteries.jsonl -o health.csv --workers 4 --chunk-size 5000
+
+Each output row is exactly the API's batch result for that input row
+('index' is the 0-based row number in the file); rows that fail validation
+are written as {'index', 'error'}. CSV cells are read as strings, so empty
+cells fall back to the schema defaults the same way "" does in a JSON
+request. A summary with rows/sec goes to stderr.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CONDITION_MODEL_PATH = os.path.join(BACKEND_DIR, 'condition_model.pkl')
+PRICE_MODEL_PATH = os.path.join(BACKEND_DIR, 'price_model.pkl')
+
+OUTPUT_FIELDS = {
+    'value': ['index', 'condition_score', 'predicted_resale', 'user_price', 'price_diff_pct',
+              'recommendation', 'insights', 'fair_price_range', 'value_score', 'error'],
+    'health': ['index', 'prediction', 'prediction_index', 'recommendation', 'insight',
+               'risk_level', 'error'],
+}
+
+_scorer = None
+
+
+# ==============================
+# Models (one copy per worker)
+# ==============================
+
+def _sources(kind):
+    from utils import MODEL_PATH
+    return [CONDITION_MODEL_PATH, PRICE_MODEL_PATH] if kind == 'value' else [MODEL_PATH]
+
+
+def _load_scorer(kind, pooled):
+    from scoring import load_health_model, score_health, score_value
+    if kind == 'value':
+        from value_model import ValueModel
+        model, score = ValueModel(CONDITION_MODEL_PATH, PRICE_MODEL_PATH), score_value
+    else:
+        model, score = load_health_model(), score_health
+        if model.model is None:
+            raise RuntimeError("Health model could not be loaded")
+        if pooled and hasattr(model.model, 'n_jobs'):
+            # Parallelism comes from the process pool; n_jobs=-1 in every
+            # worker would oversubscribe the cores
+            model.model.n_jobs = 1
+    return lambda records: score(model, records)
+
+
+def _init_worker(kind, pooled=False):
+    global _scorer
+    # Model load messages would interleave with the output on stdout
+    sys.stdout = sys.stderr
+    _scorer = _load_scorer(kind, pooled)
+
+
+def _ready():
+    # Held briefly so each worker picks up one of these start-up probes
+    time.sleep(0.1)
+    return os.getpid()
+
+
+def _score_chunk(offset, records):
+    results, errors = _scorer(records)
+    rows = results + errors
+    for row in rows:
+        row['index'] += offset
+    rows.sort(key=lambda r: r['index'])
+    return rows
+
+
+# ==============================
+# Input / output
+# ==============================
+
+def read_chunks(path, chunk_size, fmt):
+    """Yield (offset, [record, ...]) without holding more than one chunk."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            records = csv.DictReader(f)
+        else:
+            records = (_json_line(line) for line in f if line.strip())
+        offset = 0
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                return
+            yield offset, chunk
+            offset += len(chunk)
+
+
+def _json_line(line):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None        # reported as "Record must be a JSON object"
+
+
+class Writer:
+    def __init__(self, stream, fmt, kind):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS[kind], extrasaction='ignore')
+            self.csv.writeheader()
+
+    def write(self, rows):
+        if self.fmt == 'csv':
+            for row in rows:
+                if isinstance(row.get('insights'), list):
+                    row = dict(row, insights=' | '.join(row['insights']))
+                self.csv.writerow(row)
+        else:
+            self.stream.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+
+def _detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+# ==============================
+# Driver
+# ==============================
+
+def run(kind, input_path, output, in_fmt, out_fmt, chunk_size, workers, progress_every=5.0):
+    from lazy_models import checksum
+
+    stats = {'rows': 0, 'scored': 0, 'failed': 0}
+    writer = Writer(output, out_fmt, kind)
+    chunks = read_chunks(input_path, chunk_size, in_fmt)
+    start = last_report = None
+
+    def emit(rows):
+        nonlocal last_report
+        writer.write(rows)
+        stats['rows'] += len(rows)
+        stats['failed'] += sum('error' in r for r in rows)
+        now = time.perf_counter()
+        if now - last_report >= progress_every:
+            last_report = now
+            print(f"  {stats['rows']:,} rows  {stats['rows'] / (now - start):,.0f} rows/s", file=sys.stderr)
+
+    boot = time.perf_counter()
+    if workers <= 1:
+        _init_worker(kind)
+        start = last_report = time.perf_counter()
+        for offset, records in chunks:
+            emit(_score_chunk(offset, records))
+    else:
+        # At most 2 chunks per worker in flight; results are written in input order
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(kind, True)) as pool:
+            # Start every worker (and load its models) before the clock starts
+            for f in [pool.submit(_ready) for _ in range(workers)]:
+                f.result()
+            start = last_report = time.perf_counter()
+            pending = deque()
+            for offset, records in chunks:
+                pending.append(pool.submit(_score_chunk, offset, records))
+                if len(pending) >= workers * 2:
+                    emit(pending.popleft().result())
+            while pending:
+                emit(pending.popleft().result())
+
+    elapsed = time.perf_counter() - start
+    stats['scored'] = stats['rows'] - stats['failed']
+    stats['startup_seconds'] = round(start - boot, 3)
+    stats['seconds'] = round(elapsed, 3)
+    stats['rows_per_sec'] = round(stats['rows'] / elapsed, 1) if elapsed else 0.0
+    stats['model_version'] = checksum(_sources(kind))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=['value', 'health'], help="which model to score with")
+    parser.add_argument('input', help="CSV or JSONL file")
+    parser.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'], help="default: from the file extension")
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help="default: from the file extension")
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="scoring processes (1 = score in this process)")
+    args = parser.parse_args(argv)
+
+    in_fmt = _detect_format(args.input, args.input_format)
+    out_fmt = args.output_format or ('jsonl' if args.output == '-' else _detect_format(args.output, None))
+
+    if args.output == '-':
+        stats = run(args.kind, args.input, sys.stdout, in_fmt, out_fmt, args.chunk_size, args.workers)
+    else:
+        # Written next to the target and renamed, so readers never see a partial file
+        tmp = f"{args.output}.tmp"
+        with open(tmp, 'w', newline='', encoding='utf-8') as out:
+            stats = run(args.kind, args.input, out, in_fmt, out_fmt, args.chunk_size, args.workers)
+        os.replace(tmp, args.output)
+
+    print(json.dumps(stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
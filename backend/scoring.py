@@ -0,0 +1,108 @@
+"""
+Record-level scoring shared by the batch endpoints and the offline CLI.
+
+    health = load_health_model()
+    results, errors = score_health(health, records)
+    results, errors = score_value(ValueModel(...), records)
+
+Each result is exactly one item of the /predict_health_batch or
+/predict_value_batch 'results' list; score.py streams files through the
+same functions so offline output matches the API row for row.
+"""
+from types import SimpleNamespace
+import numpy as np
+
+from utils import (MODEL_PATH, load_model_and_encoder, preprocess_batch, get_recommendation,
+                   generate_insight, calculate_risk_levels,
+                   COL_VEHICLE_AGE, COL_CHARGE_CYCLES, COL_FAST_CHARGING, COL_MAX_TEMP,
+                   COL_RESISTANCE, COL_CAP_RETENTION)
+from tree_engine import INFERENCE_ENGINE, compile_model
+from artifacts import load_derived
+from metrics import stage
+
+# Used when the label encoder could not be restored
+DEFAULT_LABELS = {0: 'Degraded', 1: 'Healthy', 2: 'Moderate'}
+
+
+def load_health_model():
+    """model.pkl → namespace(model, label_encoder, predictor)."""
+    model, label_encoder = load_model_and_encoder()
+
+    # Optional compiled NumPy engine for the health classifier (INFERENCE_ENGINE=compiled)
+    predictor = model
+    if model is not None and INFERENCE_ENGINE == 'compiled':
+        try:
+            predictor = load_derived(MODEL_PATH, 'engine', lambda: compile_model(model))
+            print("Health model compiled for NumPy inference")
+        except Exception as e:
+            print(f"Health model not compiled, using sklearn: {e}")
+    return SimpleNamespace(model=model, label_encoder=label_encoder, predictor=predictor)
+
+
+def score_health(health, records):
+    """Battery-health payloads → (results, errors) as returned by /predict_health_batch."""
+    input_matrix, valid_indices, errors = preprocess_batch(records)
+    return score_health_matrix(health, input_matrix, valid_indices), errors
+
+
+def score_health_matrix(health, input_matrix, valid_indices):
+    """(n, 10) HEALTH_FEATURES matrix → results; valid_indices[i] becomes row i's 'index'."""
+    results = []
+    if not len(valid_indices):
+        return results
+
+    # One predict + one vectorized decode for the whole batch
+    with stage('predict'):
+        prediction_indices = health.predictor.predict(input_matrix)
+    with stage('decode_label'):
+        if health.label_encoder:
+            prediction_labels = health.label_encoder.inverse_transform(prediction_indices)
+        else:
+            prediction_labels = np.array([DEFAULT_LABELS.get(int(p), "Unknown") for p in prediction_indices])
+
+    with stage('insights'):
+        vehicle_age   = input_matrix[:, COL_VEHICLE_AGE].tolist()
+        charge_cycles = input_matrix[:, COL_CHARGE_CYCLES].astype(int)
+        max_temp      = input_matrix[:, COL_MAX_TEMP]
+        fast_charging = input_matrix[:, COL_FAST_CHARGING].tolist()
+        cap_retention = input_matrix[:, COL_CAP_RETENTION]
+        resistance    = input_matrix[:, COL_RESISTANCE].tolist()
+
+        risk_levels = calculate_risk_levels(cap_retention, charge_cycles, max_temp)
+        recommendations = {label: get_recommendation(label) for label in np.unique(prediction_labels)}
+
+        charge_cycles = charge_cycles.tolist()
+        max_temp      = max_temp.tolist()
+        cap_retention = cap_retention.tolist()
+
+        for pos, idx in enumerate(valid_indices):
+            label = str(prediction_labels[pos])
+            results.append({
+                'index': idx,
+                'prediction': label,
+                'prediction_index': int(prediction_indices[pos]),
+                'recommendation': recommendations[prediction_labels[pos]],
+                'insight': generate_insight(label, vehicle_age[pos], charge_cycles[pos],
+                                            max_temp[pos], fast_charging[pos],
+                                            cap_retention[pos], resistance[pos]),
+                'risk_level': str(risk_levels[pos]),
+            })
+    return results
+
+
+def score_value(values, records, mode='accurate'):
+    """Resale payloads → (results, errors) as returned by /predict_value_batch."""
+    batch = values.analyze_many(records, mode)
+    results = [{
+        'index':            r['index'],
+        'condition_score':  r['condition_score'],
+        'predicted_resale': r['predicted_resale'],
+        'user_price':       r['user_price'],
+        'price_diff_pct':   r['price_diff_pct'],
+        'recommendation':   r['recommendation'],
+        'insights':         r['insights'],
+        'fair_price_range': r['fair_price_range'],
+        'value_score':      r['condition_score'],
+        'mode':             r['mode'],
+    } for r in batch['results']]
+    return results, batch['errors']
@@ -0,0 +1,297 @@
+"""
+Training pipeline for the value bundles (condition_model.pkl, price_model.pkl).
+
+Rebuilds the serving features from resale_value.csv with the same code the
+API uses (VALUE_SCHEMA → value_model.build_features), then for each target
+
+    condition   value_for_money_score × 100
+    price       Resale_Value_L
+
+runs a cross-validated randomized hyperparameter search, fanned out over
+all cores (--jobs). Every candidate stops adding trees once its internal
+validation score stops improving (early stopping), so the search does not
+pay for the full n_estimators on every fit. The best candidate is scored on
+a held-out split and compared with the bundle currently in backend/.
+
+    python train_value_models.py                          # GradientBoosting
+    python train_value_models.py --estimators gb hgb      # + HistGradientBoosting
+    python train_value_models.py --n-iter 4 --cv 3 --sample 5000   # quick run
+
+Output (nothing in production is touched):
+
+    training_runs/<timestamp>/
+        gb/condition_model.pkl, gb/price_model.pkl     ({'model', 'features', 'le_brand', 'le_type'})
+        hgb/...
+        report.json     (search / test metrics, fit timings, predict latency, versions)
+
+Publish a run's bundles (atomic rename; the model registry hot-reloads them):
+
+    python train_value_models.py --install training_runs/<timestamp>/gb
+
+Runs are reproducible: the split, CV folds, search and estimators all
+derive from --seed.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+
+from schema import VALUE_SCHEMA
+from value_model import FEATURES, build_features
+from tree_engine import compile_model
+from lazy_models import checksum
+from columnar import read_dataset
+
+warnings.filterwarnings("ignore")
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAINING_CSV = os.path.join(BACKEND_DIR, 'resale_value.csv')
+RUNS_DIR = os.path.join(BACKEND_DIR, 'training_runs')
+
+# target name → (CSV column, scale, bundle file)
+TARGETS = {
+    'condition': ('value_for_money_score', 100.0, 'condition_model.pkl'),
+    'price':     ('Resale_Value_L',        1.0,   'price_model.pkl'),
+}
+CATEGORICAL = ['brand_enc', 'type_enc']
+
+
+def search_space(name, seed):
+    """estimator name → (base estimator with early stopping, parameter distributions)."""
+    from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+    if name == 'gb':
+        base = GradientBoostingRegressor(n_estimators=1000, n_iter_no_change=10, validation_fraction=0.1,
+                                         random_state=seed)
+        return base, {
+            'learning_rate':    [0.05, 0.08, 0.1, 0.15],
+            'max_depth':        [3, 4, 5, 6],
+            'subsample':        [0.8, 1.0],
+            'min_samples_leaf': [1, 5, 20],
+        }
+    base = HistGradientBoostingRegressor(max_iter=1000, early_stopping=True, n_iter_no_change=10,
+                                         validation_fraction=0.1, categorical_features=CATEGORICAL,
+                                         random_state=seed)
+    return base, {
+        'learning_rate':     [0.05, 0.08, 0.1, 0.15],
+        'max_leaf_nodes':    [15, 31, 63],
+        'max_depth':         [None, 6, 8],
+        'min_samples_leaf':  [10, 20, 50],
+        'l2_regularization': [0.0, 0.1, 1.0],
+    }
+
+
+# ==============================
+# Data
+# ==============================
+
+def load_training_data(csv_path=TRAINING_CSV, sample=None, seed=42):
+    """resale_value.csv → (X DataFrame in FEATURES order, {target: y}, le_brand, le_type)."""
+    import pandas as pd
+    from sklearn.preprocessing import LabelEncoder
+
+    df = read_dataset(csv_path)
+    if sample and sample < len(df):
+        df = df.sample(n=sample, random_state=seed)
+    recs, valid, errors = VALUE_SCHEMA.parse_many(df.to_dict('records'))
+    if errors:
+        print(f"[WARNING] {len(errors)} training rows failed validation and were dropped")
+    df = df.iloc[valid]
+
+    le_brand = LabelEncoder().fit(recs['brand'].astype(str))
+    le_type = LabelEncoder().fit(recs['vehicle_type'].astype(str))
+    X = build_features(recs,
+                       {str(c): i for i, c in enumerate(le_brand.classes_)},
+                       {str(c): i for i, c in enumerate(le_type.classes_)})
+    targets = {name: df[column].to_numpy(dtype=np.float64) * scale
+               for name, (column, scale, _) in TARGETS.items()}
+    return pd.DataFrame(X, columns=FEATURES), targets, le_brand, le_type
+
+
+# ==============================
+# Evaluation
+# ==============================
+
+def test_metrics(model, X, y):
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+    pred = model.predict(X)
+    return {'rmse': round(float(np.sqrt(mean_squared_error(y, pred))), 4),
+            'mae':  round(float(mean_absolute_error(y, pred)), 4),
+            'r2':   round(float(r2_score(y, pred)), 6)}
+
+
+def predict_latency(model, X, rows=200, batch=1000):
+    """Single-row (API request) and batch predict latency, sklearn and compiled engine."""
+    def timed(fn, args):
+        times = []
+        for a in args:
+            start = time.perf_counter()
+            fn(a)
+            times.append(time.perf_counter() - start)
+        return np.array(times) * 1000
+
+    singles = [X.iloc[[i]] for i in range(min(rows, len(X)))]
+    block = X.iloc[:batch]
+    single = timed(model.predict, singles)
+    out = {'single_p50_ms': round(float(np.percentile(single, 50)), 3),
+           'single_p95_ms': round(float(np.percentile(single, 95)), 3),
+           'batch_rows': len(block),
+           'batch_ms': round(float(np.median(timed(model.predict, [block] * 5))), 2)}
+    try:
+        engine = compile_model(model)
+    except Exception as e:
+        out['compiled'] = f"not supported ({type(e).__name__})"
+        return out
+    single = timed(engine.predict, [s.to_numpy() for s in singles])
+    out['compiled'] = {'single_p50_ms': round(float(np.percentile(single, 50)), 3),
+                       'batch_ms': round(float(np.median(timed(engine.predict, [block.to_numpy()] * 5))), 2)}
+    return out
+
+
+def _trees(model):
+    return int(getattr(model, 'n_estimators_', None) or getattr(model, 'n_iter_', 0))
+
+
+# ==============================
+# Training
+# ==============================
+
+def train(estimators, n_iter, cv, jobs, seed, sample, out_dir):
+    from sklearn.base import clone
+    from sklearn.model_selection import KFold, RandomizedSearchCV, train_test_split
+    import joblib
+    import sklearn
+
+    X, targets, le_brand, le_type = load_training_data(sample=sample, seed=seed)
+    train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=seed)
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    print(f"{len(X)} rows ({len(X_train)} train / {len(X_test)} test), "
+          f"{n_iter} candidates × {cv}-fold CV, jobs={jobs}")
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'data': {'path': os.path.relpath(TRAINING_CSV, BACKEND_DIR), 'checksum': checksum([TRAINING_CSV]),
+                 'rows': len(X), 'train_rows': len(X_train), 'test_rows': len(X_test)},
+        'settings': {'estimators': estimators, 'n_iter': n_iter, 'cv': cv, 'jobs': jobs,
+                     'seed': seed, 'sample': sample},
+        'versions': {'python': platform.python_version(), 'sklearn': sklearn.__version__,
+                     'numpy': np.__version__, 'cpu_count': os.cpu_count()},
+        'targets': {},
+    }
+
+    for target, (_, _, bundle_name) in TARGETS.items():
+        y_train, y_test = targets[target][train_idx], targets[target][test_idx]
+        results = report['targets'][target] = {}
+
+        current_path = os.path.join(BACKEND_DIR, bundle_name)
+        if os.path.exists(current_path):
+            current = joblib.load(current_path)['model']
+            results['current'] = {
+                'params': {k: v for k, v in current.get_params().items() if k in ('learning_rate', 'max_depth',
+                                                                                  'n_estimators', 'subsample')},
+                'trees': _trees(current),
+                # The shipped model may have been trained on some of these rows
+                'test': test_metrics(current, X_test, y_test),
+                'latency': predict_latency(current, X_test),
+            }
+
+        for name in estimators:
+            base, space = search_space(name, seed)
+            search = RandomizedSearchCV(base, space, n_iter=n_iter, cv=KFold(cv, shuffle=True, random_state=seed),
+                                        scoring='neg_root_mean_squared_error', n_jobs=jobs,
+                                        random_state=seed, refit=False)
+            start = time.perf_counter()
+            search.fit(X_train, y_train)
+            search_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            model = clone(base).set_params(**search.best_params_).fit(X_train, y_train)
+            refit_s = time.perf_counter() - start
+
+            bundle_dir = os.path.join(out_dir, name)
+            os.makedirs(bundle_dir, exist_ok=True)
+            joblib.dump({'model': model, 'features': list(FEATURES), 'le_brand': le_brand, 'le_type': le_type},
+                        os.path.join(bundle_dir, bundle_name))
+
+            fit_times = search.cv_results_['mean_fit_time']
+            results[name] = {
+                'best_params': search.best_params_,
+                'cv_rmse': round(float(-search.best_score_), 4),
+                'trees': _trees(model),
+                'test': test_metrics(model, X_test, y_test),
+                'timing': {'search_wall_s': round(search_s, 2),
+                           'search_fits': len(fit_times) * cv,
+                           'mean_fit_s': round(float(fit_times.mean()), 3),
+                           'refit_s': round(refit_s, 3)},
+                'latency': predict_latency(model, X_test),
+                'bundle': os.path.join(name, bundle_name),
+            }
+            print(f"  {target:9s} {name:4s} cv_rmse={results[name]['cv_rmse']:<12} "
+                  f"test_r2={results[name]['test']['r2']:<9} trees={results[name]['trees']:<5} "
+                  f"search {search_s:.1f}s")
+
+    with open(os.path.join(out_dir, 'report.json'), 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    return report
+
+
+def print_report(report):
+    print(f"\n{'target':10s} {'model':8s} {'test_rmse':>12s} {'test_r2':>9s} {'trees':>6s} "
+          f"{'fit_s':>7s} {'1row_ms':>8s} {'1row_compiled':>14s} {'batch_ms':>9s}")
+    for target, results in report['targets'].items():
+        for name, r in results.items():
+            lat = r['latency']
+            compiled = lat['compiled']['single_p50_ms'] if isinstance(lat['compiled'], dict) else '-'
+            fit = r['timing']['refit_s'] if 'timing' in r else '-'
+            print(f"{target:10s} {name:8s} {r['test']['rmse']:12.4f} {r['test']['r2']:9.5f} {r['trees']:6d} "
+                  f"{fit!s:>7s} {lat['single_p50_ms']:8.3f} {compiled!s:>14s} {lat['batch_ms']:9.2f}")
+
+
+def install(run_dir, backend_dir=BACKEND_DIR):
+    """Copy a run's bundles over the served ones (write + rename, one file at a time)."""
+    for _, _, bundle_name in TARGETS.values():
+        src = os.path.join(run_dir, bundle_name)
+        if not os.path.exists(src):
+            raise SystemExit(f"{src} not found")
+    for _, _, bundle_name in TARGETS.values():
+        dest = os.path.join(backend_dir, bundle_name)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        shutil.copyfile(os.path.join(run_dir, bundle_name), tmp)
+        os.replace(tmp, dest)
+        print(f"Installed {dest}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estimators', nargs='+', default=['gb'], choices=['gb', 'hgb'],
+                        help="gb = GradientBoosting (current), hgb = HistGradientBoosting")
+    parser.add_argument('--n-iter', type=int, default=12, help="search candidates per estimator and target")
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel fits (-1 = all cores)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sample', type=int, help="train on a random subset of rows (quick runs)")
+    parser.add_argument('--out', help="output directory (default: training_runs/<timestamp>)")
+    parser.add_argument('--install', metavar='RUN_DIR', help="publish the bundles of RUN_DIR/<estimator>")
+    args = parser.parse_args(argv)
+
+    if args.install:
+        install(args.install)
+        return 0
+
+    out_dir = args.out or os.path.join(RUNS_DIR, datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S'))
+    os.makedirs(out_dir, exist_ok=True)
+    report = train(args.estimators, args.n_iter, args.cv, args.jobs, args.seed, args.sample, out_dir)
+    print_report(report)
+    print(f"\nBundles and report.json written to {out_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Compiled NumPy inference engine for the tree-ensemble bundles.
+
+sklearn's predict() spends most of a single-row request on input
+validation and DataFrame handling rather than on the tree walks. At load
+time the fitted trees are flattened into contiguous node arrays
+(feature, threshold, children, leaf value) shared by all trees of the
+ensemble; prediction then walks every tree at once with a fixed number of
+NumPy gathers, straight from a float64 feature matrix.
+
+Supported estimators:
+    GradientBoostingRegressor  → condition_model.pkl, price_model.pkl
+    RandomForestClassifier     → model.pkl (battery health)
+
+Selected with INFERENCE_ENGINE=compiled (default: sklearn).
+Run `python tree_engine.py` to check equivalence against sklearn.
+"""
+import os
+import numpy as np
+
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "sklearn").lower()
+
+TREE_LEAF = -1
+
+
+class CompiledTrees:
+    """All trees of an ensemble flattened into shared node arrays."""
+
+    def __init__(self, trees, leaf_values):
+        n_nodes = sum(t.node_count for t in trees)
+        n_out = leaf_values[0].shape[1]
+
+        self.feature   = np.zeros(n_nodes, dtype=np.intp)
+        self.threshold = np.full(n_nodes, np.inf, dtype=np.float64)
+        self.children  = np.zeros((n_nodes, 2), dtype=np.intp)
+        self.value     = np.zeros((n_nodes, n_out), dtype=np.float64)
+        self.roots     = np.zeros(len(trees), dtype=np.intp)
+        self.max_depth = max(t.max_depth for t in trees)
+
+        offset = 0
+        for i, (tree, values) in enumerate(zip(trees, leaf_values)):
+            n = tree.node_count
+            sl = slice(offset, offset + n)
+            left  = tree.children_left
+            right = tree.children_right
+            is_leaf = left == TREE_LEAF
+
+            # Leaves loop back onto themselves (threshold=inf → always "left"),
+            # so every row can take exactly max_depth steps.
+            self_idx = np.arange(offset, offset + n)
+            self.feature[sl]     = np.where(is_leaf, 0, tree.feature)
+            self.threshold[sl]   = np.where(is_leaf, np.inf, tree.threshold)
+            self.children[sl, 0] = np.where(is_leaf, self_idx, left + offset)
+            self.children[sl, 1] = np.where(is_leaf, self_idx, right + offset)
+            self.value[sl]       = values
+            self.roots[i]        = offset
+            offset += n
+
+    def __setstate__(self, state):
+        # Loaded with joblib mmap_mode (artifacts.py): keep plain ndarray
+        # views over the mapped pages rather than np.memmap instances.
+        self.__dict__.update({k: np.asarray(v) if isinstance(v, np.ndarray) else v
+                              for k, v in state.items()})
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows, n_features) → (n_rows, n_trees) leaf node indices."""
+        # sklearn compares float32-cast inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+        for _ in range(self.max_depth):
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = self.children[node, go_right.view(np.int8)]
+        return node
+
+
+class CompiledGradientBoosting:
+    """Drop-in predict() for a fitted GradientBoostingRegressor."""
+
+    def __init__(self, gbr):
+        if gbr.estimators_.shape[1] != 1:
+            raise TypeError("Only single-output GradientBoostingRegressor is supported")
+        trees = [est.tree_ for est in gbr.estimators_[:, 0]]
+        # Pre-scale leaves exactly like sklearn's predict_stages (scale * value)
+        leaves = [gbr.learning_rate * t.value[:, 0, :] for t in trees]
+        self.trees = CompiledTrees(trees, leaves)
+        self.n_features_in_ = gbr.n_features_in_
+
+        if gbr.init_ == "zero":
+            self.baseline = 0.0
+        else:
+            probe = np.zeros((1, gbr.n_features_in_))
+            self.baseline = float(np.asarray(gbr.init_.predict(probe), dtype=np.float64).ravel()[0])
+
+    def predict(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        leaf_vals = self.trees.value[self.trees.apply(X), 0]
+        # Accumulate stage by stage in order, matching sklearn bit for bit
+        stages = np.empty((X.shape[0], leaf_vals.shape[1] + 1))
+        stages[:, 0] = self.baseline
+        stages[:, 1:] = leaf_vals
+        return np.cumsum(stages, axis=1)[:, -1]
+
+
+class CompiledForestClassifier:
+    """Drop-in predict()/predict_proba() for a fitted RandomForestClassifier."""
+
+    def __init__(self, forest):
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise TypeError("Only single-output RandomForestClassifier is supported")
+        trees = [est.tree_ for est in forest.estimators_]
+        leaves = []
+        for t in trees:
+            proba = t.value[:, 0, :].astype(np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            leaves.append(proba / normalizer)
+        self.trees = CompiledTrees(trees, leaves)
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        leaf_proba = self.trees.value[self.trees.apply(X)]      # (n, trees, classes)
+        return np.cumsum(leaf_proba, axis=1)[:, -1] / leaf_proba.shape[1]
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def compile_model(estimator):
+    """Return a compiled engine for a supported sklearn estimator."""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
+
+    if isinstance(estimator, GradientBoostingRegressor):
+        return CompiledGradientBoosting(estimator)
+    if isinstance(estimator, RandomForestClassifier):
+        return CompiledForestClassifier(estimator)
+    raise TypeError(f"No compiled engine for {type(estimator).__name__}")
+
+
+# ================================================================== #
+#  Equivalence check: python tree_engine.py                           #
+# ================================================================== #
+if __name__ == "__main__":
+    import sys
+    import time
+    import pandas as pd
+    from utils import load_model_and_encoder, HEALTH_FEATURES
+    from value_model import ValueModel
+    from schema import VALUE_SCHEMA
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    vm = ValueModel(os.path.join(backend_dir, "condition_model.pkl"),
+                    os.path.join(backend_dir, "price_model.pkl"))
+    records = pd.read_csv(os.path.join(backend_dir, "resale_value.csv")).to_dict("records")
+    X = vm._feature_matrix(VALUE_SCHEMA.parse_many(records)[0])
+    failed = False
+
+    for label, model, features in [("condition", vm.cond_model, vm.cond_features),
+                                   ("price",     vm.price_model, vm.price_features)]:
+        engine = compile_model(model)
+        expected = model.predict(vm._model_input(X, features))
+        got = engine.predict(X)
+        exact = np.array_equal(expected, got)
+        failed |= not exact
+        print(f"{label:9s} rows={len(X)} exact={exact} max_abs_diff={np.max(np.abs(expected - got)):.3g}")
+
+        row_df, row_np = vm._model_input(X[:1], features), X[:1]
+        t0 = time.perf_counter()
+        for _ in range(200):
+            model.predict(row_df)
+        t1 = time.perf_counter()
+        for _ in range(200):
+            engine.predict(row_np)
+        t2 = time.perf_counter()
+        print(f"          single-row latency sklearn={(t1 - t0) / 0.2:.3f} ms  compiled={(t2 - t1) / 0.2:.3f} ms")
+
+    health_model, _ = load_model_and_encoder()
+    health_df = pd.read_csv(os.path.join(backend_dir, "..", "backend-data", "Battery_Health_Status.csv"))
+    H = health_df[HEALTH_FEATURES].to_numpy(dtype=np.float64)
+    engine = compile_model(health_model)
+    expected_proba = health_model.predict_proba(H)
+    same_labels = np.array_equal(health_model.predict(H), engine.predict(H))
+    failed |= not same_labels
+    print(f"health    rows={len(H)} labels_equal={same_labels} "
+          f"max_proba_diff={np.max(np.abs(expected_proba - engine.predict_proba(H))):.3g}")
+
+    sys.exit(1 if failed else 0)
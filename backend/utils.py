@@ -1,74 +1,120 @@
 import os
-import joblib
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
+from schema import HEALTH_SCHEMA
+from metrics import stage
+
+# pandas / sklearn are imported inside the loaders so that importing
+# this module (and main.py) stays cheap; see lazy_models.py.
 
 # Paths relative to backend directory
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'model.pkl')
 # Dataset path is two levels up and in backend-data
 DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'backend-data', 'dataset.json')
 
+HEALTH_FEATURES = HEALTH_SCHEMA.names
+
+
+def _label_encoder(classes):
+    from sklearn.preprocessing import LabelEncoder
+    le = LabelEncoder()
+    le.classes_ = np.asarray(classes)
+    return le
+
+
 def load_model_and_encoder():
+    """
+    Load model.pkl → (model, label_encoder).
+
+    model.pkl is a self-contained bundle {'model', 'label_classes',
+    'features'} (see migrate_artifacts.py). Legacy bare-model files still
+    work; their label classes are rebuilt from dataset.json.
+    """
+    from artifacts import load_artifact
+
     model = None
     label_encoder = None
-    
+    label_classes = None
+
     # Load Model
     if os.path.exists(MODEL_PATH):
         try:
-            model = joblib.load(MODEL_PATH)
+            bundle = load_artifact(MODEL_PATH)
+            if isinstance(bundle, dict):
+                model = bundle.get('model')
+                label_classes = bundle.get('label_classes')
+            else:
+                model = bundle
             print(f"Model loaded successfully from {MODEL_PATH}")
         except Exception as e:
             print(f"Error loading model: {e}")
     else:
         print(f"Model file not found at {MODEL_PATH}")
 
-    # Re-create Label Encoder from CSV/JSON
-    if os.path.exists(DATA_PATH):
-        try:
-            # Try reading as CSV first since we copied it, but if it fails try JSON
-            # The file extension is .json but content is CSV based on my previous command
-            # But pandas read_csv can read it if format is csv
-            try:
-                df = pd.read_csv(DATA_PATH)
-            except:
-                df = pd.read_json(DATA_PATH)
-                
-            le = LabelEncoder()
-            le.fit(df['battery_health_status'])
-            label_encoder = le
-            print(f"Label Encoder created. Classes: {le.classes_}")
-        except Exception as e:
-            print(f"Error loading data for LabelEncoder: {e}")
+    if label_classes is not None:
+        label_encoder = _label_encoder(label_classes)
+        print(f"Label Encoder restored from bundle. Classes: {label_encoder.classes_}")
+        return model, label_encoder
+
+    # Legacy artifact: re-create Label Encoder from CSV/JSON
+    label_classes = load_label_classes()
+    if label_classes is not None:
+        label_encoder = _label_encoder(label_classes)
+        print(f"Label Encoder created. Classes: {label_encoder.classes_}")
     else:
         print(f"Dataset not found at {DATA_PATH}. Using default mapping.")
-        label_encoder = LabelEncoder()
-        label_encoder.classes_ = np.array(['Degraded', 'Healthy', 'Moderate'])
-        
+        label_encoder = _label_encoder(['Degraded', 'Healthy', 'Moderate'])
+
     return model, label_encoder
 
+
+def load_label_classes():
+    """Sorted battery_health_status classes from dataset.json, or None."""
+    from columnar import open_table
+    # The columnar copy (columnar.py) stores the classes as its categories
+    table = open_table('battery_health')
+    if table is not None and not table.stale:
+        return np.asarray(table.categories('battery_health_status'), dtype=object)
+    if not os.path.exists(DATA_PATH):
+        return None
+    import pandas as pd
+    try:
+        # The file extension is .json but the content is CSV
+        try:
+            df = pd.read_csv(DATA_PATH, usecols=['battery_health_status'])
+        except Exception:
+            df = pd.read_json(DATA_PATH)
+        return np.unique(df['battery_health_status'].astype(str))
+    except Exception as e:
+        print(f"Error loading data for LabelEncoder: {e}")
+        return None
+
+
+# Column positions used by the insight / risk helpers
+COL_VEHICLE_AGE   = HEALTH_FEATURES.index('vehicle_age_years')
+COL_CHARGE_CYCLES = HEALTH_FEATURES.index('total_charge_cycles')
+COL_FAST_CHARGING = HEALTH_FEATURES.index('fast_charging_frequency_percent')
+COL_MAX_TEMP      = HEALTH_FEATURES.index('max_battery_temperature_c')
+COL_RESISTANCE    = HEALTH_FEATURES.index('internal_resistance_mohm')
+COL_CAP_RETENTION = HEALTH_FEATURES.index('capacity_retention_percent')
+
+
 def preprocess_input(data):
-    features = [
-        'vehicle_age_years',
-        'total_charge_cycles',
-        'avg_depth_of_discharge_percent',
-        'avg_charging_time_hours',
-        'fast_charging_frequency_percent',
-        'avg_battery_temperature_c',
-        'max_battery_temperature_c',
-        'avg_voltage',
-        'internal_resistance_mohm',
-        'capacity_retention_percent'
-    ]
-    
-    input_data = []
-    for feature in features:
-        val = data.get(feature)
-        if val is None:
-            raise ValueError(f'Missing feature: {feature}')
-        input_data.append(float(val))
-        
-    return np.array(input_data).reshape(1, -1)
+    """Parse one payload with HEALTH_SCHEMA → (1, 10) float64 array. Raises SchemaError."""
+    with stage("preprocess"):
+        return HEALTH_SCHEMA.matrix(HEALTH_SCHEMA.parse(data))
+
+
+def preprocess_batch(records):
+    """
+    Build one (n_valid, 10) float64 matrix from a list of health payloads.
+
+    Returns (matrix, valid_indices, errors) where errors is a list of
+    {'index': i, 'error': msg} for records that could not be parsed.
+    A bad record never fails the rest of the batch.
+    """
+    with stage("preprocess"):
+        recs, valid_indices, errors = HEALTH_SCHEMA.parse_many(records)
+        return HEALTH_SCHEMA.matrix(recs), valid_indices, errors
 
 
 # ==============================
@@ -133,3 +179,14 @@ def calculate_risk_level(capacity_retention, charge_cycles, max_temp):
 
     else:
         return "HIGH"
+
+
+def calculate_risk_levels(capacity_retention, charge_cycles, max_temp):
+    """Vectorized calculate_risk_level over NumPy columns."""
+    capacity_retention = np.asarray(capacity_retention)
+    charge_cycles      = np.asarray(charge_cycles)
+    max_temp           = np.asarray(max_temp)
+
+    low      = (capacity_retention > 90) & (charge_cycles < 500) & (max_temp < 40)
+    moderate = (capacity_retention >= 75) & (capacity_retention <= 90)
+    return np.select([low, moderate], ["LOW", "MODERATE"], default="HIGH")
@@ -1,13 +1,145 @@
 
 import os
-import pickle
+import random
+import hashlib
 import traceback
 import numpy as np
-import pandas as pd
 import warnings
+from tree_engine import INFERENCE_ENGINE, compile_model
+from artifacts import load_artifact, load_derived
+from metrics import stage
+from schema import VALUE_SCHEMA, SchemaError
 
 warnings.filterwarnings("ignore")
 
+# Canonical feature order produced by _feature_matrix
+FEATURES = [
+    "brand_enc", "type_enc", "battery_health_pct", "range_km", "top_speed_kmph",
+    "odometer_km", "warranty_remaining_years", "annual_maintenance_cost",
+    "Purchase_Year", "Current_Year", "Purchase_Price_L", "Initial_Mileage",
+    "Current_Mileage", "vehicle_age", "usage_per_year", "mileage_drop",
+]
+F = {name: i for i, name in enumerate(FEATURES)}
+
+# What-if grid (/predict_value_curve): columns that can be swept, and caps
+GRID_AXES = ("Current_Year", "odometer_km", "battery_health_pct")
+MAX_GRID_AXIS_POINTS = 500
+MAX_GRID_POINTS = int(os.environ.get("MAX_GRID_POINTS", 5000))
+
+# Per-request inference modes: the GradientBoosting bundles, or the distilled
+# lookup-table surrogate (value_surrogate.py) when one matches the bundles
+VALUE_MODES = ("accurate", "fast")
+
+
+def parse_grid_axes(ranges) -> dict:
+    """
+    {'Current_Year': {'start': 2025, 'stop': 2035, 'step': 1},
+     'odometer_km': [20000, 50000, 100000]}
+      → {name: np.ndarray} in GRID_AXES order; raises SchemaError.
+
+    An axis is a list of values, {'start', 'stop', 'step'} (stop included)
+    or {'start', 'stop', 'num'} (evenly spaced).
+    """
+    if not isinstance(ranges, dict) or not ranges:
+        raise SchemaError(f"ranges must be an object with at least one of {list(GRID_AXES)}")
+    unknown = set(ranges) - set(GRID_AXES)
+    if unknown:
+        raise SchemaError(f"Unsupported range axis: {sorted(unknown)[0]} (supported: {list(GRID_AXES)})")
+
+    fields = {f.name: f for f in VALUE_SCHEMA.fields}
+    axes, points = {}, 1
+    for name in GRID_AXES:
+        if name not in ranges:
+            continue
+        spec, field = ranges[name], fields[name]
+        try:
+            if isinstance(spec, list):
+                values = np.array([float(v) for v in spec], dtype=np.float64)
+            elif isinstance(spec, dict) and "num" in spec:
+                num = int(spec["num"])
+                if not 1 <= num <= MAX_GRID_AXIS_POINTS:
+                    raise SchemaError(f"{name}: num must be between 1 and {MAX_GRID_AXIS_POINTS}")
+                values = np.linspace(float(spec["start"]), float(spec["stop"]), num)
+            elif isinstance(spec, dict):
+                start, stop = float(spec["start"]), float(spec["stop"])
+                step = float(spec.get("step", 1))
+                if step <= 0 or not np.isfinite([start, stop, step]).all():
+                    raise SchemaError(f"{name}: step must be positive")
+                if (stop - start) / step >= MAX_GRID_AXIS_POINTS:
+                    raise SchemaError(f"{name}: more than {MAX_GRID_AXIS_POINTS} points")
+                values = np.arange(start, stop + step / 2, step)
+            else:
+                raise SchemaError(f"{name}: expected a list or {{start, stop, step|num}}")
+        except SchemaError:
+            raise
+        except (TypeError, ValueError, KeyError):
+            raise SchemaError(f"Invalid range for {name}: {spec!r}")
+
+        if not 1 <= len(values) <= MAX_GRID_AXIS_POINTS:
+            raise SchemaError(f"{name}: between 1 and {MAX_GRID_AXIS_POINTS} values required")
+        if not np.isfinite(values).all() or values.min() < field.min or values.max() > field.max:
+            raise SchemaError(f"{name} out of range [{field.min}, {field.max}]")
+        if field.kind is int:
+            values = np.round(values).astype(np.int64)
+        axes[name] = values
+        points *= len(values)
+
+    if points > MAX_GRID_POINTS:
+        raise SchemaError(f"Grid too large: {points} points (max {MAX_GRID_POINTS})")
+    return axes
+
+
+def _encode(column, codes: dict) -> np.ndarray:
+    """Categorical column → codes via dict lookup (unknown → 0)."""
+    uniques, inverse = np.unique(column.astype(str), return_inverse=True)
+    return np.array([codes.get(u, 0) for u in uniques], dtype=np.float64)[inverse]
+
+
+def build_features(recs: np.ndarray, brand_codes: dict, type_codes: dict) -> np.ndarray:
+    """
+    Parsed VALUE_SCHEMA records → float64 matrix in FEATURES order.
+    Shared by serving (ValueModel), training (train_value_models.py) and the
+    comparables index, so the three can never disagree on a feature.
+    """
+    X = np.empty((len(recs), len(FEATURES)), dtype=np.float64)
+    X[:, F["brand_enc"]] = _encode(recs["brand"], brand_codes)
+    X[:, F["type_enc"]]  = _encode(recs["vehicle_type"], type_codes)
+    for name in ("battery_health_pct", "range_km", "top_speed_kmph", "odometer_km",
+                 "warranty_remaining_years", "annual_maintenance_cost", "Purchase_Year",
+                 "Current_Year", "Purchase_Price_L", "Initial_Mileage", "Current_Mileage"):
+        X[:, F[name]] = recs[name]
+
+    vehicle_age = np.maximum(recs["Current_Year"] - recs["Purchase_Year"], 0)
+    odometer    = X[:, F["odometer_km"]]
+    X[:, F["vehicle_age"]]    = vehicle_age
+    X[:, F["usage_per_year"]] = np.where(vehicle_age > 0, odometer / np.maximum(vehicle_age, 1), odometer)
+    X[:, F["mileage_drop"]]   = X[:, F["Initial_Mileage"]] - X[:, F["Current_Mileage"]]
+    return X
+
+
+def recommend(predicted: np.ndarray, user_prices: np.ndarray, band=0.0):
+    """
+    Predicted vs asking prices → (price difference %, recommendation labels).
+
+    band: price difference points (scalar or per row) around the ±10 %
+    thresholds inside which the prediction is not precise enough to pick a
+    side (the surrogate's error band, see value_surrogate.py) → "Uncertain".
+    """
+    # Price difference % (positive → user price is higher → overpriced)
+    safe_pred      = np.where(predicted > 0, predicted, 1.0)
+    price_diff_pct = np.where(predicted > 0, (user_prices - predicted) / safe_pred * 100.0, 0.0)
+
+    # Recommendation thresholds
+    recommendations = np.select(
+        [price_diff_pct > 10.0, price_diff_pct >= -10.0],
+        ["Overpriced", "Fair Price"],
+        default="Excellent Price",
+    )
+    if np.any(band):
+        near = np.abs(np.abs(price_diff_pct) - 10.0) < band
+        recommendations = np.where(near, "Uncertain", recommendations)
+    return price_diff_pct, recommendations
+
 
 class ValueModel:
     """
@@ -21,11 +153,16 @@ class ValueModel:
 
     condition_model.pkl → predicts value_for_money_score × 100  (0–100 %)
     price_model.pkl     → predicts Resale_Value_L
+
+    surrogate_path (optional) → distilled ValueSurrogate used for mode="fast"
     """
 
-    def __init__(self, condition_model_path: str, price_model_path: str):
+    def __init__(self, condition_model_path: str, price_model_path: str, engine: str = None,
+                 surrogate_path: str = None):
         self.condition_model_path = condition_model_path
         self.price_model_path     = price_model_path
+        self.surrogate_path       = surrogate_path
+        self.engine               = (engine or INFERENCE_ENGINE).lower()
 
         self.cond_model   = None
         self.price_model  = None
@@ -33,9 +170,20 @@ class ValueModel:
         self.price_features = []
         self.le_brand     = None
         self.le_type      = None
+        # class → code lookups built from the encoders
+        self._brand_codes = {}
+        self._type_codes  = {}
+        # compiled tree engines (INFERENCE_ENGINE=compiled)
+        self._cond_engine  = None
+        self._price_engine = None
+        # distilled surrogate for mode="fast" (None → fast requests use the bundles)
+        self.surrogate        = None
+        self.surrogate_status = "disabled"
 
         # public flag kept for legacy compat check in main.py
         self.model = True
+        # bumped on every (re)load; result caches key on it
+        self.generation = 0
 
         self._load_models()
 
@@ -43,6 +191,7 @@ class ValueModel:
     #  Load                                                               #
     # ------------------------------------------------------------------ #
     def _load_models(self):
+        self.generation += 1
         for attr_m, attr_f, path, label in [
             ('cond_model',  'cond_features',  self.condition_model_path, "Condition"),
             ('price_model', 'price_features', self.price_model_path,     "Price"),
@@ -51,8 +200,7 @@ class ValueModel:
                 print(f"[WARNING] {label} model not found: {path}")
                 continue
             try:
-                with open(path, "rb") as f:
-                    bundle = pickle.load(f)
+                bundle = load_artifact(path)
 
                 if isinstance(bundle, dict):
                     setattr(self, attr_m, bundle.get("model"))
@@ -73,112 +221,170 @@ class ValueModel:
                 traceback.print_exc()
                 print(f"[ERROR] {label} model: {e}")
 
+        if self.le_brand is not None:
+            self._brand_codes = {str(c): i for i, c in enumerate(self.le_brand.classes_)}
+        if self.le_type is not None:
+            self._type_codes = {str(c): i for i, c in enumerate(self.le_type.classes_)}
+
+        if self.engine == "compiled":
+            for attr_m, attr_e, path, label in [
+                ('cond_model',  '_cond_engine',  self.condition_model_path, "Condition"),
+                ('price_model', '_price_engine', self.price_model_path,     "Price"),
+            ]:
+                model = getattr(self, attr_m)
+                if model is None:
+                    continue
+                try:
+                    setattr(self, attr_e, load_derived(path, "engine", lambda: compile_model(model)))
+                    print(f"[OK] {label} model compiled for NumPy inference")
+                except Exception as e:
+                    print(f"[WARNING] {label} model not compiled, using sklearn: {e}")
+
+        if self.surrogate_path:
+            self._load_surrogate()
+
+    def _load_surrogate(self):
+        """Distilled surrogate, only if it was distilled from the bundles just loaded."""
+        from value_surrogate import SURROGATE_FORMAT, bundle_checksum
+
+        self.surrogate = None
+        if not os.path.exists(self.surrogate_path):
+            self.surrogate_status = "missing"
+            return
+        try:
+            surrogate = load_artifact(self.surrogate_path)
+        except Exception as e:
+            print(f"[ERROR] Value surrogate: {e}")
+            self.surrogate_status = "error"
+            return
+        if getattr(surrogate, "format", None) != SURROGATE_FORMAT or surrogate.source_checksum != \
+                bundle_checksum(self.condition_model_path, self.price_model_path):
+            print("[WARNING] Value surrogate is stale (re-run python value_surrogate.py); fast mode disabled")
+            self.surrogate_status = "stale"
+            return
+        self.surrogate = surrogate
+        self.surrogate_status = "loaded"
+        print(f"[OK] Value surrogate loaded — {surrogate.n_knots} knots per feature")
+
+    def resolve_mode(self, mode: str) -> str:
+        """
+        Requested mode → "fast" if a current surrogate can serve it. Rows of
+        vehicle types the surrogate does not cover are still scored by the
+        full model; every result carries the mode that served it.
+        """
+        return "fast" if mode == "fast" and self.surrogate is not None else "accurate"
+
+    def mode_stats(self, served: str) -> dict:
+        """
+        Held-out fidelity of a served mode: mode_agreement (share of firm,
+        not "Uncertain", fast recommendations that match the full model) and
+        uncertain_share (share fast mode declines to decide), over the
+        vehicle types the surrogate serves. None for "accurate", the reference.
+        """
+        if served not in ("fast", "mixed") or self.surrogate is None:
+            return {"mode_agreement": None, "uncertain_share": None}
+        metrics = self.surrogate.metrics
+        return {"mode_agreement": metrics.get("decided_agreement"),
+                "uncertain_share": metrics.get("uncertain_share")}
+
+    def surrogate_info(self) -> dict:
+        info = {"status": self.surrogate_status, "path": self.surrogate_path}
+        if self.surrogate is not None:
+            info.update(self.surrogate.info())
+        return info
+
     # ------------------------------------------------------------------ #
     #  Feature builder                                                    #
     # ------------------------------------------------------------------ #
-    def _build_features(self, data: dict) -> pd.DataFrame:
-        brand        = str(data.get("brand", ""))
-        vehicle_type = str(data.get("vehicle_type", "Car"))
-        purchase_year = int(data.get("Purchase_Year", 2020))
-        current_year  = int(data.get("Current_Year", 2025))
-        odometer      = float(data.get("odometer_km", 0))
-        initial_mil   = float(data.get("Initial_Mileage", 0))
-        current_mil   = float(data.get("Current_Mileage", 0))
-
-        vehicle_age   = max(current_year - purchase_year, 0)
-        usage_per_yr  = odometer / vehicle_age if vehicle_age > 0 else odometer
-        mileage_drop  = initial_mil - current_mil
-
-        # Encode brand and vehicle_type
-        try:
-            brand_enc = self.le_brand.transform([brand])[0]
-        except Exception:
-            brand_enc = 0
-
-        try:
-            type_enc = self.le_type.transform([vehicle_type])[0]
-        except Exception:
-            type_enc = 0
-
-        row = {
-            "brand_enc"                : brand_enc,
-            "type_enc"                 : type_enc,
-            "battery_health_pct"       : float(data.get("battery_health_pct", 0)),
-            "range_km"                 : float(data.get("range_km", 0)),
-            "top_speed_kmph"           : float(data.get("top_speed_kmph", 0)),
-            "odometer_km"              : odometer,
-            "warranty_remaining_years" : float(data.get("warranty_remaining_years", 0)),
-            "annual_maintenance_cost"  : float(data.get("annual_maintenance_cost", 0)),
-            "Purchase_Year"            : purchase_year,
-            "Current_Year"             : current_year,
-            "Purchase_Price_L"         : float(data.get("Purchase_Price_L", 0)),
-            "Initial_Mileage"          : initial_mil,
-            "Current_Mileage"          : current_mil,
-            "vehicle_age"              : vehicle_age,
-            "usage_per_year"           : usage_per_yr,
-            "mileage_drop"             : mileage_drop,
-        }
-        return pd.DataFrame([row])
+    @staticmethod
+    def _encode(column, codes: dict) -> np.ndarray:
+        return _encode(column, codes)
+
+    def _feature_matrix(self, recs: np.ndarray) -> np.ndarray:
+        """Parsed VALUE_SCHEMA records → float64 matrix in FEATURES order."""
+        return build_features(recs, self._brand_codes, self._type_codes)
+
+    def _model_input(self, X: np.ndarray, features: list):
+        """
+        Select / reorder matrix columns for a bundle's feature list.
+        The compiled engine takes the float64 matrix directly; sklearn
+        gets a named DataFrame.
+        """
+        if features and list(features) != FEATURES:
+            X = X[:, [F[f] for f in features]]
+        if self.engine == "compiled":
+            return X
+        import pandas as pd
+        return pd.DataFrame(X, columns=list(features) if features else FEATURES)
+
+    def _predict_condition(self, X):
+        if self._cond_engine is not None:
+            return self._cond_engine.predict(X)
+        return self.cond_model.predict(X)
+
+    def _predict_price(self, X):
+        if self._price_engine is not None:
+            return self._price_engine.predict(X)
+        return self.price_model.predict(X)
 
     # ------------------------------------------------------------------ #
     #  Condition Score (0-100 %)                                          #
     # ------------------------------------------------------------------ #
-    def _formula_condition(self, data: dict) -> float:
-        """Fallback formula when pkl is legacy numpy array."""
-        battery  = float(data.get("battery_health_pct", 0))
-        odometer = float(data.get("odometer_km", 0))
-        warranty = float(data.get("warranty_remaining_years", 0))
-        maint    = float(data.get("annual_maintenance_cost", 0))
-        age      = max(int(data.get("Current_Year", 2025)) - int(data.get("Purchase_Year", 2020)), 0)
-        init_mil = float(data.get("Initial_Mileage", 0))
-        curr_mil = float(data.get("Current_Mileage", 0))
-        mileage_drop = max(init_mil - curr_mil, 0)
-        range_km = float(data.get("range_km", 0))
-        top_speed= float(data.get("top_speed_kmph", 0))
-
+    def _formula_condition(self, X: np.ndarray) -> np.ndarray:
+        """Fallback formula when pkl is legacy numpy array (unrounded)."""
+        mileage_drop = np.maximum(X[:, F["mileage_drop"]], 0)
         score = (
-              0.35 * (battery / 100)
-            + 0.10 * min(range_km / 500, 1.0)
-            + 0.05 * min(top_speed / 200, 1.0)
-            - 0.20 * min(odometer / 300_000, 1.0)
-            + 0.10 * min(warranty / 10, 1.0)
-            - 0.05 * min(maint / 100_000, 1.0)
-            - 0.10 * min(age / 20, 1.0)
-            - 0.05 * min(mileage_drop / 100, 1.0)
+              0.35 * (X[:, F["battery_health_pct"]] / 100)
+            + 0.10 * np.minimum(X[:, F["range_km"]] / 500, 1.0)
+            + 0.05 * np.minimum(X[:, F["top_speed_kmph"]] / 200, 1.0)
+            - 0.20 * np.minimum(X[:, F["odometer_km"]] / 300_000, 1.0)
+            + 0.10 * np.minimum(X[:, F["warranty_remaining_years"]] / 10, 1.0)
+            - 0.05 * np.minimum(X[:, F["annual_maintenance_cost"]] / 100_000, 1.0)
+            - 0.10 * np.minimum(X[:, F["vehicle_age"]] / 20, 1.0)
+            - 0.05 * np.minimum(mileage_drop / 100, 1.0)
         ) * 100 + 23.61
-        return round(float(np.clip(score, 0, 100)), 2)
+        return np.clip(score, 0, 100)
 
-    def compute_condition_score(self, data: dict) -> float:
+    def _condition_scores(self, X: np.ndarray, model_input=None) -> np.ndarray:
         if self.cond_model is not None:
-            X = self._build_features(data)
-            score = float(self.cond_model.predict(X)[0])
-            return round(float(np.clip(score, 0, 100)), 2)
-        return self._formula_condition(data)
+            if model_input is None:
+                model_input = self._model_input(X, self.cond_features)
+            raw = np.clip(self._predict_condition(model_input), 0, 100)
+        else:
+            raw = self._formula_condition(X)
+        return np.array([round(float(v), 2) for v in raw])
+
+    def compute_condition_score(self, data: dict) -> float:
+        X = self._feature_matrix(VALUE_SCHEMA.parse(data))
+        return float(self._condition_scores(X)[0])
 
     # ------------------------------------------------------------------ #
     #  Predicted Resale Price                                             #
     # ------------------------------------------------------------------ #
-    def _formula_price(self, data: dict, condition_score: float) -> float:
-        """Fallback depreciation formula when pkl is legacy numpy array."""
-        purchase_price = float(data.get("Purchase_Price_L", 0))
-        vehicle_age    = max(int(data.get("Current_Year", 2025)) - int(data.get("Purchase_Year", 2020)), 0)
-        odometer       = float(data.get("odometer_km", 0))
-        warranty       = float(data.get("warranty_remaining_years", 0))
-
-        odometer_factor  = min(odometer / 200_000, 1.0) * 0.04
-        condition_factor = ((100 - condition_score) / 100) * 0.03
+    def _formula_price(self, X: np.ndarray, condition_scores: np.ndarray) -> np.ndarray:
+        """Fallback depreciation formula when pkl is legacy numpy array (unrounded)."""
+        odometer_factor  = np.minimum(X[:, F["odometer_km"]] / 200_000, 1.0) * 0.04
+        condition_factor = ((100 - condition_scores) / 100) * 0.03
         ann_depr         = 0.12 + odometer_factor + condition_factor
-        retained         = max((1 - ann_depr) ** vehicle_age, 0)
-        warranty_factor  = 1 + min(warranty / 10, 1) * 0.03
-        return round(float(purchase_price * retained * warranty_factor * 0.687), 1)
+        retained         = np.maximum((1 - ann_depr) ** X[:, F["vehicle_age"]], 0)
+        warranty_factor  = 1 + np.minimum(X[:, F["warranty_remaining_years"]] / 10, 1) * 0.03
+        return X[:, F["Purchase_Price_L"]] * retained * warranty_factor * 0.687
 
-    def predict_resale_price(self, data: dict, condition_score: float = None) -> float:
+    def _resale_prices(self, X: np.ndarray, condition_scores=None, model_input=None) -> np.ndarray:
         if self.price_model is not None:
-            X = self._build_features(data)
-            return round(float(self.price_model.predict(X)[0]), 1)
-        if condition_score is None:
-            condition_score = self.compute_condition_score(data)
-        return self._formula_price(data, condition_score)
+            if model_input is None:
+                model_input = self._model_input(X, self.price_features)
+            raw = self._predict_price(model_input)
+        else:
+            if condition_scores is None:
+                condition_scores = self._condition_scores(X)
+            raw = self._formula_price(X, condition_scores)
+        return np.array([round(float(v), 1) for v in raw])
+
+    def predict_resale_price(self, data: dict, condition_score: float = None) -> float:
+        X = self._feature_matrix(VALUE_SCHEMA.parse(data))
+        scores = None if condition_score is None else np.array([condition_score], dtype=np.float64)
+        return float(self._resale_prices(X, scores)[0])
 
     # ------------------------------------------------------------------ #
     #  Legacy compat                                                      #
@@ -187,37 +393,24 @@ class ValueModel:
         return self.predict_resale_price(data)
 
     # ------------------------------------------------------------------ #
-    #  Public: analyze                                                    #
+    #  Insights                                                           #
     # ------------------------------------------------------------------ #
-    def analyze(self, data: dict) -> dict:
-        import random
-
-        condition_score  = self.compute_condition_score(data)
-        predicted_resale = self.predict_resale_price(data, condition_score)
-        user_price       = float(data.get("Resale_Value_L", 0))
-
-        battery_health   = float(data.get("battery_health_pct", 0))
-        odometer         = float(data.get("odometer_km", 0))
-        warranty         = float(data.get("warranty_remaining_years", 0))
-        purchase_year    = int(data.get("Purchase_Year", 2020))
-        current_year     = int(data.get("Current_Year", 2025))
-        age              = max(current_year - purchase_year, 0)
-
-        # Price difference % (positive → user price is higher → overpriced)
-        if predicted_resale > 0:
-            price_diff_pct = ((user_price - predicted_resale) / predicted_resale) * 100.0
-        else:
-            price_diff_pct = 0.0
+    @staticmethod
+    def input_digest(feature_row, user_price) -> bytes:
+        """
+        Stable digest of a normalized listing (parsed FEATURES row + asking
+        price). Identical inputs give identical digests in every process,
+        so it seeds insight selection and keys result caches.
+        """
+        values = np.append(np.asarray(feature_row, dtype=np.float64), np.float64(user_price))
+        return hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+
+    @staticmethod
+    def _insights(recommendation, battery_health, odometer, warranty, age,
+                  user_price, predicted_resale, digest: bytes = b"") -> list:
+        # Deterministic phrase selection: same normalized input → same insight
+        rng = random.Random(digest)
 
-        # Recommendation thresholds
-        if price_diff_pct > 10.0:
-            recommendation = "Overpriced"
-        elif price_diff_pct >= -10.0:
-            recommendation = "Fair Price"
-        else:
-            recommendation = "Excellent Price"
-
-        # Insights
         insights = []
         if recommendation == "Overpriced":
             reasons = []
@@ -233,7 +426,7 @@ class ValueModel:
                 reasons.append("pricing exceeding expected market value")
             if not reasons:
                 reasons = ["overall market depreciation factors"]
-            chosen      = random.sample(reasons, min(len(reasons), 2))
+            chosen      = rng.sample(reasons, min(len(reasons), 2))
             reason_text = " and ".join(chosen)
             insights.append(f"⚠️ The vehicle appears overpriced mainly due to {reason_text}.")
 
@@ -244,9 +437,13 @@ class ValueModel:
                 f"{int(warranty)} yr warranty remaining",
                 f"{age} yr vehicle age",
             ]
-            chosen      = random.sample(parts, min(len(parts), 2))
+            chosen      = rng.sample(parts, min(len(parts), 2))
             insights.append(f"👍 Pricing is reasonable considering {' and '.join(chosen)}.")
 
+        elif recommendation == "Uncertain":
+            insights.append("ℹ️ The asking price is too close to the fair-price boundary to call in fast mode; "
+                            "request mode=accurate for a firm recommendation.")
+
         else:  # Excellent Price
             parts = []
             if battery_health >= 90:
@@ -257,22 +454,153 @@ class ValueModel:
                 parts.append(f"only {int(odometer):,} km driven")
             if not parts:
                 parts = ["competitive market pricing"]
-            chosen = random.sample(parts, min(len(parts), 2))
+            chosen = rng.sample(parts, min(len(parts), 2))
             insights.append(f"✅ Great value — {' and '.join(chosen)}.")
 
-        # Fair price range (±10 % of predicted)
-        low_price   = predicted_resale * 0.90
-        high_price  = predicted_resale * 1.10
-        price_range = f"₹{round(low_price):,} - ₹{round(high_price):,}"
+        return insights
+
+    # ------------------------------------------------------------------ #
+    #  Public: analyze                                                    #
+    # ------------------------------------------------------------------ #
+    def analyze(self, data: dict) -> dict:
+        """Analyze one listing; raises SchemaError on invalid input."""
+        return self.analyze_parsed(VALUE_SCHEMA.parse(data))[0]
+
+    def analyze_many(self, records: list, mode: str = "accurate") -> dict:
+        """
+        Batch version of analyze().
+
+        Returns {'results': [...], 'errors': [...]}; each result carries the
+        index of its input record and the same fields as analyze(). Records
+        that fail validation are reported in errors without failing the batch.
+        """
+        with stage("preprocess"):
+            recs, valid_indices, errors = VALUE_SCHEMA.parse_many(records)
+        results = self.analyze_parsed(recs, mode)
+        for idx, r in zip(valid_indices, results):
+            r["index"] = idx
+        return {"results": results, "errors": errors}
+
+    def score_grid(self, rec: np.ndarray, axes: dict, mode: str = "accurate") -> dict:
+        """
+        What-if grid for one parsed listing: every combination of the axis
+        values (see parse_grid_axes) is scored with one batched call per
+        model. Returned arrays have one dimension per axis, in axes order.
+        """
+        shape = tuple(len(v) for v in axes.values())
+        with stage("features"):
+            recs = np.repeat(rec[:1], int(np.prod(shape)))
+            for name, column in zip(axes, np.meshgrid(*axes.values(), indexing="ij")):
+                recs[name] = column.ravel()
+            X = self._feature_matrix(recs)
+
+        # One vehicle type per grid: the surrogate covers all of it or none
+        served = "fast" if self.resolve_mode(mode) == "fast" and self.surrogate.covers(X[:1]).all() \
+            else "accurate"
+        if served == "fast":
+            with stage("predict_surrogate"):
+                condition_scores, predicted = self.surrogate.predict(X)
+        else:
+            with stage("predict_condition"):
+                condition_scores = self._condition_scores(X)
+            with stage("predict_price"):
+                predicted = self._resale_prices(X, condition_scores)
 
+        purchase = float(rec["Purchase_Price_L"][0])
+        retained = predicted / purchase * 100.0 if purchase > 0 else np.zeros_like(predicted)
         return {
-            "condition_score":  condition_score,
-            "predicted_resale": predicted_resale,
-            "user_price":       user_price,
-            "price_diff_pct":   round(price_diff_pct, 2),
-            "recommendation":   recommendation,
-            "insights":         insights,
-            "fair_price_range": price_range,
-            # legacy compat
-            "score":            condition_score,
+            "axes":               {name: values.tolist() for name, values in axes.items()},
+            "shape":              list(shape),
+            "points":             len(recs),
+            "condition_score":    condition_scores.reshape(shape).tolist(),
+            "predicted_resale":   predicted.reshape(shape).tolist(),
+            "retained_value_pct": np.round(retained, 2).reshape(shape).tolist(),
+            "mode":               served,
         }
+
+    def analyze_parsed(self, recs: np.ndarray, mode: str = "accurate") -> list:
+        """
+        Core analysis over parsed VALUE_SCHEMA records.
+
+        One feature matrix is built for all rows and shared by cond_model
+        and price_model (or the surrogate in fast mode, see resolve_mode);
+        price difference, recommendation and fair-price range are vectorized.
+        """
+        if not len(recs):
+            return []
+        user_prices = recs["Resale_Value_L"]
+        with stage("features"):
+            X = self._feature_matrix(recs)
+        fast = self.surrogate.covers(X) if self.resolve_mode(mode) == "fast" else np.zeros(len(X), dtype=bool)
+
+        if fast.all():
+            with stage("predict_surrogate"):
+                condition_scores, predicted = self.surrogate.predict(X)
+            return self._results(X, user_prices, condition_scores, predicted,
+                                 self.surrogate.price_diff_band(X), "fast")
+        if not fast.any():
+            condition_scores, predicted = self._predict_full(X)
+            return self._results(X, user_prices, condition_scores, predicted)
+
+        # Vehicle types the surrogate does not cover go to the full model
+        condition_scores, predicted = np.empty(len(X)), np.empty(len(X))
+        with stage("predict_surrogate"):
+            condition_scores[fast], predicted[fast] = self.surrogate.predict(X[fast])
+        condition_scores[~fast], predicted[~fast] = self._predict_full(X[~fast])
+        band = np.where(fast, self.surrogate.price_diff_band(X), 0.0)
+        return self._results(X, user_prices, condition_scores, predicted, band,
+                             np.where(fast, "fast", "accurate").tolist())
+
+    def _predict_full(self, X):
+        """(condition scores, resale prices) from the GradientBoosting bundles."""
+        with stage("features"):
+            # Both bundles are trained on the same feature list → same model input
+            X_cond = self._model_input(X, self.cond_features) if self.cond_model is not None else None
+            X_price = None
+            if self.price_model is not None:
+                X_price = X_cond if X_cond is not None and self.price_features == self.cond_features \
+                    else self._model_input(X, self.price_features)
+
+        with stage("predict_condition"):
+            condition_scores = self._condition_scores(X, X_cond)
+        with stage("predict_price"):
+            predicted = self._resale_prices(X, condition_scores, X_price)
+        return condition_scores, predicted
+
+    def _results(self, X, user_prices, condition_scores, predicted, band=0.0, modes="accurate") -> list:
+        with stage("postprocess"):
+            price_diff_pct, recommendations = recommend(predicted, user_prices, band)
+
+            # Fair price range (±10 % of predicted)
+            low_prices  = predicted * 0.90
+            high_prices = predicted * 1.10
+
+            battery_health = X[:, F["battery_health_pct"]].tolist()
+            odometer       = X[:, F["odometer_km"]].tolist()
+            warranty       = X[:, F["warranty_remaining_years"]].tolist()
+            ages           = X[:, F["vehicle_age"]].astype(int).tolist()
+
+        if isinstance(modes, str):
+            modes = [modes] * len(X)
+        with stage("insights"):
+            results = []
+            for pos in range(len(X)):
+                recommendation = str(recommendations[pos])
+                cond  = float(condition_scores[pos])
+                pred  = float(predicted[pos])
+                user  = float(user_prices[pos])
+                results.append({
+                    "condition_score":  cond,
+                    "predicted_resale": pred,
+                    "user_price":       user,
+                    "price_diff_pct":   round(float(price_diff_pct[pos]), 2),
+                    "recommendation":   recommendation,
+                    "insights":         self._insights(recommendation, battery_health[pos], odometer[pos],
+                                                       warranty[pos], ages[pos], user, pred,
+                                                       self.input_digest(X[pos], user)),
+                    "fair_price_range": f"₹{round(float(low_prices[pos])):,} - ₹{round(float(high_prices[pos])):,}",
+                    # legacy compat
+                    "score":            cond,
+                    "mode":             modes[pos],
+                })
+        return results
@@ -0,0 +1,508 @@
+"""
+Distilled surrogate of the value bundles for /predict_value?mode=fast.
+
+The GradientBoosting condition and price models are evaluated on every
+listing in resale_value.csv and backend-data/value_for_money.csv, and a
+lookup-table model is fit to their predictions (not to the labels). For
+each vehicle_type, each target is a sum of one piecewise-linear function
+per numeric feature, one bilinear function per pair of features and a
+per-brand offset:
+
+    condition   Σ_j f_j(x_j) + Σ_j<k f_jk(x_j, x_k) + brand offset          (clipped to 0–100)
+    price       Purchase_Price_L × (Σ_j g_j(x_j) + Σ_j<k g_jk(x_j, x_k) + brand offset)
+
+Price is fit as the retained share of the purchase price, which is close
+to additive for both vehicle types. The pair terms carry the interactions
+the per-feature tables miss (most of the Bike error). Each f_j is stored as
+SURROGATE_KNOTS (x, y) points at quantiles of the feature
+(Purchase_Price_L in log space) and each f_jk as a SURROGATE_PAIR_KNOTS²
+grid, both interpolated linearly, so a prediction is a few array lookups
+per row instead of hundreds of trees. The fit is ridge least squares on
+the interpolation weights (a sparse design matrix, scipy).
+
+    python value_surrogate.py                 # distill → VALUE_SURROGATE_PATH, prints the report
+    python value_surrogate.py --knots 32 --json surrogate_report.json
+    python value_surrogate.py --force         # ship every vehicle type, see below
+
+The report puts fidelity to the full model (MAE, R², recommendation
+agreement on a held-out split), error against the dataset labels and
+predict latency for both modes side by side.
+
+A surrogate price a few percent off can flip a listing across the ±10 %
+recommendation thresholds. Distillation measures how far the fast
+price_diff_pct lands from the full model's on the held-out rows and keeps
+the BAND_QUANTILE quantile per vehicle type as the surrogate's error band;
+fast requests within that band of a threshold get recommendation
+"Uncertain" instead of a side. The held-out agreement on the remaining
+(firm) recommendations is reported by the API as mode_agreement, next to
+uncertain_share (how often fast mode declines to decide). Asking prices in
+the source data sit close to the thresholds (median 5 points away), so
+even a band of a few points declines a large share of them.
+
+Only the tables of vehicle types whose held-out uncertain share is at most
+SURROGATE_MAX_UNCERTAIN_SHARE are shipped; fast requests for other types
+are served by the full model (and say so, mode "accurate"). If no type
+qualifies, nothing is saved.
+
+The artifact records a checksum of the bundles it was distilled from;
+ValueModel ignores a surrogate that does not match the loaded bundles, and
+fast requests are then served by the full model (reported as mode
+'accurate'). Re-run the distillation after installing new bundles.
+
+    VALUE_SURROGATE_PATH=backend/value_surrogate.joblib
+    SURROGATE_KNOTS=16
+    SURROGATE_PAIR_KNOTS=5               0 → per-feature tables only
+    SURROGATE_MAX_UNCERTAIN_SHARE=0.5
+
+End-to-end comparison: python backend/benchmarks/value_modes.py
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import warnings
+
+import numpy as np
+
+from schema import VALUE_SCHEMA
+from value_model import FEATURES, F, ValueModel, recommend
+from comparables import SOURCE_PATHS
+from lazy_models import checksum
+from columnar import read_dataset
+
+warnings.filterwarnings("ignore")
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+VALUE_SURROGATE_PATH = os.environ.get(
+    'VALUE_SURROGATE_PATH', os.path.join(BACKEND_DIR, 'value_surrogate.joblib'))
+SURROGATE_KNOTS = int(os.environ.get('SURROGATE_KNOTS', 16))
+SURROGATE_PAIR_KNOTS = int(os.environ.get('SURROGATE_PAIR_KNOTS', 5))
+SURROGATE_MAX_UNCERTAIN_SHARE = float(os.environ.get('SURROGATE_MAX_UNCERTAIN_SHARE', 0.5))
+# Bumped whenever the table layout changes; older artifacts are ignored
+SURROGATE_FORMAT = 3
+# L2 penalty on the table values (keeps brand offsets / sparse knots bounded)
+RIDGE = 1e-3
+
+NUMERIC_FEATURES = [f for f in FEATURES if f not in ('brand_enc', 'type_enc')]
+LOG_FEATURES = ('Purchase_Price_L',)
+_NUMERIC_COLUMNS = [F[name] for name in NUMERIC_FEATURES]
+_LOG_COLUMNS = [NUMERIC_FEATURES.index(name) for name in LOG_FEATURES]
+
+TARGETS = ('condition', 'price')
+# Quantile of the held-out |fast − accurate| price_diff_pct used as the error band
+BAND_QUANTILE = 0.9
+# Labels in the source CSVs (value_for_money.csv capitalizes the score column)
+CONDITION_LABELS = ('value_for_money_score', 'Value_for_Money_Score')
+
+
+def bundle_checksum(condition_model_path, price_model_path):
+    """Identity of the bundles a surrogate is distilled from."""
+    return checksum([condition_model_path, price_model_path])
+
+
+def _inputs(X):
+    """FEATURES matrix → numeric surrogate inputs (log-scaled where configured)."""
+    Z = X[:, _NUMERIC_COLUMNS]
+    Z[:, _LOG_COLUMNS] = np.log1p(np.maximum(Z[:, _LOG_COLUMNS], 0))
+    return Z
+
+
+def _purchase(X):
+    """Purchase price the price target is scaled by (floored so a zero price stays finite)."""
+    return np.maximum(X[:, F['Purchase_Price_L']], 1.0)
+
+
+def _segments(Z, knots, last):
+    """Segment index and position (0–1) of every value within its feature's padded knots."""
+    cols = np.arange(knots.shape[0])
+    z = np.minimum(np.maximum(Z, knots[:, 0]), knots[cols, last])
+    # Segment of every feature value: knots ≤ z, capped at the last segment
+    i = np.minimum((z[:, :, None] >= knots).sum(axis=2) - 1, last - 1)
+    k0, k1 = knots[cols, i], knots[cols, i + 1]
+    return i, (z - k0) / (k1 - k0)
+
+
+def _pad(knots):
+    """Per-feature knot arrays → (features, width) array padded with inf, last index per feature."""
+    padded = np.full((len(knots), max(len(k) for k in knots)), np.inf)
+    for j, k in enumerate(knots):
+        padded[j, :len(k)] = k
+    return padded, np.array([len(k) - 1 for k in knots])
+
+
+def _basis(Z, brands, knots, n_brands, pair_knots, pairs):
+    """
+    Sparse interpolation weights of every row: one block per feature (two
+    weights per row), the brand one-hot, then one block per feature pair
+    (the four bilinear weights of its grid cell).
+    """
+    from scipy import sparse
+
+    n = len(Z)
+    rows = np.arange(n)
+    entries, start = [], 0
+    i, t = _segments(Z, *_pad(knots))
+    for j, k in enumerate(knots):
+        entries += [(start + i[:, j], 1.0 - t[:, j]), (start + i[:, j] + 1, t[:, j])]
+        start += len(k)
+    entries.append((start + np.clip(brands, 0, n_brands - 1), np.ones(n)))
+    start += n_brands
+    if pairs:
+        i, t = _segments(Z, *_pad(pair_knots))
+        for a, b in pairs:
+            width = len(pair_knots[b])
+            for da, wa in ((0, 1.0 - t[:, a]), (1, t[:, a])):
+                for db, wb in ((0, 1.0 - t[:, b]), (1, t[:, b])):
+                    entries.append((start + (i[:, a] + da) * width + i[:, b] + db, wa * wb))
+            start += len(pair_knots[a]) * width
+    cols = np.concatenate([c for c, _ in entries])
+    data = np.concatenate([w for _, w in entries])
+    return sparse.csr_matrix((data, (np.tile(rows, len(entries)), cols)), shape=(n, start))
+
+
+def _solve(B, Y, ridge):
+    G = (B.T @ B).toarray() + ridge * np.eye(B.shape[1])
+    return np.linalg.solve(G, B.T @ Y)
+
+
+class _Table:
+    """Every target's per-feature and per-pair tables for one vehicle type, padded into dense arrays."""
+
+    def __init__(self, knots, n_brands, pair_knots, pairs, weights):
+        self.knots, self.last = _pad(knots)
+        self.values = np.zeros((len(TARGETS),) + self.knots.shape)
+        start = 0
+        for j, k in enumerate(knots):
+            self.values[:, j, :len(k)] = weights[start:start + len(k)].T
+            start += len(k)
+        self.offsets = np.ascontiguousarray(weights[start:start + n_brands].T)   # (targets, brands)
+        start += n_brands
+
+        # Pair grids: (targets, pairs, width, width), cell (x_a segment, x_b segment)
+        self.pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        self.pair_knots, self.pair_last = _pad(pair_knots) if pairs else (None, None)
+        width = self.pair_knots.shape[1] if pairs else 0
+        self.pair_values = np.zeros((len(TARGETS), len(pairs), width, width))
+        for p, (a, b) in enumerate(pairs):
+            na, nb = len(pair_knots[a]), len(pair_knots[b])
+            self.pair_values[:, p, :na, :nb] = weights[start:start + na * nb].T.reshape(-1, na, nb)
+            start += na * nb
+        self._cols = np.arange(len(knots))
+        # Flat view for the gathers in evaluate(): cell (p, i, j) → p·width² + i·width + j
+        self._pair_flat = self.pair_values.reshape(len(TARGETS), -1)
+        self._pair_base = np.arange(len(pairs)) * width * width
+
+    def evaluate(self, Z, brands):
+        """(rows, features) inputs → (targets, rows) sums (before the price scale)."""
+        i, t = _segments(Z, self.knots, self.last)
+        v0, v1 = self.values[:, self._cols, i], self.values[:, self._cols, i + 1]
+        s = (v0 + (v1 - v0) * t).sum(axis=2)
+        s += self.offsets[:, np.minimum(brands, self.offsets.shape[1] - 1)]
+        if len(self.pairs):
+            i, t = _segments(Z, self.pair_knots, self.pair_last)
+            a, b = self.pairs[:, 0], self.pairs[:, 1]
+            width = self.pair_values.shape[2]
+            cell = self._pair_base + i[:, a] * width + i[:, b]          # (rows, pairs)
+            ta, tb = t[:, a], t[:, b]
+            for offset, w in ((0, (1 - ta) * (1 - tb)), (width, ta * (1 - tb)),
+                              (1, (1 - ta) * tb), (width + 1, ta * tb)):
+                for target in range(len(TARGETS)):
+                    s[target] += (self._pair_flat[target].take(cell + offset) * w).sum(axis=1)
+        return s
+
+
+class ValueSurrogate:
+    def __init__(self, tables, n_knots, source_checksum, metrics=None, price_diff_bands=None, pair_knots=0):
+        self.tables = tables            # type code → _Table (types without one use the full model)
+        self.n_knots = n_knots
+        self.pair_knots = pair_knots
+        self.source_checksum = source_checksum
+        self.metrics = metrics or {}
+        self.price_diff_bands = price_diff_bands or {}  # type code → price_diff_pct points
+        self.format = SURROGATE_FORMAT
+
+    # ------------------------------------------------------------------ #
+    #  Fit                                                                #
+    # ------------------------------------------------------------------ #
+    @classmethod
+    def fit(cls, X, targets, n_knots=SURROGATE_KNOTS, pair_knots=SURROGATE_PAIR_KNOTS, ridge=RIDGE,
+            source_checksum=None):
+        """Fit one table per vehicle type code to every target in TARGETS."""
+        Z = _inputs(X)
+        brands = X[:, F['brand_enc']].astype(np.int64)
+        types = X[:, F['type_enc']].astype(np.int64)
+        n_brands = int(brands.max()) + 1 if len(brands) else 1
+        Y = np.column_stack([targets['condition'], targets['price'] / _purchase(X)])
+
+        groups = {int(code): np.flatnonzero(types == code) for code in np.unique(types)}
+
+        tables = {}
+        for code, rows in groups.items():
+            # A feature that is constant in the data (Current_Year) still gets two
+            # knots; its table is made flat below so what-if values do not move it,
+            # and it is left out of the pairs
+            knots = [np.unique(np.quantile(Z[rows, j], np.linspace(0, 1, n_knots))) for j in range(Z.shape[1])]
+            constant = [j for j, k in enumerate(knots) if len(k) == 1]
+            knots = [k if len(k) > 1 else np.array([k[0], k[0] + 1.0]) for k in knots]
+            varying = [j for j in range(Z.shape[1]) if j not in constant]
+            pairs = [(a, b) for pos, a in enumerate(varying) for b in varying[pos + 1:]] if pair_knots > 1 else []
+            grid = [np.unique(np.quantile(Z[rows, j], np.linspace(0, 1, pair_knots))) if j in varying else k
+                    for j, k in enumerate(knots)] if pairs else []
+
+            B = _basis(Z[rows], brands[rows], knots, n_brands, grid, pairs)
+            table = _Table(knots, n_brands, grid, pairs, _solve(B, Y[rows], ridge))
+            table.values[:, constant, 1] = table.values[:, constant, 0]
+            tables[code] = table
+        return cls(tables, n_knots, source_checksum, pair_knots=pair_knots if any(
+            len(t.pairs) for t in tables.values()) else 0)
+
+    # ------------------------------------------------------------------ #
+    #  Predict                                                            #
+    # ------------------------------------------------------------------ #
+    def predict_raw(self, X):
+        """Unrounded predictions for a FEATURES matrix: {target: array}."""
+        Z = _inputs(X)
+        brands = X[:, F['brand_enc']].astype(np.int64)
+        types = X[:, F['type_enc']].astype(np.int64)
+        out = np.empty((len(TARGETS), len(X)))
+
+        codes = types[:1] if len(X) == 1 else np.unique(types)
+        for code in codes:
+            rows = slice(None) if len(codes) == 1 else types == code
+            table = self.tables[int(code)]
+            out[:, rows] = table.evaluate(Z[rows], brands[rows])
+        return {'condition': np.minimum(np.maximum(out[0], 0), 100), 'price': out[1] * _purchase(X)}
+
+    def covers(self, X):
+        """Rows whose vehicle type has a table (predict only those)."""
+        return np.isin(X[:, F['type_enc']].astype(np.int64), list(self.tables))
+
+    def price_diff_band(self, X):
+        """Per-row error band (price_diff_pct points) for recommend(); 0 → always decide."""
+        types = X[:, F['type_enc']].astype(np.int64)
+        return np.array([self.price_diff_bands.get(int(code), 0.0) for code in types])
+
+    def predict(self, X):
+        """FEATURES matrix → (condition scores, resale prices), rounded like the full model."""
+        raw = self.predict_raw(X)
+        return raw['condition'].round(2), raw['price'].round(1)
+
+    def info(self):
+        return {'knots': self.n_knots, 'pair_knots': self.pair_knots, 'source_checksum': self.source_checksum,
+                'fidelity': {t: m.get('fidelity') for t, m in self.metrics.get('targets', {}).items()},
+                'recommendation_agreement': self.metrics.get('recommendation_agreement'),
+                'vehicle_types': {str(code): m for code, m in self.metrics.get('types', {}).items()},
+                'coverage': self.metrics.get('coverage'),
+                'decided_agreement': self.metrics.get('decided_agreement'),
+                'uncertain_share': self.metrics.get('uncertain_share')}
+
+    def save(self, path=VALUE_SURROGATE_PATH):
+        import joblib
+        tmp = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(self, tmp)
+        os.replace(tmp, path)
+
+
+# ==============================
+# Distillation
+# ==============================
+
+def load_listings(paths=SOURCE_PATHS):
+    """Source CSVs → (parsed VALUE_SCHEMA records, condition labels × 100 or NaN)."""
+    import pandas as pd
+
+    frames = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"[WARNING] Distillation source not found: {path}")
+            continue
+        df = read_dataset(path)
+        label = next((c for c in CONDITION_LABELS if c in df), None)
+        df['_condition_label'] = df[label] * 100.0 if label else np.nan
+        frames.append(df)
+    if not frames:
+        raise FileNotFoundError("No distillation source data found")
+    df = pd.concat(frames, ignore_index=True)
+    recs, valid, errors = VALUE_SCHEMA.parse_many(df.to_dict('records'))
+    if errors:
+        print(f"[WARNING] {len(errors)} rows failed validation and were dropped")
+    return recs, df['_condition_label'].to_numpy(dtype=np.float64)[valid]
+
+
+def _teacher(values, X):
+    """Unrounded full-model predictions: {'condition': ..., 'price': ...}."""
+    if values.cond_model is None or values.price_model is None:
+        raise RuntimeError("Both value bundles must be loaded to distill a surrogate")
+    return {'condition': np.clip(values._predict_condition(values._model_input(X, values.cond_features)), 0, 100),
+            'price':     values._predict_price(values._model_input(X, values.price_features))}
+
+
+def _errors(pred, ref):
+    err = pred - ref
+    ss = float(((ref - ref.mean()) ** 2).sum())
+    return {'mae':            round(float(np.abs(err).mean()), 4),
+            'r2':             round(1 - float((err ** 2).sum()) / ss, 6) if ss else None,
+            'median_rel_err': round(float(np.median(np.abs(err) / np.maximum(np.abs(ref), 1))), 4)}
+
+
+def _latency(fn, X, rows=200, batch=1000):
+    """Median per-call predict latency: single rows (one API request) and one batch."""
+    def timed(args):
+        times = []
+        for a in args:
+            start = time.perf_counter()
+            fn(a)
+            times.append(time.perf_counter() - start)
+        return float(np.median(times))
+
+    block = X[:batch]
+    batch_s = timed([block] * 5)
+    return {'single_us':       round(timed([X[i:i + 1] for i in range(min(rows, len(X)))]) * 1e6, 1),
+            'batch_rows':      len(block),
+            'batch_us_per_row': round(batch_s * 1e6 / max(len(block), 1), 3)}
+
+
+def distill(values, paths=SOURCE_PATHS, n_knots=SURROGATE_KNOTS, pair_knots=SURROGATE_PAIR_KNOTS,
+            holdout=0.2, seed=42, max_uncertain_share=SURROGATE_MAX_UNCERTAIN_SHARE):
+    """
+    Fit a surrogate to `values` (a loaded ValueModel). Fidelity is measured
+    on a held-out split; the returned surrogate is refit on every row and
+    keeps the tables of the vehicle types whose held-out uncertain share is
+    at most max_uncertain_share (None: every type).
+    """
+    recs, condition_labels = load_listings(paths)
+    X = values._feature_matrix(recs)
+    teacher = _teacher(values, X)
+    source = bundle_checksum(values.condition_model_path, values.price_model_path)
+
+    order = np.random.default_rng(seed).permutation(len(X))
+    n_test = int(len(X) * holdout)
+    test, train = order[:n_test], order[n_test:]
+
+    start = time.perf_counter()
+    held_out = ValueSurrogate.fit(X[train], {t: y[train] for t, y in teacher.items()}, n_knots, pair_knots)
+    fit_s = time.perf_counter() - start
+
+    labels = {'condition': condition_labels, 'price': recs['Resale_Value_L'].astype(np.float64)}
+    metrics = {'rows': len(X), 'train_rows': len(train), 'test_rows': len(test), 'knots': n_knots,
+               'pair_knots': held_out.pair_knots,
+               'fit_s': round(fit_s, 3), 'targets': {}}
+    fast = held_out.predict_raw(X[test])
+    for target, y in teacher.items():
+        known = np.isfinite(labels[target][test])
+        metrics['targets'][target] = {
+            'fidelity':  _errors(fast[target], y[test]),
+            'label_mae': {'accurate': round(float(np.abs(y[test] - labels[target][test])[known].mean()), 4),
+                          'fast':     round(float(np.abs(fast[target] - labels[target][test])[known].mean()), 4)}
+            if known.any() else None,
+        }
+
+    # Recommendation the API would return for the listed price, in both modes
+    user_prices = labels['price'][test]
+    accurate_diff, accurate_rec = recommend(np.round(teacher['price'][test], 1), user_prices)
+    fast_diff, fast_rec = recommend(np.round(fast['price'], 1), user_prices)
+    metrics['recommendation_agreement'] = round(float((accurate_rec == fast_rec).mean()), 4)
+
+    # Error band around the thresholds per vehicle type, and agreement outside it
+    diff_err = np.abs(fast_diff - accurate_diff)
+    types = X[test, F['type_enc']].astype(np.int64)
+    bands = {code: round(float(np.quantile(diff_err[types == code], BAND_QUANTILE)), 2)
+             for code in held_out.tables if (types == code).any()}
+    held_out.price_diff_bands = bands
+    fast_rec = recommend(np.round(fast['price'], 1), user_prices, held_out.price_diff_band(X[test]))[1]
+    decided = fast_rec != "Uncertain"
+    agree = accurate_rec == fast_rec
+
+    def shares(rows):
+        return {'uncertain_share':   round(float(1 - decided[rows].mean()), 4) if rows.any() else None,
+                'decided_agreement': round(float(agree[rows & decided].mean()), 4)
+                if (rows & decided).any() else None}
+
+    # Only types fast mode can usually decide are shipped; the rest use the full model
+    metrics['types'] = {}
+    for code, band in bands.items():
+        m = {'rows': int((types == code).sum()), 'price_diff_band': band, **shares(types == code)}
+        m['shipped'] = max_uncertain_share is None or m['uncertain_share'] <= max_uncertain_share
+        metrics['types'][code] = m
+    shipped = [code for code, m in metrics['types'].items() if m['shipped']]
+    covered = np.isin(types, shipped)
+    metrics['max_uncertain_share'] = max_uncertain_share
+    metrics['coverage'] = round(float(covered.mean()), 4)
+    metrics.update(shares(covered))
+
+    metrics['latency'] = {
+        'accurate': _latency(lambda A: _teacher(values, A), X[test]),
+        'fast':     _latency(held_out.predict, X[test]),
+    }
+
+    surrogate = ValueSurrogate.fit(X, teacher, n_knots, pair_knots, source_checksum=source)
+    surrogate.tables = {code: t for code, t in surrogate.tables.items() if code in shipped}
+    surrogate.metrics = metrics
+    surrogate.price_diff_bands = {code: bands[code] for code in shipped}
+    return surrogate
+
+
+def print_report(metrics):
+    print(f"\n{metrics['rows']} listings ({metrics['train_rows']} fit / {metrics['test_rows']} held out), "
+          f"{metrics['knots']} knots, {metrics['pair_knots']}² pair grids, fit {metrics['fit_s']}s\n")
+    print(f"{'target':10s} {'MAE vs model':>13s} {'R² vs model':>12s} {'med rel err':>12s} "
+          f"{'label MAE accurate':>19s} {'label MAE fast':>15s}")
+    for target, m in metrics['targets'].items():
+        fid, lab = m['fidelity'], m['label_mae'] or {}
+        print(f"{target:10s} {fid['mae']:>13} {fid['r2']:>12} {fid['median_rel_err']:>12} "
+              f"{lab.get('accurate', '-'):>19} {lab.get('fast', '-'):>15}")
+    print(f"\nrecommendation agreement (held out, no error band): {metrics['recommendation_agreement']:.2%}\n")
+    pct = lambda v: '-' if v is None else f"{v:.2%}"
+    print(f"{'type code':10s} {'rows':>6s} {'error band':>11s} {'Uncertain':>10s} {'agreement':>10s}  shipped "
+          f"(max Uncertain {pct(metrics['max_uncertain_share'])})")
+    for code, m in metrics['types'].items():
+        print(f"{code:<10} {m['rows']:>6} {m['price_diff_band']:>11} {pct(m['uncertain_share']):>10} "
+              f"{pct(m['decided_agreement']):>10}  {'yes' if m['shipped'] else 'no'}")
+    print(f"\nfast mode serves {pct(metrics['coverage'])} of held-out listings: "
+          f"{pct(metrics['uncertain_share'])} Uncertain, {pct(metrics['decided_agreement'])} agreement on the rest\n")
+    print(f"{'mode':10s} {'single row µs':>14s} {'batch µs/row':>13s}")
+    for mode, lat in metrics['latency'].items():
+        print(f"{mode:10s} {lat['single_us']:>14} {lat['batch_us_per_row']:>13}")
+
+
+# ================================================================== #
+#  CLI: python value_surrogate.py                                     #
+# ================================================================== #
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--knots', type=int, default=SURROGATE_KNOTS, help="knots per feature table")
+    parser.add_argument('--pair-knots', type=int, default=SURROGATE_PAIR_KNOTS,
+                        help="grid points per axis of the pair tables (0: none)")
+    parser.add_argument('--max-uncertain-share', type=float, default=SURROGATE_MAX_UNCERTAIN_SHARE,
+                        help="ship only vehicle types whose held-out listings are Uncertain at most this often")
+    parser.add_argument('--force', action='store_true', help="ship every vehicle type regardless")
+    parser.add_argument('--holdout', type=float, default=0.2, help="share of rows held out for the report")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=VALUE_SURROGATE_PATH)
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    values = ValueModel(os.path.join(BACKEND_DIR, 'condition_model.pkl'),
+                        os.path.join(BACKEND_DIR, 'price_model.pkl'), surrogate_path=None)
+    start = time.perf_counter()
+    surrogate = distill(values, n_knots=args.knots, pair_knots=args.pair_knots, holdout=args.holdout,
+                        seed=args.seed, max_uncertain_share=None if args.force else args.max_uncertain_share)
+    print_report(surrogate.metrics)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(surrogate.metrics, f, indent=2)
+
+    if not surrogate.tables:
+        print(f"\n[ERROR] Not saved: no vehicle type stays within {args.max_uncertain_share:.0%} Uncertain; "
+              f"the current {args.output} is kept")
+        return 1
+    surrogate.save(args.output)
+    print(f"\nSaved to {args.output} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    # Pickle against the importable module, not __main__, so the app can load it
+    from value_surrogate import main as _main
+    sys.exit(_main())
@@ -22,7 +22,7 @@ const MOCK_USER = {
 };
 
 let currentBrand = sessionStorage.getItem("businessBrand");
-let evData = [];
+const DASHBOARD_API = "https://ev-4ce7.onrender.com/dashboard";
 let currentUserData = MOCK_USER;
 
 // ==========================================
@@ -51,7 +51,7 @@ function initDashboard() {
     if (document.getElementById("walletBalanceDisplay")) {
         document.getElementById("walletBalanceDisplay").innerText = `₹${currentUserData.walletBalance.toLocaleString()}`;
     }
-    loadData(); // Load Analytics from JSON
+    loadData(); // Load Analytics from the dashboard rollups
     renderProfile();
     showSection('analytics');
 }
@@ -131,14 +131,14 @@ function setupBrandModalListeners() {
 // 4. ANALYTICS (Charts & KPIs)
 // ==========================================
 function loadData() {
-    fetch("backend-data/ev_vehicle_with_extra_10000.json")
-        .then(res => res.json())
-        .then(data => {
-            const rawData = Array.isArray(data) ? data : data.data;
-            // Basic cleanup
-            evData = rawData.filter(d => !['Tesla', 'Hyundai'].includes(d.Brand));
-            processAnalytics();
+    // Aggregated server-side for this brand (Tesla / Hyundai excluded as before)
+    const params = new URLSearchParams({ brand: currentBrand, exclude_brand: "Tesla,Hyundai" });
+    fetch(`${DASHBOARD_API}/rollups?${params}`)
+        .then(res => {
+            if (!res.ok) throw new Error("Dashboard rollups request failed");
+            return res.json();
         })
+        .then(processAnalytics)
         .catch(err => console.error("Failed to load analytics data:", err));
 }
 
@@ -166,16 +166,13 @@ window.togglePaymentUI = function () {
     }
 }
 
-function processAnalytics() {
-    // Filter for this brand
-    const brandData = evData.filter(d => d.Brand.toLowerCase() === currentBrand.toLowerCase());
-
-    if (!brandData.length) {
+function processAnalytics(rollup) {
+    if (!rollup.rows) {
         console.warn("No data for brand:", currentBrand);
     }
 
     // Mock Metrics
-    const baseCount = brandData.length || 0;
+    const baseCount = rollup.rows || 0;
     const views = baseCount * 125; // Simulated multiplier
     const leads = Math.floor(views * 0.08); // 8% conversion
     const engagement = baseCount > 0 ? (60 + Math.floor(Math.random() * 20)) : 0;
@@ -187,18 +184,16 @@ function processAnalytics() {
 
     // Chart 1: Category Interest
     const categoryMap = {};
-    brandData.forEach(d => {
-        const category = d.Vehicle_Category || "Unknown";
-        categoryMap[category] = (categoryMap[category] || 0) + (Number(d.Units_Sold_Per_Year) || 1);
+    (rollup.by.Vehicle_Category || []).forEach(g => {
+        categoryMap[g.key ?? "Unknown"] = g.sum.Units_Sold_Per_Year || g.count;
     });
 
     renderChart("brandInterestChart", "bar", Object.keys(categoryMap), Object.values(categoryMap), "Units Sold", "#6366f1");
 
     // Chart 2: Usage Type
     const usageMap = {};
-    brandData.forEach(d => {
-        const usage = d.Usage_Type || "Unknown";
-        usageMap[usage] = (usageMap[usage] || 0) + 1;
+    (rollup.by.Usage_Type || []).forEach(g => {
+        usageMap[g.key ?? "Unknown"] = g.count;
     });
 
     renderChart("demographicsChart", "doughnut", Object.keys(usageMap), Object.values(usageMap), "Distribution", ["#cbd5e1", "#6366f1", "#10b981", "#f59e0b"]);
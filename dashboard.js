@@ -2,43 +2,38 @@
 alert("dashboard.js loaded");
 
 
-fetch("backend-data/ev_vehicle_with_extra_10000.json")
-  .then(response => {
-    if (!response.ok) {
-      throw new Error("JSON file not found");
+const DASHBOARD_API = "https://ev-4ce7.onrender.com/dashboard";
+
+// Aggregates come pre-computed from /dashboard/rollups; the chart only
+// needs the first 10 listings, so those come from /dashboard/rows.
+Promise.all([
+  fetch(`${DASHBOARD_API}/rollups`),
+  fetch(`${DASHBOARD_API}/rows?page_size=10&fields=Vehicle_ID,Driving_Range_km`)
+])
+  .then(responses => {
+    if (!responses.every(response => response.ok)) {
+      throw new Error("Dashboard API request failed");
     }
-    return response.json();
+    return Promise.all(responses.map(response => response.json()));
   })
-  .then(data => {
-    console.log("JSON Loaded", data);
+  .then(([rollup, page]) => {
+    console.log("Rollups Loaded", rollup);
 
     /* ===============================
        DASHBOARD CALCULATIONS
     =============================== */
 
     // Total savings (example: subsidy sum)
-    const totalSavings = data.reduce(
-      (sum, ev) => sum + (ev.Government_Subsidy_Amount || 0),
-      0
-    );
+    const totalSavings = rollup.totals.Government_Subsidy_Amount || 0;
 
     // Total CO2 saved
-    const totalCO2 = data.reduce(
-      (sum, ev) => sum + (ev.CO2_Emissions_Saved_kg || 0),
-      0
-    );
+    const totalCO2 = rollup.totals.CO2_Emissions_Saved_kg || 0;
 
     // Total distance (driving range sum)
-    const totalDistance = data.reduce(
-      (sum, ev) => sum + (ev.Driving_Range_km || 0),
-      0
-    );
+    const totalDistance = rollup.totals.Driving_Range_km || 0;
 
     // Battery health (simulated average)
-    const avgBatteryHealth = Math.floor(
-      data.reduce((sum, ev) => sum + (ev.Battery_Health_Percentage || 85), 0) /
-      data.length
-    );
+    const avgBatteryHealth = Math.floor(rollup.means.Battery_Health_Percentage ?? 85);
 
     /* ===============================
        UPDATE UI
@@ -60,8 +55,8 @@ fetch("backend-data/ev_vehicle_with_extra_10000.json")
        CHART.JS – DISTANCE USAGE
     =============================== */
 
-    const labels = data.slice(0, 10).map(ev => ev.Vehicle_ID);
-    const distances = data.slice(0, 10).map(ev => ev.Driving_Range_km);
+    const labels = page.rows.map(ev => ev.Vehicle_ID);
+    const distances = page.rows.map(ev => ev.Driving_Range_km);
 
     const ctx = document.getElementById("distanceChart").getContext("2d");
 
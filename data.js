@@ -1,31 +1,19 @@
-fetch("backend-data/ev_vehicle_with_extra_10000.json")
+// Totals and per-year sums come pre-aggregated from the backend
+fetch("https://ev-4ce7.onrender.com/dashboard/rollups")
   .then(res => res.json())
-  .then(data => {
-    // Ensure we have an array (handle if wrapped in { data: [...] })
-    const rows = Array.isArray(data) ? data : data.data;
+  .then(rollup => {
+    const totalSales = rollup.totals.Units_Sold_Per_Year || 0;
+    const avgPrice = rollup.means.Vehicle_Price || 0;
 
-    let totalSales = 0;
-    let totalPrice = 0;
-    let count = 0;
-    let yearSales = {};
-
-    rows.forEach(row => {
-      const units = Number(row.Units_Sold_Per_Year);
-      const price = Number(row.Vehicle_Price);
-      const year = row.Purchase_Year;
-
-      if (!isNaN(units)) {
-        totalSales += units;
-        totalPrice += price;
-        count++;
-
-        yearSales[year] = (yearSales[year] || 0) + units;
-      }
+    // Integer keys iterate in ascending (year) order
+    const yearSales = {};
+    rollup.by.Purchase_Year.forEach(g => {
+      yearSales[g.key] = g.sum.Units_Sold_Per_Year || 0;
     });
 
     document.getElementById("totalSales").innerText = totalSales;
     document.getElementById("avgPrice").innerText =
-      Math.round(totalPrice / count);
+      Math.round(avgPrice);
 
     new Chart(document.getElementById("salesChart"), {
       type: "line",
@@ -79,22 +79,22 @@ function updateTimeSpent() {
 setInterval(updateTimeSpent, 1000);
 updateTimeSpent();
 
-// 📊 Load & Process CSV data
-let allEVData = [];
+// 📊 Load pre-aggregated EV data (see backend/dashboard_rollups.py)
+const DASHBOARD_API = 'https://ev-4ce7.onrender.com/dashboard';
+// Tesla and Hyundai are filtered out server-side
+const BASE_FILTERS = { exclude_brand: 'Tesla,Hyundai' };
+let allRollup = null;
+
+async function fetchDashboard(endpoint, params) {
+  const response = await fetch(`${DASHBOARD_API}/${endpoint}?${new URLSearchParams({ ...BASE_FILTERS, ...params })}`);
+  if (!response.ok) throw new Error(`Dashboard ${endpoint} request failed`);
+  return response.json();
+}
 
 // Using an async IIFE to allow await at the top level
 (async () => {
 
-  const response = await fetch('backend-data/ev_vehicle_with_extra_10000.json');
-  const data = await response.json();
-
-  // Ensure we have an array
-  let rawData = Array.isArray(data) ? data : data.data;
-
-  // Filter out Tesla and Hyundai
-  allEVData = rawData.filter(d =>
-    !['Tesla', 'Hyundai'].includes(d.Brand)
-  );
+  allRollup = await fetchDashboard('rollups', {});
 
   // Initialize with saved filter or default to All
   const savedBrand = localStorage.getItem("selectedBrand") || "All";
@@ -180,45 +180,35 @@ function initCharts() {
 }
 
 // Update Dashboard Function
-function updateDashboard(brand) {
-  if (!allEVData.length) return;
-
-  // Filter Data
-  const filteredData = brand === "All"
-    ? allEVData
-    : allEVData.filter(d => d.Brand === brand);
+async function updateDashboard(brand) {
+  if (!allRollup) return;
+
+  // Filter Data (server-side)
+  const filters = brand === "All" ? {} : { brand };
+  let rollup, largestBattery;
+  try {
+    [rollup, largestBattery] = await Promise.all([
+      brand === "All" ? allRollup : fetchDashboard('rollups', filters),
+      fetchDashboard('rows', { ...filters, sort: '-Battery_Capacity_kWh', page_size: 1, fields: 'Battery_Capacity_kWh' })
+    ]);
+  } catch (e) {
+    console.error("Failed to load EV data:", e);
+    return;
+  }
 
-  if (filteredData.length === 0) {
+  if (rollup.rows === 0) {
     console.warn("No data found for brand:", brand);
     return;
   }
 
   // 1. Calculate KPIs
-  let totalEfficiency = 0;
-  let maxBattery = 0;
-  let totalCO2 = 0;
-  let totalDistance = 0;
-  let totalBatteryHealth = 0; // Simulated if not present
-
-  // For Mode/Channel calculation
-  const channels = {};
-
-  filteredData.forEach(d => {
-    totalEfficiency += Number(d.Efficiency_km_per_kWh) || 0;
-    const bat = Number(d.Battery_Capacity_kWh) || 0;
-    if (bat > maxBattery) maxBattery = bat;
-
-    totalCO2 += Number(d.CO2_Emissions_Saved_kg) || 0;
-    totalDistance += Number(d.Driving_Range_km) || 0;
-
-    // Channel isn't in JSON, we can use Region or Usage_Type as proxy or keep simulated
-    // Let's use Usage_Type for the KPI text
-    const usage = d.Usage_Type || "Unknown";
-    channels[usage] = (channels[usage] || 0) + 1;
-  });
+  const maxBattery = Number(largestBattery.rows[0]?.Battery_Capacity_kWh) || 0;
+  const totalCO2 = rollup.totals.CO2_Emissions_Saved_kg || 0;
+  const totalDistance = rollup.totals.Driving_Range_km || 0;
 
-  const avgEfficiency = (totalEfficiency / filteredData.length).toFixed(2);
-  const topUse = Object.keys(channels).reduce((a, b) => channels[a] > channels[b] ? a : b, "N/A");
+  // Channel isn't in JSON, Usage_Type is the proxy; groups are sorted by count
+  const avgEfficiency = ((rollup.totals.Efficiency_km_per_kWh || 0) / rollup.rows).toFixed(2);
+  const topUse = rollup.by.Usage_Type?.[0]?.key ?? "N/A";
 
   // Overall Savings Calculation (Simulated logic from previous code)
   const savings = Math.round(totalDistance * 2); // ₹2 per km
@@ -249,45 +239,15 @@ function updateDashboard(brand) {
   if (document.getElementById("batteryHealth")) document.getElementById("batteryHealth").innerText = avgBatHealth + "%";
 
 
-  // 2. Prepare Chart Data Aggregations
-
-  // By Category
-  const categoryStats = {};
-  // Structure: { "SUV": { count: 0, totalChargeTime: 0, totalPrice: 0 } }
-
-  // By Brand (for the brand chart)
-  const brandCounts = {};
-
-  filteredData.forEach(d => {
-    const cat = d.Vehicle_Category || "Unknown";
-    if (!categoryStats[cat]) categoryStats[cat] = { count: 0, totalChargeTime: 0, totalPrice: 0, totalBattery: 0 };
-
-    categoryStats[cat].count++;
-    categoryStats[cat].totalChargeTime += Number(d.Charging_Time_Hours) || 0;
-    categoryStats[cat].totalPrice += Number(d.Net_Price_After_Subsidy) || Number(d.Vehicle_Price) || 0;
-    categoryStats[cat].totalBattery += Number(d.Battery_Capacity_kWh) || 0;
-
-    // For Global Brand Chart (if needed filtered, but usually this one is static "Market Overview". 
-    // However, if we want it to react to filters, it contradicts "Vehicle Count by Brand" logic if the filter is a single brand.
-    // Let's implement: If "All", show all brands. If specific brand, show models? 
-    // Plan says: "Count of vehicles per Brand". 
-    // If we select "Tesla", showing a bar chart of just "Tesla" is boring. 
-    // Let's keep Brand Chart showing Global Market Share ALWAYS (using allEVData), 
-    // OR if filtered, show Models distribution? 
-    // Let's stick to Global Market Share for Brand Chart when "All" is selected, 
-    // and maybe Model distribution if a Brand is selected.
-    // For simplicity/robustness: The Brand Chart will always show top brands from CURRENT filtered data (which is 1 brand if filtered).
-    // Actually, distinct charts usually imply distinct aggregations.
-    // Let's make "Vehicle Count by Brand" always show TOP brands from ALL data, to give context.
-    const b = d.Brand || "Unknown";
-    brandCounts[b] = (brandCounts[b] || 0) + 1;
-  });
+  // 2. Prepare Chart Data Aggregations (by Category)
+  const categoryGroups = rollup.by.Vehicle_Category || [];
+  const priceColumn = 'Net_Price_After_Subsidy' in rollup.totals ? 'Net_Price_After_Subsidy' : 'Vehicle_Price';
 
-  const categories = Object.keys(categoryStats);
-  const avgChargeTimes = categories.map(c => (categoryStats[c].totalChargeTime / categoryStats[c].count).toFixed(1));
-  const countsByCategory = categories.map(c => categoryStats[c].count);
-  const avgBatteryCapacity = categories.map(c => parseFloat((categoryStats[c].totalBattery / categoryStats[c].count).toFixed(1)));
-  const avgPrices = categories.map(c => Math.round(categoryStats[c].totalPrice / categoryStats[c].count));
+  const categories = categoryGroups.map(g => g.key);
+  const avgChargeTimes = categoryGroups.map(g => ((g.sum.Charging_Time_Hours || 0) / g.count).toFixed(1));
+  const countsByCategory = categoryGroups.map(g => g.count);
+  const avgBatteryCapacity = categoryGroups.map(g => parseFloat(((g.sum.Battery_Capacity_kWh || 0) / g.count).toFixed(1)));
+  const avgPrices = categoryGroups.map(g => Math.round((g.sum[priceColumn] || 0) / g.count));
 
   // Update Charging Chart (Bar)
   if (chargingChartInstance) {
@@ -312,24 +272,15 @@ function updateDashboard(brand) {
     let data = [];
 
     if (brand === "All") {
-      // Aggregate global brand counts
-      const bCounts = {};
-      allEVData.forEach(d => {
-        const b = d.Brand || "Unknown";
-        bCounts[b] = (bCounts[b] || 0) + 1;
-      });
-      labels = Object.keys(bCounts);
-      data = Object.values(bCounts);
+      // Global brand counts
+      labels = allRollup.by.Brand.map(g => g.key);
+      data = allRollup.by.Brand.map(g => g.count);
     } else {
-      // Show Models for this brand
-      // Strip trailing _NUMBER suffix (e.g. "MG_Hatchback_208" → "MG_Hatchback")
-      const mCounts = {};
-      filteredData.forEach(d => {
-        const m = (d.Model || "Unknown").replace(/_\d+$/, '');
-        mCounts[m] = (mCounts[m] || 0) + 1;
-      });
-      labels = Object.keys(mCounts);
-      data = Object.values(mCounts);
+      // Show Models for this brand; model_family is the Model without its
+      // trailing _NUMBER suffix (e.g. "MG_Hatchback_208" → "MG_Hatchback")
+      const families = rollup.by.model_family || [];
+      labels = families.map(g => g.key);
+      data = families.map(g => g.count);
       brandChartInstance.data.datasets[0].label = 'Model Count';
     }
 